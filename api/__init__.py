@@ -1,4 +1,5 @@
 from .openai_api import OpenAIHandler
 from .anthropic_api import AnthropicHandler
+from .client_pool import ClientPool, RateLimiter, get_client_pool, provider_available, available_providers
 
 # 將來可以導入其他 API 處理程序
@@ -1,20 +1,26 @@
 import os
-import anthropic
+
+from .client_pool import get_client_pool, require_provider
 
 class AnthropicHandler:
     """處理與 Anthropic API (Claude) 的交互"""
     
-    def __init__(self, model="claude-3-opus-20240229"):
+    def __init__(self, model="claude-3-opus-20240229", pool=None):
         """初始化 Anthropic API 處理器
         
         Args:
             model (str): 要使用的 Anthropic 模型名稱
+            pool (ClientPool, optional): 客戶端池。默認為進程內共享的客戶端池
         """
+        # SDK 未安裝時只有這個提供者不可用
+        require_provider("anthropic")
+        
         self.api_key = os.environ.get("ANTHROPIC_API_KEY")
         if not self.api_key:
             raise ValueError("缺少 ANTHROPIC_API_KEY 環境變數")
         
-        self.client = anthropic.Anthropic(api_key=self.api_key)
+        # 異步客戶端和限流器來自進程內共享的客戶端池，同時運行的多局遊戲共用連接和請求配額
+        self.pool = pool or get_client_pool()
         self.model = model
     
     async def get_response(self, prompt, system_message=None, temperature=0.7, max_tokens=500):
@@ -31,14 +37,15 @@ class AnthropicHandler:
         """
         system = system_message or ""
         
-        response = self.client.messages.create(
-            model=self.model,
-            system=system,
-            messages=[
-                {"role": "user", "content": prompt}
-            ],
-            temperature=temperature,
-            max_tokens=max_tokens
-        )
+        async with self.pool.limiter("anthropic"):
+            response = await self.pool.client("anthropic", self.api_key).messages.create(
+                model=self.model,
+                system=system,
+                messages=[
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=temperature,
+                max_tokens=max_tokens
+            )
         
         return response.content[0].text
@@ -0,0 +1,202 @@
+import asyncio
+import importlib.util
+import os
+import time
+import weakref
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+
+class RateLimiter:
+    """異步限流器：限制同時進行的請求數，並可選地限制每分鐘的請求數（令牌桶）"""
+
+    def __init__(self, max_concurrent: int = 8, requests_per_minute: float = 0):
+        """初始化
+
+        Args:
+            max_concurrent (int, optional): 同時進行的最大請求數。默認為 8
+            requests_per_minute (float, optional): 每分鐘最大請求數，0 表示不限。默認為 0
+        """
+        self.max_concurrent = max(1, max_concurrent)
+        self.requests_per_minute = requests_per_minute
+        self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        self._tokens = float(max(1, requests_per_minute))
+        self._updated_at = time.monotonic()
+        self._token_lock = asyncio.Lock()
+        self.active = 0  # 正在進行的請求數
+        self.waiting = 0  # 等待中的請求數
+
+    async def _take_token(self):
+        """等待令牌桶中有可用令牌"""
+        if self.requests_per_minute <= 0:
+            return
+        rate = self.requests_per_minute / 60.0
+        async with self._token_lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.requests_per_minute, self._tokens + (now - self._updated_at) * rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / rate)
+
+    async def __aenter__(self):
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+            try:
+                await self._take_token()
+            except BaseException:
+                self._semaphore.release()
+                raise
+        finally:
+            self.waiting -= 1
+        self.active += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.active -= 1
+        self._semaphore.release()
+
+
+# SDK 只在第一次創建客戶端時導入，不使用某個提供者的進程（例如規則機器人的批量模擬）
+# 不需要為它的導入付出啟動時間
+
+def _create_openai_client(api_key: str):
+    from openai import AsyncOpenAI
+    return AsyncOpenAI(api_key=api_key)
+
+
+def _create_anthropic_client(api_key: str):
+    import anthropic
+    return anthropic.AsyncAnthropic(api_key=api_key)
+
+
+# 各 API 提供者的客戶端工廠、密鑰環境變數和 SDK 模塊名
+PROVIDERS = {
+    "openai": (_create_openai_client, "OPENAI_API_KEY", "openai"),
+    "anthropic": (_create_anthropic_client, "ANTHROPIC_API_KEY", "anthropic"),
+}
+
+
+@lru_cache(maxsize=None)
+def provider_available(provider: str) -> bool:
+    """提供者的 SDK 是否已安裝（只查找模塊，不導入）
+
+    Args:
+        provider (str): "openai" 或 "anthropic"
+
+    Returns:
+        bool: 是否可用
+    """
+    return provider in PROVIDERS and importlib.util.find_spec(PROVIDERS[provider][2]) is not None
+
+
+def available_providers() -> List[str]:
+    """已安裝 SDK 的提供者
+
+    Returns:
+        List[str]: 提供者名稱
+    """
+    return [provider for provider in PROVIDERS if provider_available(provider)]
+
+
+def require_provider(provider: str):
+    """檢查提供者的 SDK 已安裝
+
+    Args:
+        provider (str): "openai" 或 "anthropic"
+
+    Raises:
+        ImportError: SDK 未安裝
+    """
+    if not provider_available(provider):
+        raise ImportError(f"未安裝 {PROVIDERS[provider][2]} 套件，無法使用該 API（請執行 'pip install {PROVIDERS[provider][2]}'）")
+
+
+class ClientPool:
+    """共享的 API 客戶端池
+
+    同一進程中的所有遊戲（例如界面中的多個分頁）共用每個提供者的一個異步客戶端及其連接池，
+    並通過同一個限流器控制總請求量。異步客戶端和限流器都綁定事件循環，因此按事件循環分別
+    保存；事件循環結束後自動釋放。
+    """
+
+    def __init__(self, max_concurrent: Optional[int] = None, requests_per_minute: Optional[float] = None):
+        """初始化
+
+        Args:
+            max_concurrent (Optional[int], optional): 每個提供者同時進行的最大請求數。默認讀取
+                API_MAX_CONCURRENCY 環境變數，未設置時為 8
+            requests_per_minute (Optional[float], optional): 每個提供者每分鐘的最大請求數。默認讀取
+                API_REQUESTS_PER_MINUTE 環境變數，未設置時不限
+        """
+        self.max_concurrent = max_concurrent if max_concurrent is not None else int(os.getenv("API_MAX_CONCURRENCY") or 8)
+        self.requests_per_minute = (requests_per_minute if requests_per_minute is not None
+                                    else float(os.getenv("API_REQUESTS_PER_MINUTE") or 0))
+        self._loops = weakref.WeakKeyDictionary()  # {事件循環: {"clients": {...}, "limiters": {...}}}
+
+    def _scope(self) -> Dict[str, Dict[Any, Any]]:
+        """當前事件循環的客戶端和限流器"""
+        loop = asyncio.get_running_loop()
+        scope = self._loops.get(loop)
+        if scope is None:
+            scope = self._loops[loop] = {"clients": {}, "limiters": {}}
+        return scope
+
+    def client(self, provider: str, api_key: Optional[str] = None):
+        """獲取提供者的共享客戶端（需在事件循環中調用）
+
+        Args:
+            provider (str): "openai" 或 "anthropic"
+            api_key (Optional[str], optional): API 密鑰。默認讀取對應的環境變數
+
+        Returns:
+            客戶端實例（AsyncOpenAI 或 AsyncAnthropic）
+        """
+        factory, env_key, _ = PROVIDERS[provider]
+        api_key = api_key or os.environ.get(env_key)
+        clients = self._scope()["clients"]
+        key = (provider, api_key)
+        if key not in clients:
+            clients[key] = factory(api_key)
+        return clients[key]
+
+    def limiter(self, provider: str) -> RateLimiter:
+        """獲取提供者的共享限流器（需在事件循環中調用）
+
+        Args:
+            provider (str): "openai" 或 "anthropic"
+
+        Returns:
+            RateLimiter: 限流器
+        """
+        limiters = self._scope()["limiters"]
+        if provider not in limiters:
+            limiters[provider] = RateLimiter(self.max_concurrent, self.requests_per_minute)
+        return limiters[provider]
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """獲取當前事件循環中各提供者的請求統計
+
+        Returns:
+            Dict[str, Dict[str, int]]: {provider: {"active": int, "waiting": int}}
+        """
+        return {provider: {"active": limiter.active, "waiting": limiter.waiting}
+                for provider, limiter in self._scope()["limiters"].items()}
+
+
+_client_pool = None
+
+
+def get_client_pool() -> ClientPool:
+    """獲取進程內共享的客戶端池
+
+    Returns:
+        ClientPool: 客戶端池
+    """
+    global _client_pool
+    if _client_pool is None:
+        _client_pool = ClientPool()
+    return _client_pool
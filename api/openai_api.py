@@ -1,20 +1,26 @@
 import os
-from openai import OpenAI
+
+from .client_pool import get_client_pool, require_provider
 
 class OpenAIHandler:
     """處理與 OpenAI API 的交互"""
     
-    def __init__(self, model="gpt-4"):
+    def __init__(self, model="gpt-4", pool=None):
         """初始化 OpenAI API 處理器
         
         Args:
             model (str): 要使用的 OpenAI 模型名稱
+            pool (ClientPool, optional): 客戶端池。默認為進程內共享的客戶端池
         """
+        # SDK 未安裝時只有這個提供者不可用
+        require_provider("openai")
+        
         self.api_key = os.environ.get("OPENAI_API_KEY")
         if not self.api_key:
             raise ValueError("缺少 OPENAI_API_KEY 環境變數")
         
-        self.client = OpenAI(api_key=self.api_key)
+        # 異步客戶端和限流器來自進程內共享的客戶端池，同時運行的多局遊戲共用連接和請求配額
+        self.pool = pool or get_client_pool()
         self.model = model
     
     async def get_response(self, prompt, system_message=None, temperature=0.7, max_tokens=500):
@@ -36,11 +42,12 @@ class OpenAIHandler:
         
         messages.append({"role": "user", "content": prompt})
         
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=messages,
-            temperature=temperature,
-            max_tokens=max_tokens
-        )
+        async with self.pool.limiter("openai"):
+            response = await self.pool.client("openai", self.api_key).chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens
+            )
         
         return response.choices[0].message.content
@@ -0,0 +1,212 @@
+import random
+from typing import Dict, List, Optional
+
+from utils.text_utils import ROLE_DISPLAY_NAMES
+
+
+class BotPlayerHandler:
+    """不調用 API 的規則玩家，用於填充座位
+
+    與 HumanPlayerHandler 一樣實現 get_response，角色代碼照常構建提示並解析回應。機器人
+    根據提示判斷當前是哪個行動，然後結合公開信息表和自己角色掌握的信息做決定：投票跟隨
+    被指控最多的玩家，狼人優先攻擊聲稱預言家的玩家，預言家優先查驗得票最多的玩家。
+
+    回應中按優先順序列出多名玩家，角色解析回應時取第一個有效的 ID，因此即使首選目標
+    不合法（例如守衛不能連續守護同一人），也會自動落到下一個候選。
+    """
+
+    model = "Bot"
+
+    def __init__(self, player_id: int, player_name: str, game_state, rng: Optional[random.Random] = None):
+        """初始化機器人玩家
+
+        Args:
+            player_id (int): 玩家 ID
+            player_name (str): 玩家名稱
+            game_state (GameState): 遊戲狀態（只讀取公開信息和自己角色的信息）
+            rng (Optional[random.Random], optional): 隨機數生成器，用於打破平局。默認使用自己角色的
+                生成器（按遊戲種子播種，因此機器人的決定也可以重現）
+        """
+        self.player_id = player_id
+        self.player_name = player_name
+        self.game_state = game_state
+        self.rng = rng
+
+    async def get_response(self, prompt, system_message=None, temperature=0.7, max_tokens=500):
+        """根據提示中的行動類型生成回應
+
+        Args:
+            prompt (str): 提示
+            system_message (str, optional): 系統消息
+            temperature (float, optional): 不適用於機器人
+            max_tokens (int, optional): 不適用於機器人
+
+        Returns:
+            str: 回應
+        """
+        # 只看系統消息和提示的第一行，避免被歷史記錄中的文字誤導
+        text = f"{system_message or ''}\n{(prompt or '').splitlines()[0] if prompt else ''}"
+
+        if "投票決策" in text:
+            return f"我投票給{self._format(self._vote_ranking())}"
+        if "狼人行動階段" in text:
+            return f"我選擇攻擊{self._format(self._attack_ranking())}"
+        if "預言家行動階段" in text:
+            return f"我選擇查驗{self._format(self._check_ranking())}"
+        if "守衛行動階段" in text:
+            return f"我選擇守護{self._format(self._protect_ranking())}"
+        if "女巫行動階段" in text:
+            return self._witch_response(prompt)
+        if "獵人開槍階段" in text:
+            suspects = self._suspects()
+            return f"我開槍帶走{self._format(suspects)}" if suspects else "我不開槍"
+        if "狼殺手行動階段" in text:
+            return f"我選擇擊殺{self._format(self._vote_ranking())}"
+        if "魔術師行動階段" in text:
+            return "今晚不行動"
+        return self._speech()
+
+    # 信息收集
+
+    @property
+    def _role(self):
+        """自己的角色對象"""
+        return self.game_state.player_objects.get(self.player_id)
+
+    @property
+    def _is_werewolf(self) -> bool:
+        """自己是否屬於狼人陣營"""
+        role = self._role
+        return role is not None and role.role_key == "werewolf"
+
+    def _alive_others(self) -> List[int]:
+        """除自己以外的存活玩家"""
+        return [p["player_id"] for p in self.game_state.players
+                if p["is_alive"] and p["player_id"] != self.player_id]
+
+    def _teammates(self) -> List[int]:
+        """狼人同伴（自己是狼人時）"""
+        return list(getattr(self._role, "teammates", [])) if self._is_werewolf else []
+
+    def _known(self) -> Dict[int, bool]:
+        """自己掌握或公開聲明的查驗結果 {player_id: 是否為狼人}
+
+        預言家使用自己的查驗記錄，狼殺手知道所有狼人，其他玩家採信聲稱預言家的玩家公開的結果。
+        """
+        known = {}
+        for row in self.game_state.public_facts.rows.values():
+            if row["claim"] == "seer":
+                for claim in row["check_claims"]:
+                    known[claim["target"]] = claim["result"] == "狼人"
+
+        role = self._role
+        known.update(getattr(role, "checked_players", {}))
+        for player_id in getattr(role, "known_werewolves", []):
+            known[player_id] = True
+        return known
+
+    def _accusations(self) -> Dict[int, int]:
+        """每名玩家被指控的總次數"""
+        return {player_id: sum(row["accused_by"].values())
+                for player_id, row in self.game_state.public_facts.rows.items()}
+
+    def _votes_received(self) -> Dict[int, int]:
+        """每名玩家歷次投票中獲得的總票數"""
+        received = {}
+        for row in self.game_state.public_facts.rows.values():
+            for target_id in row["votes"].values():
+                received[target_id] = received.get(target_id, 0) + 1
+        return received
+
+    def _rank(self, candidates: List[int], *keys: Dict[int, float]) -> List[int]:
+        """按多個分數依次排序（分數越高越靠前），平局隨機
+
+        Args:
+            candidates (List[int]): 候選玩家
+            *keys (Dict[int, float]): 分數表，不在表中的玩家記為 0
+
+        Returns:
+            List[int]: 排序後的玩家
+        """
+        shuffled = list(candidates)
+        (self.rng or getattr(self._role, "rng", random)).shuffle(shuffled)
+        return sorted(shuffled, key=lambda pid: tuple(-key.get(pid, 0) for key in keys))
+
+    @staticmethod
+    def _format(ranking: List[int]) -> str:
+        """把排序結果格式化為回應，第一個是首選，其餘作為備選"""
+        if not ranking:
+            return "（沒有可選的玩家）"
+        first, rest = ranking[0], ranking[1:]
+        return f"玩家{first}" + (f"。備選：{'、'.join(f'玩家{pid}' for pid in rest)}" if rest else "")
+
+    # 決策
+
+    def _vote_ranking(self) -> List[int]:
+        """投票排序：已知的狼人，其次是被指控最多的玩家；已知的好人和狼人同伴排在最後"""
+        candidates = self._alive_others()
+        known = self._known()
+        if self._is_werewolf:
+            # 狼人迴避同伴，跟隨對好人的指控
+            avoid = {pid: -1 for pid in self._teammates()}
+            return self._rank(candidates, avoid, self._accusations())
+        verdict = {pid: (1 if is_werewolf else -1) for pid, is_werewolf in known.items()}
+        return self._rank(candidates, verdict, self._accusations(), self._votes_received())
+
+    def _suspects(self) -> List[int]:
+        """有理由懷疑的玩家（已知的狼人或被指控過），按懷疑程度排序"""
+        known = self._known()
+        accusations = self._accusations()
+        return [pid for pid in self._vote_ranking()
+                if known.get(pid) or (accusations.get(pid, 0) > 0 and known.get(pid) is not False)]
+
+    def _attack_ranking(self) -> List[int]:
+        """攻擊排序：聲稱預言家的玩家，其次是聲稱其他神職的玩家"""
+        teammates = set(self._teammates())
+        candidates = [pid for pid in self._alive_others() if pid not in teammates]
+        rows = self.game_state.public_facts.rows
+        seer = {pid: 1 for pid in candidates if rows[pid]["claim"] == "seer"}
+        special = {pid: 1 for pid in candidates if rows[pid]["claim"] not in (None, "villager", "werewolf")}
+        return self._rank(candidates, seer, special)
+
+    def _check_ranking(self) -> List[int]:
+        """查驗排序：未查驗過的玩家中得票最多者，其次是被指控最多者"""
+        checked = getattr(self._role, "checked_players", {})
+        unchecked = {pid: 1 for pid in self._alive_others() if pid not in checked}
+        return self._rank(self._alive_others(), unchecked, self._votes_received(), self._accusations())
+
+    def _protect_ranking(self) -> List[int]:
+        """守護排序：聲稱預言家的玩家，其次是自己"""
+        rows = self.game_state.public_facts.rows
+        candidates = [p["player_id"] for p in self.game_state.players if p["is_alive"]]
+        seer = {pid: 1 for pid in candidates if rows[pid]["claim"] == "seer"}
+        return self._rank(candidates, seer, {self.player_id: 1})
+
+    def _witch_response(self, prompt: str) -> str:
+        """女巫：能救則救，否則毒死已知的狼人"""
+        role = self._role
+        attack_target = self.game_state.night_context.get("attack_target")
+        if getattr(role, "has_antidote", False) and attack_target is not None and "解藥救" in prompt:
+            return f"我使用解藥救玩家{attack_target}"
+        wolves = [pid for pid, is_werewolf in self._known().items()
+                  if is_werewolf and pid in self._alive_others()]
+        if getattr(role, "has_poison", False) and wolves:
+            return f"我使用毒藥毒死玩家{wolves[0]}"
+        return "我不使用藥水"
+
+    def _speech(self) -> str:
+        """白天發言：預言家公開查驗結果，其他人指控最可疑的玩家"""
+        parts = []
+        role = self._role
+        checked = getattr(role, "checked_players", {}) if role and role.role_key == "seer" else {}
+        if checked:
+            parts.append(f"我是{ROLE_DISPLAY_NAMES['seer']}")
+            for player_id, is_werewolf in checked.items():
+                parts.append(f"我查驗了玩家{player_id}，他是{'狼人' if is_werewolf else '好人'}")
+
+        suspects = self._suspects() if not self._is_werewolf else self._vote_ranking()[:1]
+        if suspects:
+            parts.append(f"我懷疑玩家{suspects[0]}是狼人，建議投票給玩家{suspects[0]}")
+        if not parts:
+            parts.append("目前信息不多，我先聽聽大家的發言")
+        return "。".join(parts) + "。"
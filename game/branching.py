@@ -0,0 +1,105 @@
+import asyncio
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+from .bot_player import BotPlayerHandler
+from .game_manager import GameManager
+from .game_state import GameState
+
+
+class ScriptedHandler:
+    """先按順序返回預設的回應，用完後交給原來的處理程序
+
+    用於在分支中強制某個決定，例如讓狼人首領的下一次回應變成「我選擇攻擊玩家3」。
+    """
+
+    def __init__(self, responses: List[str], fallback=None):
+        """初始化
+
+        Args:
+            responses (List[str]): 預設的回應
+            fallback: 預設回應用完後使用的處理程序。默認為 None（返回空字符串）
+        """
+        self.responses = deque(responses)
+        self.fallback = fallback
+        self.model = getattr(fallback, "model", "Scripted")
+
+    async def get_response(self, prompt, system_message=None, temperature=0.7, max_tokens=500):
+        """返回下一條預設回應或轉交給原處理程序
+
+        Args:
+            prompt (str): 提示
+            system_message (str, optional): 系統消息。默認為 None
+            temperature (float, optional): 溫度參數。默認為 0.7
+            max_tokens (int, optional): 最大生成標記數。默認為 500
+
+        Returns:
+            str: 回應
+        """
+        if self.responses:
+            return self.responses.popleft()
+        if self.fallback is None:
+            return ""
+        return await self.fallback.get_response(prompt, system_message, temperature, max_tokens)
+
+
+def fork_manager(source: GameManager, name: str, handlers: Optional[Dict[int, Any]] = None,
+                 models: Optional[Dict[int, str]] = None, seed: Optional[int] = None,
+                 state: Optional[GameState] = None) -> GameManager:
+    """從遊戲管理器（或指定的階段快照）分叉出一個分支管理器
+
+    Args:
+        source (GameManager): 原遊戲的管理器，提供處理程序和設置
+        name (str): 分支名稱，記錄在分支的設置中
+        handlers (Optional[Dict[int, Any]], optional): 替換的處理程序 {player_id: api_handler}。默認為 None
+        models (Optional[Dict[int, str]], optional): 替換座位的模型名稱，用於結果記錄。默認為 None
+        seed (Optional[int], optional): 分支的遊戲種子。默認沿用原遊戲
+        state (Optional[GameState], optional): 分叉的起點。默認為 source 的當前狀態
+
+    Returns:
+        GameManager: 分支管理器（不寫日誌）
+    """
+    branch = GameManager()
+    branch.game_state = (state or source.game_state).fork(seed)
+    branch.game_state.events = branch.events
+    branch.api_handlers = {}
+    for player_id, handler in source.api_handlers.items():
+        # 機器人讀取遊戲狀態，需要指向分支自己的狀態
+        if isinstance(handler, BotPlayerHandler):
+            handler = BotPlayerHandler(handler.player_id, handler.player_name, branch.game_state, handler.rng)
+        branch.api_handlers[player_id] = handler
+    branch.api_handlers.update(handlers or {})
+    branch.api_models = dict(source.api_models, **(models or {}))
+    branch.human_players = list(getattr(source, "human_players", []))
+    branch.bot_players = list(getattr(source, "bot_players", []))
+    branch.use_single_api = getattr(source, "use_single_api", False)
+    branch.api_type = getattr(source, "api_type", None)
+    branch.model_name = getattr(source, "model_name", None)
+    branch.summarizer_handler = getattr(source, "summarizer_handler", None)
+    branch.game_config = dict(source.game_config, branch=name, forked_from=source.game_id,
+                              forked_at={"day": branch.game_state.day, "phase": branch.game_state.phase})
+    return branch
+
+
+async def run_branches(source: GameManager, branches: Dict[str, Dict[str, Any]], max_days: int = 10,
+                       state: Optional[GameState] = None, save_results: bool = False) -> Dict[str, GameManager]:
+    """從同一個起點分叉多個分支並發運行
+
+    Args:
+        source (GameManager): 原遊戲的管理器
+        branches (Dict[str, Dict[str, Any]]): {分支名稱: fork_manager 的關鍵字參數（handlers, models, seed）}
+        max_days (int, optional): 最大遊戲天數。默認為 10
+        state (Optional[GameState], optional): 分叉的起點，例如 GameState.from_journal(path, day, phase)。
+            默認為 source 的當前狀態
+        save_results (bool, optional): 是否保存每個分支的結果文件。默認為 False
+
+    Returns:
+        Dict[str, GameManager]: {分支名稱: 運行結束的分支管理器}
+    """
+    managers = {}
+    for name, options in branches.items():
+        managers[name] = fork_manager(source, name, state=state, **options)
+        managers[name].save_results = save_results
+
+    await asyncio.gather(*(manager.run_game(max_days) for manager in managers.values()))
+    return managers
@@ -0,0 +1,349 @@
+import asyncio
+import multiprocessing
+import threading
+import traceback
+from typing import Any, Callable, Dict, Optional
+
+from .events import EventBus, MESSAGE_TYPES, PHASE_CHANGE
+from .game_manager import GameManager
+from .human_input import HumanInputHandler, HumanPlayerHandler
+from utils.result_writer import ResultWriteError, get_result_writer
+
+# 引擎進程可同時運行多局遊戲（會話），每局遊戲有自己的 GameManager 和事件流，
+# 共享進程內的 API 客戶端池和限流器。消息都是元組：
+#   引擎 → 界面：(session_id, message)，message 為 ("EVENTS", [GameEvent, ...])、("STATUS", text)、
+#                ("UPDATE_STATUS", dict)、("HUMAN_PROMPT", prompt, system_message, turn_id, timeout, player_name)、
+#                ("HUMAN_TIMEOUT", turn_id, response)、("SUMMARY", summary, result_path)、
+#                ("ERROR", text) 或 ("DONE",)
+#   界面 → 引擎：("START", session_id, command)、("HUMAN_RESPONSE", session_id, text, turn_id)、
+#                ("STOP", session_id)、("SHUTDOWN",)
+# turn_id 標識人類玩家的每一回合，回合超時後才到達的回應不會被當作下一回合的回答。
+# 同一局中的人類座位輪流回應（同一時間最多一個等待中的提示），界面只需要一個輸入框。
+
+
+class PipeHumanHandler(HumanInputHandler):
+    """在引擎進程中代表人類玩家：把提示發給界面進程，等待界面回傳的回應"""
+
+    def __init__(self, session: "_EngineSession", player_name: str, timeout: Optional[float] = None, fallback=None):
+        """初始化
+
+        Args:
+            session (_EngineSession): 玩家所在的遊戲會話
+            player_name (str): 玩家名稱
+            timeout (Optional[float], optional): 每回合的時限（秒）。默認為 None（不限時）
+            fallback (optional): 超時時給出默認行動的處理程序。默認為 None
+        """
+        super().__init__(player_name, timeout, fallback)
+        self.session = session
+        self.turn_id = None  # 本座位最近一回合的編號
+
+    async def _ask(self, prompt: str, system_message: Optional[str]) -> str:
+        """把提示發給界面並等待人類玩家的回應"""
+        self.turn_id = self.session.next_turn_id()
+        return await self.session.request_human_response(self.turn_id, prompt, system_message, self.timeout,
+                                                         self.player_name)
+
+    def _turn_lock(self) -> asyncio.Lock:
+        # 同一局的人類座位共用界面分頁中的一個輸入框
+        return self.session.human_lock
+
+    def _on_timeout(self, response: str):
+        self.session.send(("HUMAN_TIMEOUT", self.turn_id, response))
+
+
+class _EngineSession:
+    """引擎進程中的一局遊戲：發送帶會話 ID 的消息，等待該局人類玩家的回應"""
+
+    def __init__(self, host: "_EngineHost", session_id: str):
+        self.host = host
+        self.session_id = session_id
+        self.task = None  # 運行遊戲的任務，收到停止命令時取消
+        self.turn_id = 0  # 最近一次人類玩家提示的編號
+        self.human_lock = asyncio.Lock()  # 人類座位輪流回應
+        self._response = None  # 等待中的人類回應（asyncio.Future）
+
+    def send(self, message: tuple):
+        """發送本局遊戲的消息"""
+        self.host.send((self.session_id, message))
+
+    def next_turn_id(self) -> int:
+        """分配下一個人類玩家回合的編號"""
+        self.turn_id += 1
+        return self.turn_id
+
+    async def request_human_response(self, turn_id: int, prompt: str, system_message: Optional[str],
+                                     timeout: Optional[float] = None, player_name: Optional[str] = None) -> str:
+        """發送人類玩家提示並等待回應（調用者持有 human_lock）"""
+        self._response = asyncio.get_running_loop().create_future()
+        self.send(("HUMAN_PROMPT", prompt, system_message, turn_id, timeout, player_name))
+        try:
+            return await self._response
+        finally:
+            self._response = None
+
+    def deliver_response(self, text: str, turn_id: Optional[int] = None):
+        # 只接受當前回合的回應（turn_id 為 None 時不檢查）
+        if turn_id is not None and turn_id != self.turn_id:
+            return
+        if self._response is not None and not self._response.done():
+            self._response.set_result(text)
+
+
+class _EngineHost:
+    """引擎進程一側的管道：在同一個事件循環中運行多局遊戲，後台線程接收界面的命令"""
+
+    def __init__(self, conn, loop: asyncio.AbstractEventLoop):
+        self.conn = conn
+        self.loop = loop
+        self.sessions = {}  # {session_id: _EngineSession}
+        self._closed = asyncio.Event()
+
+    def send(self, message: tuple):
+        """發送消息（界面進程已退出時忽略）"""
+        try:
+            self.conn.send(message)
+        except (BrokenPipeError, EOFError, OSError):
+            pass
+
+    def start_reader(self):
+        """啟動接收線程"""
+        threading.Thread(target=self._read_loop, daemon=True).start()
+
+    def _read_loop(self):
+        while True:
+            try:
+                message = self.conn.recv()
+            except (EOFError, OSError):
+                # 界面進程已退出，停止所有遊戲
+                self.loop.call_soon_threadsafe(self._closed.set)
+                return
+            self.loop.call_soon_threadsafe(self._dispatch, message)
+            if message[0] == "SHUTDOWN":
+                return
+
+    def _dispatch(self, message: tuple):
+        """在事件循環中處理界面的命令"""
+        if message[0] == "SHUTDOWN":
+            self._closed.set()
+            return
+
+        session = self.sessions.get(message[1])
+        if message[0] == "START":
+            if session is None:
+                session = self.sessions[message[1]] = _EngineSession(self, message[1])
+                session.task = self.loop.create_task(self._run_session(session, message[2]))
+        elif session is None:
+            return
+        elif message[0] == "HUMAN_RESPONSE":
+            session.deliver_response(message[2], message[3] if len(message) > 3 else None)
+        elif message[0] == "STOP":
+            session.task.cancel()
+
+    async def serve(self):
+        """運行直到收到關閉命令或界面進程退出，然後停止所有遊戲"""
+        self.start_reader()
+        await self._closed.wait()
+        tasks = [session.task for session in self.sessions.values()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        # 子進程退出時不會執行 atexit，在這裡等待結果文件寫完（失敗已由寫入器記錄到日誌，
+        # 運行中的遊戲已在 flush 時把失敗報告給界面）
+        get_result_writer().close(raise_errors=False)
+
+    async def _run_session(self, session: _EngineSession, command: Dict[str, Any]):
+        """設置並運行一局遊戲，通過管道發布事件和結果"""
+        events = EventBus()
+        events.subscribe(lambda batch: session.send(("EVENTS", batch)), MESSAGE_TYPES + (PHASE_CHANGE,), batched=True)
+
+        try:
+            if command["action"] == "load":
+                session.send(("STATUS", "游戲狀態: 載入中"))
+                manager = GameManager.load(command["file_path"], events=events, **command.get("options", {}))
+            else:
+                manager = GameManager(events)
+                manager.setup_game(**command["setup"])
+
+            for player_id, handler in manager.api_handlers.items():
+                if isinstance(handler, HumanPlayerHandler):
+                    manager.api_handlers[player_id] = PipeHumanHandler(session, handler.player_name,
+                                                                       handler.timeout, handler.fallback)
+
+            werewolves = sum(1 for p in manager.game_state.players if p["is_alive"] and p["role"] == "werewolf")
+            villagers = sum(1 for p in manager.game_state.players if p["is_alive"] and p["role"] != "werewolf")
+            session.send(("STATUS", "游戲狀態: 進行中"))
+            session.send(("UPDATE_STATUS", {
+                "day": f"Day {manager.game_state.day}",
+                "alive": f"狼人: {werewolves} | 村民: {villagers}"
+            }))
+
+            await manager.run_game(command.get("max_days", 10))
+
+            # 等待結果文件寫完再報告路徑（在線程池中等待，不阻塞其他遊戲）
+            result_path = manager.result_path
+            try:
+                await self.loop.run_in_executor(None, get_result_writer().flush)
+            except ResultWriteError as e:
+                session.send(("ERROR", str(e)))
+                result_path = None
+            session.send(("SUMMARY", manager.get_game_summary(), result_path))
+        except asyncio.CancelledError:
+            session.send(("STATUS", "游戲狀態: 已停止"))
+        except Exception as e:
+            session.send(("ERROR", f"游戲運行錯誤：{e}\n{traceback.format_exc()}"))
+            session.send(("STATUS", "游戲狀態: 錯誤"))
+        finally:
+            events.flush()
+            session.send(("DONE",))
+            self.sessions.pop(session.session_id, None)
+
+
+def engine_main(conn):
+    """引擎進程（或線程模式下引擎線程）的入口
+
+    Args:
+        conn: multiprocessing 管道的引擎一端
+    """
+    async def serve():
+        await _EngineHost(conn, asyncio.get_running_loop()).serve()
+
+    try:
+        asyncio.run(serve())
+    finally:
+        conn.close()
+
+
+class EngineProcess:
+    """在獨立進程中運行遊戲引擎，界面進程只接收消息
+
+    引擎的 CPU 工作（構建提示、序列化、分析）不再與 Tk 爭用 GIL，引擎崩潰也不會影響窗口。
+    一個引擎進程可同時運行多局遊戲（以會話 ID 區分），它們共享進程內的 API 客戶端池和限流器。
+    接收線程把引擎的消息交給 on_message(session_id, message)；進程意外退出時向所有運行中的
+    會話報告錯誤。use_process 為 False 時引擎在本進程的線程中運行，消息協議完全相同。
+    """
+
+    def __init__(self, on_message: Callable[[str, tuple], None], use_process: bool = True):
+        """初始化
+
+        Args:
+            on_message (Callable[[str, tuple], None]): 接收引擎消息的回調，參數為會話 ID 和消息
+                （在接收線程中調用，需線程安全）
+            use_process (bool, optional): 是否在子進程中運行引擎。默認為 True
+        """
+        self.on_message = on_message
+        self.use_process = use_process
+        self.process = None  # multiprocessing.Process，或線程模式下的 threading.Thread
+        self._conn = None
+        self._send_lock = threading.Lock()
+        self._running = set()  # 已啟動但尚未結束的會話 ID
+        self._stopping = False
+
+    def start(self):
+        """啟動引擎進程（已在運行時不做任何事）"""
+        if self.is_alive():
+            return
+        self._stopping = False
+        self._running = set()
+        if self.use_process:
+            # 使用 spawn：在已有 Tk 和多個線程的進程中 fork 並不安全
+            context = multiprocessing.get_context("spawn")
+            self._conn, child_conn = context.Pipe()
+            self.process = context.Process(target=engine_main, args=(child_conn,), daemon=True)
+            self.process.start()
+            child_conn.close()
+        else:
+            self._conn, child_conn = multiprocessing.Pipe()
+            self.process = threading.Thread(target=engine_main, args=(child_conn,), daemon=True)
+            self.process.start()
+        threading.Thread(target=self._read_loop, args=(self._conn, self.process), daemon=True).start()
+
+    def _read_loop(self, conn, process):
+        """接收引擎消息直到管道關閉"""
+        while True:
+            try:
+                session_id, message = conn.recv()
+            except (EOFError, OSError):
+                break
+            if message[0] == "DONE":
+                self._running.discard(session_id)
+                continue
+            self.on_message(session_id, message)
+
+        process.join(timeout=5)
+        if process is not self.process:
+            return  # 引擎已重新啟動，舊進程的會話都已結束
+        running, self._running = self._running, set()
+        if not self._stopping:
+            for session_id in sorted(running):
+                self.on_message(session_id, ("ERROR", f"遊戲引擎意外退出（退出碼：{getattr(process, 'exitcode', None)}）"))
+                self.on_message(session_id, ("STATUS", "游戲狀態: 錯誤"))
+
+    def send(self, message: tuple):
+        """向引擎發送消息（引擎已退出時忽略）"""
+        with self._send_lock:
+            try:
+                self._conn.send(message)
+            except (BrokenPipeError, EOFError, OSError, AttributeError):
+                pass
+
+    def start_game(self, session_id: str, command: Dict[str, Any]):
+        """在引擎中開始一局遊戲（引擎未運行時先啟動）
+
+        Args:
+            session_id (str): 會話 ID，該局遊戲的消息都帶有此 ID
+            command (Dict[str, Any]): 遊戲命令。新遊戲為 {"action": "new", "setup": setup_game 的參數,
+                "max_days": int}；載入遊戲為 {"action": "load", "file_path": str,
+                "options": GameManager.load 的其他參數, "max_days": int}
+        """
+        self.start()
+        self._running.add(session_id)
+        self.send(("START", session_id, command))
+
+    def send_human_response(self, session_id: str, text: str, turn_id: Optional[int] = None):
+        """把人類玩家的回應發給引擎
+
+        Args:
+            session_id (str): 會話 ID
+            text (str): 回應
+            turn_id (Optional[int], optional): 回應的回合（HUMAN_PROMPT 中的 turn_id）。默認為 None（不檢查）
+        """
+        self.send(("HUMAN_RESPONSE", session_id, text, turn_id))
+
+    def stop_game(self, session_id: str):
+        """停止一局遊戲（其他遊戲不受影響）
+
+        Args:
+            session_id (str): 會話 ID
+        """
+        if session_id in self._running:
+            self.send(("STOP", session_id))
+
+    def is_running(self, session_id: str) -> bool:
+        """某局遊戲是否仍在運行
+
+        Args:
+            session_id (str): 會話 ID
+
+        Returns:
+            bool: 是否在運行
+        """
+        return session_id in self._running and self.is_alive()
+
+    def is_alive(self) -> bool:
+        """引擎進程是否仍在運行"""
+        return self.process is not None and self.process.is_alive()
+
+    def stop(self, timeout: float = 3.0):
+        """停止所有遊戲並關閉引擎，超時後強制結束進程
+
+        Args:
+            timeout (float, optional): 等待正常退出的秒數。默認為 3.0
+        """
+        if self.process is None:
+            return
+        self._stopping = True
+        self.send(("SHUTDOWN",))
+        self.process.join(timeout)
+        if self.use_process and self.process.is_alive():
+            self.process.terminate()
+            self.process.join(1)
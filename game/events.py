@@ -0,0 +1,298 @@
+import asyncio
+import sys
+import time
+from collections import Counter, defaultdict
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+# 引擎事件類型
+PHASE_CHANGE = "phase_change"  # 進入新階段：day, phase, alive_werewolves, alive_villagers
+LOG = "log"  # 一般遊戲日誌
+SPEECH = "speech"  # 白天發言：player_id, content
+VOTE = "vote"  # 有效投票：player_id, target_id
+DEATH = "death"  # 玩家死亡：player_id, role, cause
+GAME_OVER = "game_over"  # 分出勝負：winner
+ANNOUNCE = "announce"  # 遊戲管理器的旁白，tag 為顯示樣式
+LLM_CALL_START = "llm_call_start"  # LLM 調用開始：player_id, model
+LLM_CALL_END = "llm_call_end"  # LLM 調用結束：player_id, model, duration, error
+
+# 由遊戲狀態寫入遊戲日誌（GameState.log）的事件類型
+GAME_LOG_TYPES = (LOG, SPEECH, VOTE, DEATH, GAME_OVER)
+# 帶可讀文本的事件類型（控制台和日誌面板顯示的內容）
+MESSAGE_TYPES = GAME_LOG_TYPES + (ANNOUNCE,)
+
+
+class GameEvent:
+    """引擎發布的一個類型化事件"""
+
+    __slots__ = ("type", "message", "data", "time")
+
+    def __init__(self, event_type: str, message: Optional[str] = None, data: Dict[str, Any] = None):
+        """初始化
+
+        Args:
+            event_type (str): 事件類型
+            message (Optional[str], optional): 可讀文本（遊戲日誌或旁白）。默認為 None
+            data (Dict[str, Any], optional): 結構化數據。默認為 None
+        """
+        self.type = event_type
+        self.message = message
+        self.data = data or {}
+        self.time = time.time()
+
+    def __repr__(self) -> str:
+        return f"GameEvent({self.type!r}, {self.message!r}, {self.data!r})"
+
+
+class EventBus:
+    """遊戲引擎的事件總線
+
+    即時訂閱者在發布時同步收到每個事件；批量訂閱者收到事件列表，同一輪事件循環（tick）中
+    發布的事件在該輪結束後一次送出，因此 GUI 每批只需要一次跨線程傳遞。沒有運行中的事件
+    循環時批量事件立即送出。訂閱者出錯不會中斷遊戲。
+    """
+
+    def __init__(self):
+        """初始化"""
+        self._subscribers = []  # [(callback, types, batched)]
+        self._pending = []  # 等待批量送出的事件
+        self._flush_scheduled = False
+
+    def subscribe(self, callback: Callable, types: Optional[Iterable[str]] = None, batched: bool = False) -> Callable:
+        """訂閱事件
+
+        Args:
+            callback (Callable): 即時訂閱者接收 GameEvent，批量訂閱者接收 List[GameEvent]
+            types (Optional[Iterable[str]], optional): 訂閱的事件類型。默認為全部
+            batched (bool, optional): 是否按 tick 批量接收。默認為 False
+
+        Returns:
+            Callable: callback，便於之後取消訂閱
+        """
+        self._subscribers.append((callback, frozenset(types) if types is not None else None, batched))
+        return callback
+
+    def unsubscribe(self, callback: Callable):
+        """取消訂閱
+
+        Args:
+            callback (Callable): subscribe 時傳入的 callback
+        """
+        self._subscribers = [entry for entry in self._subscribers if entry[0] is not callback]
+
+    def wants(self, event_type: str) -> bool:
+        """是否有訂閱者接收該類型的事件（沒有時發布者可以跳過構建事件）
+
+        Args:
+            event_type (str): 事件類型
+
+        Returns:
+            bool: 是否有訂閱者
+        """
+        return any(types is None or event_type in types for _, types, _ in self._subscribers)
+
+    def publish(self, event_type: str, message: Optional[str] = None, **data) -> Optional[GameEvent]:
+        """發布事件
+
+        Args:
+            event_type (str): 事件類型
+            message (Optional[str], optional): 可讀文本。默認為 None
+            **data: 結構化數據
+
+        Returns:
+            Optional[GameEvent]: 發布的事件，沒有訂閱者時為 None
+        """
+        if not self.wants(event_type):
+            return None
+
+        event = GameEvent(event_type, message, data)
+        batched = False
+        for callback, types, is_batched in self._subscribers:
+            if types is not None and event_type not in types:
+                continue
+            if is_batched:
+                batched = True
+            else:
+                self._deliver(callback, event)
+
+        if batched:
+            self._pending.append(event)
+            self._schedule_flush()
+        return event
+
+    def _schedule_flush(self):
+        """在本輪事件循環結束後送出批量事件"""
+        if self._flush_scheduled:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        self._flush_scheduled = True
+        loop.call_soon(self.flush)
+
+    def flush(self):
+        """把等待中的事件送給批量訂閱者"""
+        self._flush_scheduled = False
+        if not self._pending:
+            return
+        events, self._pending = self._pending, []
+        for callback, types, is_batched in self._subscribers:
+            if not is_batched:
+                continue
+            batch = events if types is None else [event for event in events if event.type in types]
+            if batch:
+                self._deliver(callback, batch)
+
+    @staticmethod
+    def _deliver(callback: Callable, payload):
+        """調用訂閱者，錯誤只打印到標準錯誤輸出"""
+        try:
+            callback(payload)
+        except Exception as e:
+            print(f"事件訂閱者出錯：{e}", file=sys.stderr)
+
+
+def format_event(event: GameEvent) -> Optional[str]:
+    """把事件格式化為控制台文本
+
+    Args:
+        event (GameEvent): 事件
+
+    Returns:
+        Optional[str]: 文本，沒有可讀文本的事件為 None
+    """
+    if event.message is None:
+        return None
+    if event.type in GAME_LOG_TYPES:
+        return f"[遊戲日誌] {event.message}"
+    return event.message
+
+
+class ConsolePrinter:
+    """即時訂閱者：把事件打印到控制台（命令行模式的默認輸出）"""
+
+    def __init__(self, stream=None):
+        """初始化
+
+        Args:
+            stream: 輸出流。默認為調用時的 sys.stdout
+        """
+        self.stream = stream
+
+    def __call__(self, event: GameEvent):
+        text = format_event(event)
+        if text is not None:
+            print(text, file=self.stream or sys.stdout)
+
+
+class EventFileLogger:
+    """批量訂閱者：把事件以帶時間戳的文本行追加到文件，每批寫入一次"""
+
+    def __init__(self, path: str):
+        """打開日誌文件
+
+        Args:
+            path (str): 文件路徑
+        """
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8")
+
+    def __call__(self, events: List[GameEvent]):
+        lines = []
+        for event in events:
+            text = format_event(event)
+            if text is not None:
+                stamp = time.strftime("%H:%M:%S", time.localtime(event.time))
+                lines.append(f"{stamp} {text}")
+        if lines:
+            self._file.write("\n".join(lines) + "\n")
+            self._file.flush()
+
+    def close(self):
+        """關閉文件"""
+        self._file.close()
+
+
+class EventMetrics:
+    """批量訂閱者：統計事件數量、每個座位的發言、投票和 LLM 調用耗時"""
+
+    def __init__(self):
+        """初始化"""
+        self.counts = Counter()  # {事件類型: 數量}
+        self.speeches = Counter()  # {player_id: 發言數}
+        self.votes = Counter()  # {player_id: 投票數}
+        self.llm_calls = defaultdict(lambda: {"calls": 0, "errors": 0, "seconds": 0.0})  # {player_id: 調用統計}
+
+    def __call__(self, events: List[GameEvent]):
+        for event in events:
+            self.counts[event.type] += 1
+            player_id = event.data.get("player_id")
+            if event.type == SPEECH:
+                self.speeches[player_id] += 1
+            elif event.type == VOTE:
+                self.votes[player_id] += 1
+            elif event.type == LLM_CALL_END:
+                stats = self.llm_calls[player_id]
+                stats["calls"] += 1
+                stats["seconds"] += event.data.get("duration", 0.0)
+                if event.data.get("error"):
+                    stats["errors"] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """獲取當前統計
+
+        Returns:
+            Dict[str, Any]: 統計數據
+        """
+        return {
+            "events": dict(self.counts),
+            "speeches": dict(self.speeches),
+            "votes": dict(self.votes),
+            "llm_calls": {player_id: dict(stats) for player_id, stats in self.llm_calls.items()}
+        }
+
+
+class EventedHandler:
+    """包裝 API 處理程序，在每次 LLM 調用前後發布事件"""
+
+    def __init__(self, handler, events: EventBus, player_id: Optional[int] = None):
+        """初始化
+
+        Args:
+            handler: 被包裝的 API 處理程序
+            events (EventBus): 事件總線
+            player_id (Optional[int], optional): 使用該處理程序的玩家 ID。默認為 None
+        """
+        self.handler = handler
+        self.events = events
+        self.player_id = player_id
+
+    def __getattr__(self, name):
+        # 其餘屬性（例如 model）直接轉發給被包裝的處理程序
+        return getattr(self.handler, name)
+
+    async def get_response(self, prompt, system_message=None, temperature=0.7, max_tokens=500):
+        """獲取回應並發布調用開始和結束事件
+
+        Args:
+            prompt (str): 提示
+            system_message (str, optional): 系統消息。默認為 None
+            temperature (float, optional): 溫度參數。默認為 0.7
+            max_tokens (int, optional): 最大生成標記數。默認為 500
+
+        Returns:
+            str: 模型的回應文本
+        """
+        model = getattr(self.handler, "model", None)
+        self.events.publish(LLM_CALL_START, player_id=self.player_id, model=model)
+        started_at = time.perf_counter()
+        error = None
+        try:
+            return await self.handler.get_response(prompt, system_message, temperature, max_tokens)
+        except Exception as e:
+            error = str(e)
+            raise
+        finally:
+            self.events.publish(LLM_CALL_END, player_id=self.player_id, model=model,
+                                duration=time.perf_counter() - started_at, error=error)
@@ -1,55 +1,51 @@
 import os
-import asyncio
+import time
 from typing import Dict, Any, List, Optional
 from dotenv import load_dotenv
 
 from .game_state import GameState
-from api import OpenAIHandler, AnthropicHandler
+from .summarizer import DiscussionSummarizer
+from .journal import GameJournal, JournaledHandler, SUMMARIZER_KEY
+from .events import EventBus, ConsolePrinter, EventedHandler, ANNOUNCE, MESSAGE_TYPES, LLM_CALL_START, LLM_CALL_END
+from .bot_player import BotPlayerHandler
+from .human_input import HumanPlayerHandler, default_turn_timeout
+from api import OpenAIHandler, AnthropicHandler, provider_available
+from utils.result_writer import get_result_writer, new_game_id
 
-class HumanPlayerHandler:
-    """處理與人類玩家的交互"""
-    
-    def __init__(self, player_name):
-        """初始化人類玩家處理器
-        
-        Args:
-            player_name (str): 玩家名稱
-        """
-        self.player_name = player_name
+class GameManager:
+    """狼人殺遊戲管理器"""
     
-    async def get_response(self, prompt, system_message=None, temperature=0.7, max_tokens=500):
-        """從人類玩家獲取回應
+    def __init__(self, events: EventBus = None):
+        """初始化遊戲管理器
         
         Args:
-            prompt (str): 提示
-            system_message (str, optional): 系統消息 (會顯示給玩家)
-            temperature (float, optional): 不適用於人類玩家
-            max_tokens (int, optional): 不適用於人類玩家
-            
-        Returns:
-            str: 玩家的回應
+            events (EventBus, optional): 事件總線。默認創建一個打印到控制台的總線
         """
-        print(f"\n=== {self.player_name} 的回合 ===")
-        if system_message:
-            print(f"【角色指引】{system_message}")
-        print(f"\n{prompt}\n")
-        
-        return input("你的回應> ")
-
-class GameManager:
-    """狼人殺遊戲管理器"""
-    
-    def __init__(self):
-        """初始化遊戲管理器"""
         # 載入環境變量
         load_dotenv()
         
+        if events is None:
+            events = EventBus()
+            events.subscribe(ConsolePrinter(), MESSAGE_TYPES)
+        self.events = events  # 引擎事件總線，GUI、文件日誌和統計都通過訂閱獲取遊戲進度
+        
         self.game_state = GameState()
+        self.game_state.events = self.events
         self.api_handlers = {}  # {player_id: api_handler}
         self.api_models = {}  # {player_id: model_name}
+        self.summarizer_handler = None  # 討論摘要器使用的 API 處理程序（未包裝），使用規則摘要時為 None
+        self.journal = None  # 遊戲日誌（GameJournal）
+        self.game_id = new_game_id()  # 唯一的遊戲 ID，用於日誌和結果文件名
+        self.game_config = {}  # 遊戲設置，隨結果一起保存
+        self.result_writer = get_result_writer()  # 後台結果寫入器
+        self.result_path = None  # 遊戲結果文件路徑
+        self.save_results = True  # 遊戲結束時是否保存結果文件
+        self.human_turn_timeout = default_turn_timeout()  # 人類玩家每回合的時限（秒），None 表示不限時
     
     def setup_game(self, player_count: int = None, werewolf_count: int = None, special_roles: List[str] = None,
-                   human_players: List[int] = None, api_type: str = None, model_name: str = None):
+                   human_players: List[int] = None, api_type: str = None, model_name: str = None,
+                   summarize_discussions: bool = None, journal_path: str = None, bot_players: List[int] = None,
+                   seed: int = None):
         """設置遊戲
         
         Args:
@@ -59,6 +55,11 @@ class GameManager:
             human_players (List[int], optional): 人類玩家的ID列表。默認為空
             api_type (str, optional): 使用的API類型('openai' 或 'anthropic')。默認根據環境變量混合
             model_name (str, optional): 使用的模型名稱。默認根據環境變量混合
+            summarize_discussions (bool, optional): 是否在每天討論後生成共享摘要。默認使用環境變量
+            journal_path (str, optional): 遊戲日誌路徑，設置為空字符串時不寫日誌。默認使用環境變量，
+                未設置時寫入 game_results/journals 目錄
+            bot_players (List[int], optional): 規則機器人玩家的ID列表（不調用 API）。默認使用環境變量
+            seed (int, optional): 遊戲種子，決定角色分配和所有隨機回退。默認使用環境變量，未設置時隨機生成
         """
         # 如果沒有提供參數，使用環境變量
         if player_count is None:
@@ -71,19 +72,126 @@ class GameManager:
             special_roles_str = os.getenv("DEFAULT_SPECIAL_ROLES", "seer")
             special_roles = [role.strip() for role in special_roles_str.split(",")]
         
-        # 設置人類玩家
+        if summarize_discussions is None:
+            summarize_discussions = os.getenv("SUMMARIZE_DISCUSSIONS", "0").lower() in ("1", "true", "yes")
+        
+        if journal_path is None:
+            journal_path = os.getenv("GAME_JOURNAL", self._default_journal_path())
+        
+        if bot_players is None:
+            bot_players = [int(pid) for pid in os.getenv("DEFAULT_BOT_PLAYERS", "").split(",") if pid.strip()]
+        
+        if seed is None and os.getenv("GAME_SEED"):
+            seed = int(os.getenv("GAME_SEED"))
+        
+        # 設置人類玩家和機器人玩家
         self.human_players = human_players or []
+        self.bot_players = bot_players
         
         # 設置API類型和模型
         self.use_single_api = api_type is not None and model_name is not None
         self.api_type = api_type
         self.model_name = model_name
         
+        # 打開遊戲日誌（在設置遊戲之前，使第一個快照也被記錄）
+        if journal_path:
+            self._open_journal(journal_path)
+        
         # 設置遊戲
-        self.game_state.setup_game(player_count, werewolf_count, special_roles)
+        self.game_state.setup_game(player_count, werewolf_count, special_roles, seed)
         
         # 為玩家分配處理程序
         self._setup_api_handlers()
+        
+        # 設置討論摘要器
+        if summarize_discussions:
+            self._setup_summarizer()
+        
+        self.game_config = {
+            "player_count": player_count,
+            "werewolf_count": werewolf_count,
+            "special_roles": special_roles,
+            "human_players": self.human_players,
+            "bot_players": self.bot_players,
+            "api_type": self.api_type,
+            "model_name": self.model_name,
+            "summarize_discussions": summarize_discussions,
+            "seed": self.game_state.seed
+        }
+        
+        # 記錄恢復遊戲所需的設置
+        if self.journal:
+            self.journal.record("setup", dict(self.game_config, game_id=self.game_id, api_models=self.api_models))
+            self.journal.flush()
+    
+    def _open_journal(self, journal_path: str):
+        """打開（或繼續追加）遊戲日誌
+        
+        Args:
+            journal_path (str): 日誌文件路徑
+        """
+        self.journal = GameJournal(journal_path)
+        self.game_state.journal = self.journal
+        self._announce(f"遊戲日誌：{journal_path}")
+    
+    def _default_journal_path(self) -> str:
+        """生成默認的遊戲日誌路徑
+        
+        Returns:
+            str: 日誌文件路徑
+        """
+        return os.path.join(os.getcwd(), "game_results", "journals", f"game_{self.game_id}.jsonl")
+    
+    def _announce(self, message: str, tag: str = "info"):
+        """發布遊戲管理器的旁白事件
+        
+        Args:
+            message (str): 旁白文本
+            tag (str, optional): 顯示樣式。默認為 "info"
+        """
+        self.events.publish(ANNOUNCE, message, day=self.game_state.day, phase=self.game_state.phase, tag=tag)
+    
+    def _active_handlers(self) -> Dict[int, Any]:
+        """獲取本階段使用的處理程序，按需發布 LLM 調用事件，啟用日誌時記錄每次 LLM 調用
+        
+        摘要器的處理程序以 SUMMARIZER_KEY 同樣包裝，使它的調用也出現在事件、統計和日誌中。
+        
+        Returns:
+            Dict[int, Any]: 處理程序 {player_id: api_handler}
+        """
+        if self.summarizer_handler and self.game_state.summarizer:
+            self.game_state.summarizer.api_handler = self._wrap_handler(self.summarizer_handler, SUMMARIZER_KEY)
+        return {player_id: self._wrap_handler(handler, player_id)
+                for player_id, handler in self.api_handlers.items()}
+    
+    def _wrap_handler(self, handler, player_id):
+        """按需為處理程序加上 LLM 調用事件和日誌記錄
+        
+        Args:
+            handler: API 處理程序
+            player_id: 玩家 ID（摘要器為 SUMMARIZER_KEY）
+        
+        Returns:
+            包裝後的處理程序
+        """
+        if self.events.wants(LLM_CALL_START) or self.events.wants(LLM_CALL_END):
+            handler = EventedHandler(handler, self.events, player_id)
+        if self.journal:
+            handler = JournaledHandler(handler, self.journal, player_id)
+        return handler
+    
+    def _setup_summarizer(self):
+        """設置討論摘要器
+        
+        使用單一API時由該模型生成摘要，否則使用不調用API的規則摘要。
+        """
+        self.summarizer_handler = None
+        if self.use_single_api:
+            self.summarizer_handler = next((handler for handler in self.api_handlers.values()
+                                            if not isinstance(handler, (HumanPlayerHandler, BotPlayerHandler))), None)
+        
+        # 處理程序在每個階段由 _active_handlers 包裝後交給摘要器
+        self.game_state.summarizer = DiscussionSummarizer(self.summarizer_handler, events=self.events)
     
     def _setup_api_handlers(self):
         """為玩家設置API處理程序"""
@@ -107,10 +215,12 @@ class GameManager:
             openai_models = ["gpt-4", "gpt-3.5-turbo"]
             anthropic_models = ["claude-3-opus-20240229", "claude-3-sonnet-20240229", "claude-3-haiku-20240307"]
             
-            # 混合模型列表
+            # 混合模型列表（只使用已安裝 SDK 的提供者）
             models = []
-            models.extend([(api_type, model_name) for api_type, model_name in [("openai", m) for m in openai_models]])
-            models.extend([(api_type, model_name) for api_type, model_name in [("anthropic", m) for m in anthropic_models]])
+            if provider_available("openai"):
+                models.extend([(api_type, model_name) for api_type, model_name in [("openai", m) for m in openai_models]])
+            if provider_available("anthropic"):
+                models.extend([(api_type, model_name) for api_type, model_name in [("anthropic", m) for m in anthropic_models]])
         
         # 為每個玩家分配處理程序
         for i, player in enumerate(self.game_state.players):
@@ -119,16 +229,27 @@ class GameManager:
             
             # 檢查是否是人類玩家
             if player_id in self.human_players:
-                self.api_handlers[player_id] = HumanPlayerHandler(player_name)
+                # 超時時由同一座位的規則機器人給出默認行動
+                self.api_handlers[player_id] = HumanPlayerHandler(
+                    player_name, self.human_turn_timeout, BotPlayerHandler(player_id, player_name, self.game_state)
+                )
                 self.api_models[player_id] = "Human Player"
                 continue
             
+            # 規則機器人玩家
+            if player_id in self.bot_players:
+                self.api_handlers[player_id] = BotPlayerHandler(player_id, player_name, self.game_state)
+                self.api_models[player_id] = "Bot"
+                continue
+            
             # AI玩家
             if self.use_single_api:
                 self.api_handlers[player_id] = api_handler
                 self.api_models[player_id] = model_display
             else:
                 # 使用混合API
+                if not models:
+                    raise ValueError("沒有可用的API：openai 和 anthropic 套件都未安裝，請安裝其中之一或把AI玩家設為機器人")
                 api_type, model_name = models[i % len(models)]
                 
                 if api_type == "openai":
@@ -138,14 +259,14 @@ class GameManager:
                     self.api_handlers[player_id] = AnthropicHandler(model=model_name)
                     self.api_models[player_id] = f"Anthropic - {model_name}"
         
-        # 打印分配結果
-        print("玩家角色分配：")
+        # 發布分配結果
+        self._announce("玩家角色分配：", "header")
         for player in self.game_state.players:
             player_id = player["player_id"]
             player_name = player["name"]
             player_role = player["role"]
             model = self.api_models.get(player_id, "未分配")
-            print(f"玩家{player_id}（{player_name}）- {player_role}：使用 {model}")
+            self._announce(f"玩家{player_id}（{player_name}）- {player_role}：使用 {model}", "player")
     
     async def run_game(self, max_days: int = 10):
         """運行遊戲
@@ -154,108 +275,162 @@ class GameManager:
             max_days (int, optional): 最大遊戲天數。默認為 10
         """
         if self.game_state.phase == "setup":
-            print("遊戲尚未設置，正在使用默認設置...")
+            self._announce("遊戲尚未設置，正在使用默認設置...")
             self.setup_game()
         
         # 運行遊戲直到結束或達到最大天數
         while not self.game_state.game_over and self.game_state.day <= max_days:
             await self._run_game_phase()
         
-        # 打印遊戲結果
+        # 發布遊戲結果
         if self.game_state.game_over:
-            print(f"遊戲結束！獲勝者：{self.game_state.winner}")
+            self._announce(f"遊戲結束！獲勝者：{self.game_state.winner}", "success")
         else:
-            print(f"遊戲達到最大天數 {max_days}，強制結束")
+            self._announce(f"遊戲達到最大天數 {max_days}，強制結束", "warning")
             
             # 統計存活玩家
             alive_werewolves = sum(1 for p in self.game_state.players if p["is_alive"] and p["role"] == "werewolf")
             alive_villagers = sum(1 for p in self.game_state.players if p["is_alive"] and p["role"] != "werewolf")
             
-            print(f"存活狼人：{alive_werewolves}，存活村民：{alive_villagers}")
+            self._announce(f"存活狼人：{alive_werewolves}，存活村民：{alive_villagers}")
             
             if alive_werewolves == 0:
-                print("村民陣營獲勝！")
+                self._announce("村民陣營獲勝！", "success")
             elif alive_werewolves >= alive_villagers:
-                print("狼人陣營獲勝！")
+                self._announce("狼人陣營獲勝！", "success")
             else:
-                print("平局！")
+                self._announce("平局！", "success")
         
         # 將遊戲結果保存到文件
-        self._save_game_result()
+        if self.save_results:
+            self._save_game_result()
+        
+        # 記錄結果並關閉遊戲日誌
+        if self.journal:
+            self.journal.record("result", {"day": self.game_state.day, "winner": self.game_state.winner})
+            self.journal.close()
+        
+        # 送出最後一批事件（事件循環可能在下一個 tick 之前結束）
+        self.events.flush()
     
     async def _run_game_phase(self):
         """運行當前遊戲階段"""
         phase = self.game_state.phase
         day = self.game_state.day
         
-        print(f"===== 第{day}天，{phase}階段 =====")
+        self._announce(f"===== 第{day}天，{phase}階段 =====", "header")
         
         if phase == "night":
-            print("夜晚降臨，玩家們閉上眼睛...")
-            await self.game_state.process_night_actions(self.api_handlers)
+            self._announce("夜晚降臨，玩家們閉上眼睛...", "night")
         
         elif phase == "day":
-            # 打印夜間死亡信息
+            # 公布夜間死亡信息
             if self.game_state.last_night_deaths:
                 for death in self.game_state.last_night_deaths:
-                    print(f"玩家{death['player_id']}（{death['name']}）在夜晚被殺，他的身份是{death['role']}")
+                    self._announce(f"玩家{death['player_id']}（{death['name']}）在夜晚被殺，他的身份是{death['role']}", "warning")
             else:
-                print("平安夜，昨晚無人死亡")
-            
-            print("\n天亮了，玩家們開始討論...")
-            await self.game_state.process_day_discussions(self.api_handlers)
+                self._announce("平安夜，昨晚無人死亡")
             
-            # 打印討論內容
-            for discussion in self.game_state.current_discussions:
-                print(f"\n玩家{discussion['player_id']}（{discussion['player_name']}）：")
-                print(f"「{discussion['content']}」")
+            self._announce("天亮了，玩家們開始討論...", "day")
         
         elif phase == "vote":
-            print("\n投票開始，玩家們選擇要放逐的對象...")
-            await self.game_state.process_votes(self.api_handlers)
+            self._announce("投票開始，玩家們選擇要放逐的對象...", "day")
         
         elif phase == "gameover":
-            print("\n遊戲結束！")
-            print(f"獲勝者：{self.game_state.winner}")
+            self._announce("遊戲結束！", "header")
+            self._announce(f"獲勝者：{self.game_state.winner}", "success")
         
-        # 緩沖顯示
-        await asyncio.sleep(1)
+        # 按階段狀態機結算當前階段（發言、投票和死亡由遊戲狀態作為事件發布）
+        # 引擎全速運行，不為顯示等待；界面按事件的時間戳自行控制播放速度
+        await self.game_state.run_phase(self._active_handlers())
     
     def _save_game_result(self):
-        """保存遊戲結果到文件"""
-        # 創建結果目錄（如果不存在）
-        results_dir = os.path.join(os.getcwd(), "game_results")
-        os.makedirs(results_dir, exist_ok=True)
-        
-        # 生成文件名
-        import datetime
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = os.path.join(results_dir, f"game_{timestamp}.json")
-        
-        # 保存遊戲狀態
-        self.game_state.save_game(filename)
-        print(f"遊戲結果已保存到：{filename}")
+        """把遊戲結果提交給後台寫入器保存（序列化和寫入不阻塞事件循環）"""
+        self.result_path = self.result_writer.submit(self.build_result_record())
+        self._announce(f"遊戲結果已保存到：{self.result_path}")
+    
+    def build_result_record(self) -> Dict[str, Any]:
+        """構建遊戲的統一結果記錄：設置、摘要和完整的遊戲狀態
+        
+        Returns:
+            Dict[str, Any]: 結果記錄
+        """
+        return {
+            "game_id": self.game_id,
+            "saved_at": time.time(),
+            "config": self.game_config,
+            "summary": self.get_game_summary(),
+            "state": self.game_state.to_dict(),
+            "journal": self.journal.path if self.journal else None
+        }
     
     @classmethod
     async def load_and_run(cls, filename: str, max_days: int = 10, human_players: List[int] = None, 
-                           api_type: str = None, model_name: str = None):
+                           api_type: str = None, model_name: str = None, bot_players: List[int] = None,
+                           events: EventBus = None):
         """從文件加載遊戲狀態並繼續運行
         
         Args:
-            filename (str): 遊戲狀態文件名
+            filename (str): 遊戲狀態文件名或遊戲日誌文件名
             max_days (int, optional): 最大遊戲天數。默認為 10
             human_players (List[int], optional): 人類玩家的ID列表。默認為空
             api_type (str, optional): 使用的API類型('openai' 或 'anthropic')
             model_name (str, optional): 使用的模型名稱
+            bot_players (List[int], optional): 規則機器人玩家的ID列表。默認為空
+            events (EventBus, optional): 事件總線。默認打印到控制台
+        """
+        manager = cls.load(filename, human_players, api_type, model_name, bot_players, events)
+        
+        # 運行遊戲
+        await manager.run_game(max_days)
+        
+        return manager
+    
+    @classmethod
+    def load(cls, filename: str, human_players: List[int] = None, api_type: str = None, model_name: str = None,
+             bot_players: List[int] = None, events: EventBus = None) -> "GameManager":
+        """從文件加載遊戲狀態並設置處理程序（不運行），調用方可以在運行前替換處理程序
+        
+        filename 為遊戲日誌（.jsonl）時，從最後一個階段邊界的狀態恢復，未指定的設置沿用日誌中的記錄，
+        之後的事件繼續追加到同一份日誌。
+        
+        Args:
+            filename (str): 遊戲狀態文件名或遊戲日誌文件名
+            human_players (List[int], optional): 人類玩家的ID列表。默認為空
+            api_type (str, optional): 使用的API類型('openai' 或 'anthropic')
+            model_name (str, optional): 使用的模型名稱
+            bot_players (List[int], optional): 規則機器人玩家的ID列表。默認為空
+            events (EventBus, optional): 事件總線。默認打印到控制台
+            
+        Returns:
+            GameManager: 已加載的遊戲管理器
         """
         # 創建遊戲管理器
-        manager = cls()
+        manager = cls(events)
+        
+        setup = {}
         
         # 加載遊戲狀態
-        manager.game_state = GameState.load_game(filename)
+        if filename.endswith(".jsonl"):
+            manager.game_state = GameState.from_journal(filename)
+            manager.game_state.events = manager.events
+            setup = GameJournal.setup_info(filename)
+            manager.game_id = setup.get("game_id", manager.game_id)
+            if human_players is None:
+                human_players = setup.get("human_players")
+            if bot_players is None:
+                bot_players = setup.get("bot_players")
+            if api_type is None and model_name is None:
+                api_type, model_name = setup.get("api_type"), setup.get("model_name")
+            manager._open_journal(filename)
+            manager.journal.record("resume", {"day": manager.game_state.day, "phase": manager.game_state.phase})
+        else:
+            manager.game_state = GameState.load_game(filename)
+            manager.game_state.events = manager.events
         
         # 設置人類玩家和API選項
         manager.human_players = human_players or []
+        manager.bot_players = bot_players or []
         manager.use_single_api = api_type is not None and model_name is not None
         manager.api_type = api_type
         manager.model_name = model_name
@@ -263,8 +438,17 @@ class GameManager:
         # 設置處理程序
         manager._setup_api_handlers()
         
-        # 運行遊戲
-        await manager.run_game(max_days)
+        if setup.get("summarize_discussions"):
+            manager._setup_summarizer()
+        
+        manager.game_config = {key: value for key, value in setup.items() if key not in ("game_id", "api_models")}
+        manager.game_config.update({
+            "human_players": manager.human_players,
+            "bot_players": manager.bot_players,
+            "api_type": api_type,
+            "model_name": model_name,
+            "loaded_from": filename
+        })
         
         return manager
     
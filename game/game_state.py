@@ -1,7 +1,36 @@
+import asyncio
 import random
 from typing import List, Dict, Any, Optional
-import json
-import os
+import time
+
+from .public_facts import PublicFactsTable
+from .night_scheduler import NightScheduler
+from .journal import GameJournal
+from .events import LOG, SPEECH, VOTE, DEATH, GAME_OVER, PHASE_CHANGE
+from utils.result_writer import load_result, result_state, serialize_result, write_atomic
+from utils.shared_log import SharedLog
+
+# 寫入遊戲日誌（GameJournal）的類型化事件（文本已在狀態增量的遊戲日誌中，這裡只記錄結構化數據）
+JOURNAL_EVENT_TYPES = (SPEECH, VOTE, DEATH, GAME_OVER)
+
+# 階段狀態機：{階段: {"next": 下一階段, "resolve": 結算該階段的方法, "on_enter": 進入時的回調}}
+# 每個階段只由其 resolve 方法結算一次，任何死亡後遊戲結束時直接轉入 gameover
+PHASE_TABLE = {
+    "setup": {"next": "night", "resolve": None, "on_enter": None},
+    "night": {"next": "day", "resolve": "process_night_actions", "on_enter": "_enter_night"},
+    "day": {"next": "vote", "resolve": "process_day_discussions", "on_enter": "_enter_day"},
+    "vote": {"next": "night", "resolve": "process_votes", "on_enter": "_enter_vote"},
+    "gameover": {"next": None, "resolve": None, "on_enter": "_enter_gameover"}
+}
+
+# 夜間行動在玩家歷史記錄中的描述 {行動類型: 動詞}
+NIGHT_ACTION_DESCRIPTIONS = {
+    "protect": "守護了",
+    "save": "使用解藥救了",
+    "poison": "使用毒藥毒了",
+    "kill": "擊殺了"
+}
+
 
 class GameState:
     """管理狼人殺遊戲的狀態"""
@@ -19,14 +48,27 @@ class GameState:
         self.game_over = False  # 遊戲是否結束
         self.winner = None  # 獲勝陣營
         self.log = []  # 遊戲日誌
+        self.summarizer = None  # 可選的討論摘要器（DiscussionSummarizer）
+        self.day_summaries = {}  # 每天的討論摘要 {day: summary}
+        self.public_facts = PublicFactsTable()  # 按座位記錄的公開信息
+        self.phase_timings = []  # 已完成階段的耗時 [{"day", "phase", "duration"}]
+        self._phase_started_at = None  # 當前階段開始的時間
+        self.night_scheduler = NightScheduler()  # 夜間行動調度器
+        self.night_context = {}  # 夜間行動的中間結果，例如 {"attack_target": id}
+        self.pending_death_actions = []  # 等待觸發的死亡技能 [(player_id, cause)]
+        self.journal = None  # 可選的遊戲日誌（GameJournal），記錄類型化事件並在每個階段邊界寫入狀態
+        self.seed = None  # 遊戲種子，決定角色分配和所有隨機回退
+        self.events = None  # 可選的事件總線（EventBus），發布類型化的引擎事件
     
-    def setup_game(self, player_count: int, werewolf_count: int, special_roles: List[str] = None):
+    def setup_game(self, player_count: int, werewolf_count: int, special_roles: List[str] = None,
+                   seed: Optional[int] = None):
         """設置遊戲
         
         Args:
             player_count (int): 玩家數量
             werewolf_count (int): 狼人數量
             special_roles (List[str], optional): 特殊角色列表。默認為 None
+            seed (Optional[int], optional): 遊戲種子，相同的種子和回應得到相同的遊戲。默認隨機生成
         """
         if special_roles is None:
             special_roles = []
@@ -51,6 +93,18 @@ class GameState:
         self.game_over = False
         self.winner = None
         self.log = []
+        self.day_summaries = {}
+        self.public_facts = PublicFactsTable()
+        self.phase_timings = []
+        self._phase_started_at = None
+        self.night_context = {}
+        self.pending_death_actions = []
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        
+        # 檢查特殊角色是否已註冊
+        from roles import get_role_class, create_role
+        for role in special_roles:
+            get_role_class(role)
         
         # 創建角色分配
         roles = ["werewolf"] * werewolf_count
@@ -59,17 +113,13 @@ class GameState:
         roles.extend(["villager"] * remaining_count)
         
         # 打亂角色
-        random.shuffle(roles)
+        random.Random(self.seed).shuffle(roles)
         
         # 生成玩家ID和名稱
         player_ids = list(range(1, player_count + 1))
         player_names = [f"玩家{i}" for i in player_ids]
         
         # 分配角色
-        from roles import Villager, Werewolf, Seer
-        
-        werewolf_ids = []
-        
         for i in range(player_count):
             player_id = player_ids[i]
             name = player_names[i]
@@ -83,23 +133,14 @@ class GameState:
             }
             
             self.players.append(player_info)
+            self.public_facts.add_player(player_id, name)
             
-            # 創建相應的角色對象
-            if role == "werewolf":
-                player_obj = Werewolf(player_id, name)
-                werewolf_ids.append(player_id)
-                self.player_objects[player_id] = player_obj
-            elif role == "seer":
-                player_obj = Seer(player_id, name)
-                self.player_objects[player_id] = player_obj
-            else:  # 普通村民
-                player_obj = Villager(player_id, name)
-                self.player_objects[player_id] = player_obj
-        
-        # 設置狼人的隊友
-        for werewolf_id in werewolf_ids:
-            werewolf = self.player_objects[werewolf_id]
-            werewolf.set_teammates([wid for wid in werewolf_ids if wid != werewolf_id])
+            # 從角色註冊表創建相應的角色對象
+            self.player_objects[player_id] = create_role(role, player_id, name)
+        
+        # 設置角色的初始知識（例如狼人的隊友）
+        for player_obj in self.player_objects.values():
+            player_obj.setup_knowledge(self.players)
         
         self.add_log("遊戲已設置")
         
@@ -107,32 +148,121 @@ class GameState:
         self.next_phase()
     
     def next_phase(self):
-        """進入下一個遊戲階段"""
-        if self.phase == "setup":
-            self.phase = "night"
-            self.day += 1
-            self.add_log(f"第{self.day}天夜晚開始")
-        elif self.phase == "night":
-            self.phase = "day"
-            self.add_log(f"第{self.day}天白天開始")
-            # 清除上一輪討論
-            self.current_discussions = []
-        elif self.phase == "day":
-            self.phase = "vote"
-            self.add_log(f"第{self.day}天投票階段開始")
-            # 清除上一輪投票
-            self.votes = {}
-        elif self.phase == "vote":
-            # 處理投票結果
-            self._process_votes()
-            # 檢查遊戲是否結束
-            if self.check_game_over():
-                self.phase = "gameover"
-                self.add_log("遊戲結束")
-            else:
-                self.phase = "night"
-                self.day += 1
-                self.add_log(f"第{self.day}天夜晚開始")
+        """按階段狀態機進入下一個遊戲階段
+        
+        階段的結算由各自的 process_* 方法完成，這裡只負責轉換；遊戲已結束時轉入 gameover。
+        """
+        if self.phase == "gameover":
+            return
+        
+        next_phase = "gameover" if self.game_over else PHASE_TABLE[self.phase]["next"]
+        
+        # 記錄上一階段的耗時
+        now = time.perf_counter()
+        if self._phase_started_at is not None:
+            self.phase_timings.append({
+                "day": self.day,
+                "phase": self.phase,
+                "duration": now - self._phase_started_at
+            })
+        self._phase_started_at = now
+        
+        self.phase = next_phase
+        on_enter = PHASE_TABLE[next_phase]["on_enter"]
+        if on_enter:
+            getattr(self, on_enter)()
+        self._seed_roles()
+        
+        if self.events:
+            self.events.publish(PHASE_CHANGE, day=self.day, phase=self.phase,
+                                alive_werewolves=sum(1 for p in self.players if p["is_alive"] and p["role"] == "werewolf"),
+                                alive_villagers=sum(1 for p in self.players if p["is_alive"] and p["role"] != "werewolf"))
+        
+        # 上一階段的結果已全部產生，寫入狀態並落盤
+        if self.journal:
+            self.journal.checkpoint(self.to_dict())
+    
+    def _seed_roles(self):
+        """按遊戲種子、座位和當前階段為每個角色的隨機生成器重新播種
+        
+        每個座位使用獨立的生成器，夜間並發行動的完成順序不會影響結果；按階段播種使得
+        從任意階段快照恢復的遊戲與一次跑完的遊戲完全一致。
+        """
+        if self.seed is None:
+            return
+        for player_id, player_obj in self.player_objects.items():
+            player_obj.rng.seed(f"{self.seed}:{player_id}:{self.day}:{self.phase}")
+    
+    async def run_phase(self, api_handlers: Dict[int, Any]):
+        """結算當前階段（每個階段只結算一次，結算後自動轉入下一階段）
+        
+        Args:
+            api_handlers (Dict[int, Any]): API 處理程序 {player_id: api_handler}
+        """
+        resolve = PHASE_TABLE[self.phase]["resolve"]
+        if resolve:
+            await getattr(self, resolve)(api_handlers)
+    
+    def _enter_night(self):
+        """進入夜晚"""
+        self.day += 1
+        self.add_log(f"第{self.day}天夜晚開始")
+    
+    def _enter_day(self):
+        """進入白天討論"""
+        self.add_log(f"第{self.day}天白天開始")
+        # 清除上一輪討論
+        self.current_discussions = []
+    
+    def _enter_vote(self):
+        """進入投票"""
+        self.add_log(f"第{self.day}天投票階段開始")
+        # 清除上一輪投票
+        self.votes = {}
+    
+    def _enter_gameover(self):
+        """進入遊戲結束"""
+        self.add_log("遊戲結束")
+    
+    def _kill_player(self, player_id: int, cause: str, message: str = None) -> Optional[Dict[str, Any]]:
+        """處理玩家死亡，並在每次死亡後立即檢查勝負
+        
+        角色可以通過 before_death 免於死亡（例如長老、白痴）；死亡後的技能（例如獵人開槍）
+        會排入 pending_death_actions，由 _resolve_death_actions 統一結算。
+        
+        Args:
+            player_id (int): 玩家 ID
+            cause (str): 死因（"night", "poison", "wolfkiller", "shot" 或 "exile"）
+            message (str, optional): 確認死亡後、判定勝負前寫入的日誌。默認為 None
+            
+        Returns:
+            Optional[Dict[str, Any]]: 死亡玩家的信息，玩家不存在、已經死亡或免於死亡時為 None
+        """
+        target = next((p for p in self.players if p["player_id"] == player_id), None)
+        if not target or not target["is_alive"]:
+            return None
+        
+        player_obj = self.player_objects.get(player_id)
+        if player_obj and not player_obj.before_death(cause):
+            return None
+        
+        target["is_alive"] = False
+        target["death_day"] = self.day
+        target["death_cause"] = cause
+        
+        if player_obj:
+            player_obj.is_alive = False
+            self.pending_death_actions.append((player_id, cause))
+        
+        if message:
+            self.add_log(message, DEATH, player_id=player_id, role=target["role"], cause=cause)
+        elif self.events:
+            self.events.publish(DEATH, day=self.day, phase=self.phase, player_id=player_id, role=target["role"], cause=cause)
+        
+        self.public_facts.record_death(self.day, player_id, cause, target["role"])
+        self.check_game_over()
+        
+        return target
     
     def check_game_over(self) -> bool:
         """檢查遊戲是否結束
@@ -140,6 +270,9 @@ class GameState:
         Returns:
             bool: 遊戲是否結束
         """
+        if self.game_over:
+            return True
+        
         # 統計存活的狼人和村民
         alive_werewolves = sum(1 for p in self.players if p["is_alive"] and p["role"] == "werewolf")
         alive_villagers = sum(1 for p in self.players if p["is_alive"] and p["role"] != "werewolf")
@@ -148,13 +281,13 @@ class GameState:
             # 所有狼人都死亡，村民陣營勝利
             self.game_over = True
             self.winner = "村民陣營"
-            self.add_log("所有狼人都被殺死，村民陣營獲勝！")
+            self.add_log("所有狼人都被殺死，村民陣營獲勝！", GAME_OVER, winner=self.winner)
             return True
         elif alive_werewolves >= alive_villagers:
             # 狼人數量大於或等於村民，狼人陣營勝利
             self.game_over = True
             self.winner = "狼人陣營"
-            self.add_log("狼人數量已經超過村民，狼人陣營獲勝！")
+            self.add_log("狼人數量已經超過村民，狼人陣營獲勝！", GAME_OVER, winner=self.winner)
             return True
         
         return False
@@ -162,6 +295,9 @@ class GameState:
     async def process_night_actions(self, api_handlers: Dict[int, Any]):
         """處理夜間行動
         
+        行動由 NightScheduler 按角色聲明的依賴關係並發收集，全部收集完畢後
+        再按規則順序統一結算。
+        
         Args:
             api_handlers (Dict[int, Any]): API 處理程序 {player_id: api_handler}
         """
@@ -171,57 +307,165 @@ class GameState:
         
         # 清除之前的夜間行動和死亡記錄
         self.night_actions = {}
+        self.night_context = {}
         self.last_night_deaths = []
         
         # 獲取所有存活玩家的夜間行動
-        for player_info in self.players:
-            player_id = player_info["player_id"]
-            
-            if not player_info["is_alive"]:
-                continue
-            
-            player_obj = self.player_objects[player_id]
-            api_handler = api_handlers.get(player_id)
-            
-            if api_handler:
-                action_result = await player_obj.night_action(self.get_state_for_player(player_id), api_handler)
-                self.night_actions[player_id] = action_result
-            else:
-                self.add_log(f"警告：玩家{player_id}沒有API處理程序")
+        await self.night_scheduler.run(self, api_handlers)
+        if self.journal:
+            self.journal.record("night_actions", {"day": self.day, "actions": self.night_actions})
         
-        # 處理狼人的攻擊行動
-        self._process_werewolf_attacks()
+        # 結算夜間行動
+        self._resolve_night_actions()
         
         # 將結果添加到玩家歷史記錄
         self._update_player_history()
         
-        # 進入下一個階段
+        # 結算死亡技能（例如獵人開槍）
+        await self._resolve_death_actions(api_handlers)
+        
+        # 進入下一個階段（夜晚的死亡已決定勝負時直接結束，不再進行白天討論和投票）
         self.next_phase()
     
-    def _process_werewolf_attacks(self):
-        """處理狼人的攻擊行動"""
-        # 找出所有狼人的攻擊目標
-        attack_targets = []
-        for player_id, action in self.night_actions.items():
-            if action.get("action") == "attack" and action.get("target") is not None:
-                attack_targets.append(action.get("target"))
+    def update_night_context(self):
+        """根據已收集的夜間行動更新夜間信息，供後續步驟的角色使用"""
+        swap = self._find_night_action("swap")
+        attack = self._find_night_action("attack")
         
-        if not attack_targets:
+        if attack:
+            self.night_context["attack_target"] = self._apply_swap(attack["target"], swap)
+    
+    def _find_night_action(self, action_type: str) -> Optional[Dict[str, Any]]:
+        """找出第一個指定類型的有效夜間行動（多名狼人時以首領狼人的選擇為準）
+        
+        Args:
+            action_type (str): 行動類型
+            
+        Returns:
+            Optional[Dict[str, Any]]: 夜間行動，沒有時為 None
+        """
+        for action in self.night_actions.values():
+            if action.get("action") != action_type:
+                continue
+            if action.get("target") is not None or action.get("targets"):
+                return action
+        return None
+    
+    @staticmethod
+    def _apply_swap(target_id: Optional[int], swap: Optional[Dict[str, Any]]) -> Optional[int]:
+        """按魔術師的交換重新定向夜間目標
+        
+        Args:
+            target_id (Optional[int]): 原始目標
+            swap (Optional[Dict[str, Any]]): 魔術師的交換行動
+            
+        Returns:
+            Optional[int]: 實際目標
+        """
+        if not swap or target_id is None:
+            return target_id
+        first, second = swap["targets"]
+        if target_id == first:
+            return second
+        if target_id == second:
+            return first
+        return target_id
+    
+    def _resolve_night_actions(self):
+        """按規則順序結算夜間行動：交換、守護、狼人攻擊、毒藥、狼殺手、查驗"""
+        swap = self._find_night_action("swap")
+        if swap:
+            first, second = swap["targets"]
+            self.add_log(f"魔術師交換了玩家{first}和玩家{second}")
+        
+        protect = self._find_night_action("protect")
+        protected_id = self._apply_swap(protect["target"], swap) if protect else None
+        
+        save = self._find_night_action("save")
+        
+        # 狼人攻擊
+        attack = self._find_night_action("attack")
+        if not attack:
             self.add_log("狼人沒有選擇攻擊目標")
-            return
+        else:
+            target_id = self._apply_swap(attack["target"], swap)
+            if target_id == protected_id:
+                self.add_log(f"玩家{target_id}受到守衛的保護，狼人的攻擊失敗")
+            elif save and save["target"] == target_id:
+                self.add_log(f"女巫使用解藥救活了玩家{target_id}")
+            elif not self._night_kill(target_id, "night", "被狼人殺死了"):
+                self.add_log(f"狼人的攻擊目標無效或已經死亡")
+        
+        # 女巫毒藥（守衛無法防禦）
+        poison = self._find_night_action("poison")
+        if poison:
+            self._night_kill(self._apply_swap(poison["target"], swap), "poison", "被女巫毒死了")
+        
+        # 狼殺手只能擊殺狼人
+        kill = self._find_night_action("kill")
+        if kill:
+            target_id = self._apply_swap(kill["target"], swap)
+            if self._is_werewolf(target_id):
+                self._night_kill(target_id, "wolfkiller", "被狼殺手擊殺了")
+        
+        # 預言家查驗（結果由遊戲根據真實身份判定）
+        for player_id, action in self.night_actions.items():
+            if action.get("action") != "check" or action.get("target") is None:
+                continue
+            is_werewolf = self._is_werewolf(self._apply_swap(action["target"], swap))
+            action["result"] = "狼人" if is_werewolf else "好人"
+            self.player_objects[player_id].record_check(action["target"], is_werewolf)
+    
+    def _night_kill(self, target_id: int, cause: str, description: str) -> bool:
+        """處理夜間死亡並記錄到 last_night_deaths
         
-        # 如果有多個狼人，取第一個攻擊目標（首領狼人的選擇）
-        target_id = attack_targets[0]
-        target = next((p for p in self.players if p["player_id"] == target_id), None)
+        Args:
+            target_id (int): 目標玩家 ID
+            cause (str): 死因
+            description (str): 日誌描述，例如 "被狼人殺死了"
+            
+        Returns:
+            bool: 攻擊是否命中存活的玩家（包含免於死亡的情況）
+        """
+        target = next((p for p in self.players if p["player_id"] == target_id and p["is_alive"]), None)
+        if not target:
+            return False
         
-        if target and target["is_alive"]:
-            # 處理玩家死亡
-            target["is_alive"] = False
-            target_name = target["name"]
-            self.last_night_deaths.append({"player_id": target_id, "name": target_name, "role": target["role"]})
-            self.add_log(f"玩家{target_id}（{target_name}）被狼人殺死了")
+        if self._kill_player(target_id, cause, f"玩家{target_id}（{target['name']}）{description}"):
+            self.last_night_deaths.append({"player_id": target_id, "name": target["name"], "role": target["role"]})
         else:
-            self.add_log(f"狼人的攻擊目標無效或已經死亡")
+            self.add_log(f"玩家{target_id}（{target['name']}）遭到攻擊，但沒有死亡")
+        return True
+    
+    async def _resolve_death_actions(self, api_handlers: Dict[int, Any]):
+        """依次結算死亡技能（例如獵人開槍），技能造成的死亡也會繼續觸發
+        
+        Args:
+            api_handlers (Dict[int, Any]): API 處理程序 {player_id: api_handler}
+        """
+        while self.pending_death_actions and not self.game_over:
+            player_id, cause = self.pending_death_actions.pop(0)
+            api_handler = api_handlers.get(player_id)
+            if not api_handler:
+                continue
+            
+            player_obj = self.player_objects[player_id]
+            action = await player_obj.death_action(self.get_state_for_player(player_id), api_handler, cause)
+            if not action or action.get("action") != "shoot":
+                continue
+            
+            target = next((p for p in self.players if p["player_id"] == action["target"]), None)
+            if not target:
+                continue
+            
+            message = f"玩家{player_id}（{player_obj.name}）開槍帶走了玩家{target['player_id']}（{target['name']}），身份是{target['role']}"
+            if not self._kill_player(target["player_id"], "shot", message):
+                continue
+            
+            for obj in self.player_objects.values():
+                obj.add_history(f"第{self.day}天：{message}")
+        
+        self.pending_death_actions = []
     
     async def process_day_discussions(self, api_handlers: Dict[int, Any]):
         """處理白天討論
@@ -257,15 +501,23 @@ class GameState:
                     "player_name": player_name,
                     "content": discussion
                 })
+                self.public_facts.record_speech(self.day, player_id, discussion)
                 
                 # 添加到玩家歷史記錄
                 player_obj.add_history(f"第{self.day}天白天：你說：「{discussion}」")
                 
                 # 添加到遊戲日誌
-                self.add_log(f"玩家{player_id}（{player_name}）說：「{discussion}」")
+                self.add_log(f"玩家{player_id}（{player_name}）說：「{discussion}」", SPEECH,
+                             player_id=player_id, content=discussion)
             else:
                 self.add_log(f"警告：玩家{player_id}沒有API處理程序")
         
+        # 啟用摘要器時，所有玩家共享一份當天的討論摘要，而不是逐條保存他人的發言
+        if self.summarizer:
+            summary = await self.summarizer.summarize(self.day, self.current_discussions)
+            self.day_summaries[self.day] = summary
+            self.add_log(f"第{self.day}天討論摘要：\n{summary}")
+        
         # 更新所有玩家的歷史記錄
         for player_info in self.players:
             player_id = player_info["player_id"]
@@ -275,6 +527,10 @@ class GameState:
             
             player_obj = self.player_objects[player_id]
             
+            if self.summarizer:
+                player_obj.add_history(f"第{self.day}天白天討論摘要：\n{self.day_summaries[self.day]}")
+                continue
+            
             # 將其他人的討論添加到自己的歷史記錄
             for discussion in self.current_discussions:
                 if discussion["player_id"] != player_id:
@@ -282,12 +538,16 @@ class GameState:
                         f"第{self.day}天白天：{discussion['player_name']}（玩家{discussion['player_id']}）說：「{discussion['content']}」"
                     )
         
-        # 進入下一個階段（修改：白天討論完畢后自動進入投票階段）
+        # 進入下一個階段（白天討論完畢后自動進入投票階段）
         self.next_phase()
     
     async def process_votes(self, api_handlers: Dict[int, Any]):
         """處理投票
         
+        投票是密封的：所有玩家看到的都是投票開始前的狀態，因此所有投票同時收集（人類玩家思考時
+        AI 玩家的投票照常進行），收齊後再按座位順序公開和記錄。多名人類玩家由各自的處理程序
+        輪流回應（見 HumanInputHandler），不會同時等待同一個輸入。
+        
         Args:
             api_handlers (Dict[int, Any]): API 處理程序 {player_id: api_handler}
         """
@@ -298,7 +558,18 @@ class GameState:
         # 清除之前的投票
         self.votes = {}
         
-        # 獲取所有存活玩家的投票
+        # 同時收集所有存活玩家的投票
+        voters = [player_info for player_info in self.players
+                  if player_info["is_alive"] and api_handlers.get(player_info["player_id"])]
+        vote_results = await asyncio.gather(*[
+            self.player_objects[player_info["player_id"]].vote(
+                self.get_state_for_player(player_info["player_id"]), api_handlers[player_info["player_id"]]
+            )
+            for player_info in voters
+        ])
+        ballots = {player_info["player_id"]: target_id for player_info, target_id in zip(voters, vote_results)}
+        
+        # 按座位順序公開投票
         for player_info in self.players:
             player_id = player_info["player_id"]
             
@@ -307,31 +578,34 @@ class GameState:
             
             player_obj = self.player_objects[player_id]
             player_name = player_info["name"]
-            api_handler = api_handlers.get(player_id)
             
-            if api_handler:
-                # 獲取玩家的投票
-                vote_target_id = await player_obj.vote(self.get_state_for_player(player_id), api_handler)
+            if player_id in ballots:
+                vote_target_id = ballots[player_id]
                 
                 # 檢查投票目標是否有效
                 target_player = next((p for p in self.players if p["player_id"] == vote_target_id and p["is_alive"]), None)
                 
                 if target_player:
                     self.votes[player_id] = vote_target_id
+                    self.public_facts.record_vote(self.day, player_id, vote_target_id)
                     
                     # 添加到玩家歷史記錄
                     player_obj.add_history(f"第{self.day}天投票：你投票給了玩家{vote_target_id}（{target_player['name']}）")
                     
                     # 添加到遊戲日誌
-                    self.add_log(f"玩家{player_id}（{player_name}）投票給了玩家{vote_target_id}（{target_player['name']}）")
+                    self.add_log(f"玩家{player_id}（{player_name}）投票給了玩家{vote_target_id}（{target_player['name']}）", VOTE,
+                                 player_id=player_id, target_id=vote_target_id)
                 else:
                     self.add_log(f"玩家{player_id}（{player_name}）的投票目標無效")
             else:
                 self.add_log(f"警告：玩家{player_id}沒有API處理程序")
         
-        # 處理投票結果
+        # 處理投票結果（只結算一次）
         self._process_votes()
         
+        # 結算死亡技能（例如被放逐的獵人開槍）
+        await self._resolve_death_actions(api_handlers)
+        
         # 進入下一個階段
         self.next_phase()
     
@@ -360,14 +634,20 @@ class GameState:
         target = next((p for p in self.players if p["player_id"] == target_id), None)
         
         if target and target["is_alive"]:
-            target["is_alive"] = False
             target_name = target["name"]
             target_role = target["role"]
-            self.add_log(f"玩家{target_id}（{target_name}）被放逐，他的身份是{target_role}")
+            
+            if not self._kill_player(target_id, "exile", f"玩家{target_id}（{target_name}）被放逐，他的身份是{target_role}"):
+                # 白痴翻牌免於放逐
+                self.add_log(f"玩家{target_id}（{target_name}）翻牌亮明身份{target_role}，免於被放逐")
+                for player_obj in self.player_objects.values():
+                    player_obj.add_history(f"第{self.day}天投票：玩家{target_id}（{target_name}）翻牌亮明身份{target_role}，免於被放逐")
+                return
             
             # 更新所有玩家的歷史記錄
             for player_obj in self.player_objects.values():
                 player_obj.add_history(f"第{self.day}天投票：玩家{target_id}（{target_name}）被放逐，身份是{target_role}")
+                player_obj.observe_exile(target_id, target_role)
     
     def _update_player_history(self):
         """更新玩家歷史記錄"""
@@ -388,6 +668,17 @@ class GameState:
                     target = next((p for p in self.players if p["player_id"] == target_id), None)
                     if target:
                         player_obj.add_history(f"第{self.day}天夜晚：你查驗了玩家{target_id}（{target['name']}），結果是{result}")
+                
+                elif action_type in NIGHT_ACTION_DESCRIPTIONS and target_id:
+                    target = next((p for p in self.players if p["player_id"] == target_id), None)
+                    if target:
+                        player_obj.add_history(
+                            f"第{self.day}天夜晚：你{NIGHT_ACTION_DESCRIPTIONS[action_type]}玩家{target_id}（{target['name']}）"
+                        )
+                
+                elif action_type == "swap" and action.get("targets"):
+                    first, second = action["targets"]
+                    player_obj.add_history(f"第{self.day}天夜晚：你交換了玩家{first}和玩家{second}")
         
         # 更新夜間死亡結果
         if self.last_night_deaths:
@@ -411,11 +702,21 @@ class GameState:
             "phase": self.phase,
             "players": [],
             "current_discussions": self.current_discussions,
+            "public_facts": self.public_facts.render(),
+            "night_context": {},
             "last_night_deaths": [],
             "game_over": self.game_over,
             "winner": self.winner
         }
         
+        viewer = self.player_objects.get(player_id)
+        
+        # 只提供角色需要的夜間信息（例如女巫可以知道狼人的攻擊目標）
+        if viewer:
+            for key in viewer.night_info:
+                if key in self.night_context:
+                    state["night_context"][key] = self.night_context[key]
+        
         # 添加所有玩家的公開信息
         for player in self.players:
             player_info = {
@@ -428,8 +729,8 @@ class GameState:
             if player["player_id"] == player_id:
                 player_info["role"] = player["role"]
             
-            # 狼人可以看到其他狼人的身份
-            elif self._is_werewolf(player_id) and player["role"] == "werewolf":
+            # 狼人（以及狼殺手）可以看到狼人的身份
+            elif viewer and viewer.sees_werewolves and player["role"] == "werewolf":
                 player_info["role"] = "werewolf"
             
             state["players"].append(player_info)
@@ -457,100 +758,185 @@ class GameState:
         player = next((p for p in self.players if p["player_id"] == player_id), None)
         return player is not None and player["role"] == "werewolf"
     
-    def add_log(self, message: str):
-        """添加日誌
+    def add_log(self, message: str, event_type: str = LOG, **data):
+        """添加日誌，並在設置了事件總線時發布對應的事件
         
         Args:
             message (str): 日誌訊息
+            event_type (str, optional): 事件類型。默認為 LOG
+            **data: 事件的結構化數據（自動附帶當前的天數和階段）
         """
         self.log.append(message)
-        print(f"[遊戲日誌] {message}")
+        if self.journal and event_type in JOURNAL_EVENT_TYPES:
+            self.journal.record(event_type, dict(data, day=self.day, phase=self.phase))
+        if self.events:
+            self.events.publish(event_type, message, day=self.day, phase=self.phase, **data)
     
-    def save_game(self, filename: str):
-        """保存遊戲狀態到文件
+    def to_dict(self) -> Dict[str, Any]:
+        """轉換為可序列化的字典，包含每個角色的私有狀態
         
-        Args:
-            filename (str): 文件名
+        Returns:
+            Dict[str, Any]: 遊戲狀態數據
         """
-        # 創建可序列化的遊戲狀態
-        state = {
+        return {
+            "seed": self.seed,
             "day": self.day,
             "phase": self.phase,
             "players": self.players,
             "current_discussions": self.current_discussions,
             "votes": self.votes,
             "night_actions": self.night_actions,
+            "night_context": self.night_context,
             "last_night_deaths": self.last_night_deaths,
+            "pending_death_actions": [list(item) for item in self.pending_death_actions],
             "game_over": self.game_over,
             "winner": self.winner,
-            "log": self.log
+            "log": list(self.log),
+            "phase_timings": self.phase_timings,
+            "day_summaries": self.day_summaries,
+            "public_facts": self.public_facts.to_dict(),
+            "roles": {str(player_id): player_obj.to_dict() for player_id, player_obj in self.player_objects.items()}
         }
+    
+    def fork(self, seed: Optional[int] = None) -> "GameState":
+        """從當前狀態分叉出一個獨立的分支遊戲
+        
+        日誌和每個角色的歷史記錄以寫時複製的方式共享已有的前綴（SharedLog），分叉的開銷與
+        歷史長度無關；玩家、投票、夜間行動和公開信息表等小型結構直接複製。分支不寫入原遊戲的
+        日誌。默認沿用原遊戲的種子，使各分支的隨機回退相同，差異只來自分支的改動。
         
-        # 保存到文件
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(state, f, ensure_ascii=False, indent=2)
+        Args:
+            seed (Optional[int], optional): 分支使用的遊戲種子。默認沿用原遊戲的種子
+            
+        Returns:
+            GameState: 分支遊戲狀態
+        """
+        branch = GameState()
+        branch.day = self.day
+        branch.phase = self.phase
+        branch.players = [dict(player) for player in self.players]
+        branch.player_objects = {player_id: player_obj.fork() for player_id, player_obj in self.player_objects.items()}
+        branch.current_discussions = list(self.current_discussions)
+        branch.votes = dict(self.votes)
+        branch.night_actions = {player_id: dict(action) for player_id, action in self.night_actions.items()}
+        branch.last_night_deaths = list(self.last_night_deaths)
+        branch.game_over = self.game_over
+        branch.winner = self.winner
+        branch.log = SharedLog.fork(self.log)
+        branch.summarizer = self.summarizer.fork() if self.summarizer else None
+        branch.day_summaries = dict(self.day_summaries)
+        branch.public_facts = self.public_facts.fork()
+        branch.phase_timings = list(self.phase_timings)
+        branch.night_context = dict(self.night_context)
+        branch.pending_death_actions = list(self.pending_death_actions)
+        branch.seed = self.seed
+        if seed is not None:
+            branch.seed = seed
+            branch._seed_roles()
+        return branch
     
     @classmethod
-    def load_game(cls, filename: str):
-        """從文件加載遊戲狀態
+    def from_dict(cls, state_data: Dict[str, Any]) -> "GameState":
+        """從字典恢復遊戲狀態和所有角色對象
         
         Args:
-            filename (str): 文件名
+            state_data (Dict[str, Any]): 遊戲狀態數據
             
         Returns:
-            GameState: 加載的遊戲狀態
+            GameState: 遊戲狀態
         """
-        # 檢查文件是否存在
-        if not os.path.exists(filename):
-            raise FileNotFoundError(f"文件 {filename} 不存在")
-        
-        # 從文件加載
-        with open(filename, 'r', encoding='utf-8') as f:
-            state_data = json.load(f)
-        
-        # 創建新的遊戲狀態實例
         game_state = cls()
         
-        # 設置基本狀態
+        # 設置基本狀態（JSON 的鍵總是字符串，恢復為整數）
         game_state.day = state_data.get("day", 0)
         game_state.phase = state_data.get("phase", "setup")
         game_state.players = state_data.get("players", [])
         game_state.current_discussions = state_data.get("current_discussions", [])
-        game_state.votes = state_data.get("votes", {})
-        game_state.night_actions = state_data.get("night_actions", {})
+        game_state.votes = {int(voter): target for voter, target in state_data.get("votes", {}).items()}
+        game_state.night_actions = {int(pid): action for pid, action in state_data.get("night_actions", {}).items()}
+        game_state.night_context = state_data.get("night_context", {})
         game_state.last_night_deaths = state_data.get("last_night_deaths", [])
+        game_state.pending_death_actions = [tuple(item) for item in state_data.get("pending_death_actions", [])]
         game_state.game_over = state_data.get("game_over", False)
         game_state.winner = state_data.get("winner")
         game_state.log = state_data.get("log", [])
+        game_state.phase_timings = state_data.get("phase_timings", [])
+        game_state.day_summaries = {int(day): summary for day, summary in state_data.get("day_summaries", {}).items()}
+        if "public_facts" in state_data:
+            game_state.public_facts = PublicFactsTable.from_dict(state_data["public_facts"])
+        else:
+            # 舊版存檔沒有公開信息表，只能從玩家列表恢復座位
+            for player in game_state.players:
+                game_state.public_facts.add_player(player["player_id"], player["name"])
         
-        # 重新創建玩家對象
-        from roles import Villager, Werewolf, Seer
+        # 從角色註冊表重新創建玩家對象
+        from roles import create_role
         
-        werewolf_ids = []
         for player in game_state.players:
-            player_id = player["player_id"]
-            name = player["name"]
-            role = player["role"]
-            
-            # 創建相應的角色對象
-            if role == "werewolf":
-                player_obj = Werewolf(player_id, name)
-                werewolf_ids.append(player_id)
-                game_state.player_objects[player_id] = player_obj
-            elif role == "seer":
-                player_obj = Seer(player_id, name)
-                game_state.player_objects[player_id] = player_obj
-            else:  # 普通村民
-                player_obj = Villager(player_id, name)
-                game_state.player_objects[player_id] = player_obj
+            player_obj = create_role(player["role"], player["player_id"], player["name"])
+            game_state.player_objects[player["player_id"]] = player_obj
             
             # 設置存活狀態
             if not player["is_alive"]:
                 player_obj.is_alive = False
         
-        # 設置狼人的隊友
-        for werewolf_id in werewolf_ids:
-            werewolf = game_state.player_objects[werewolf_id]
-            werewolf.set_teammates([wid for wid in werewolf_ids if wid != werewolf_id])
+        # 設置角色的初始知識（例如狼人的隊友）
+        for player_obj in game_state.player_objects.values():
+            player_obj.setup_knowledge(game_state.players)
+        
+        # 恢復角色的私有狀態（舊版存檔沒有這部分數據）
+        for player_id, role_data in state_data.get("roles", {}).items():
+            player_obj = game_state.player_objects.get(int(player_id))
+            if player_obj:
+                player_obj.restore_state(role_data)
+        
+        game_state.seed = state_data.get("seed")
+        game_state._seed_roles()
         
         return game_state
+    
+    def save_game(self, filename: str):
+        """保存遊戲狀態到文件（緊湊格式，原子寫入）
+        
+        遊戲結束時的結果由 GameManager 交給後台的 ResultWriter 寫入，不經過這裡。
+        
+        Args:
+            filename (str): 文件名，以 .gz 結尾時使用 gzip 壓縮
+        """
+        write_atomic(filename, serialize_result(self.to_dict(), compress=filename.endswith(".gz")))
+    
+    @classmethod
+    def load_game(cls, filename: str):
+        """從文件加載遊戲狀態
+        
+        Args:
+            filename (str): 文件名
+            
+        Returns:
+            GameState: 加載的遊戲狀態
+        """
+        # 從文件加載（支持壓縮文件和包含遊戲狀態的統一結果記錄）
+        state_data = result_state(load_result(filename))
+        
+        return cls.from_dict(state_data)
+    
+    @classmethod
+    def from_journal(cls, filename: str, day: Optional[int] = None, phase: Optional[str] = None):
+        """從遊戲日誌恢復遊戲狀態（從快照開始依次套用狀態增量）
+        
+        Args:
+            filename (str): 日誌文件名
+            day (Optional[int], optional): 只使用這一天的狀態。默認為 None（不限）
+            phase (Optional[str], optional): 只使用這個階段的狀態。默認為 None（不限）
+            
+        Returns:
+            GameState: 恢復的遊戲狀態（符合條件的最後一個階段邊界）
+        """
+        state_data = None
+        for data in GameJournal.states(filename):
+            if (day is None or data.get("day") == day) and (phase is None or data.get("phase") == phase):
+                state_data = data
+        if state_data is None:
+            raise ValueError(f"日誌 {filename} 中沒有可恢復的狀態記錄")
+        
+        return cls.from_dict(state_data)
@@ -0,0 +1,242 @@
+import asyncio
+import os
+import sys
+import threading
+import weakref
+from typing import Optional
+
+
+def default_turn_timeout() -> Optional[float]:
+    """從環境變數讀取人類玩家每回合的時限
+
+    Returns:
+        Optional[float]: 秒數，HUMAN_TURN_TIMEOUT 未設置、不是數字或不大於 0 時為 None（不限時）
+    """
+    raw = os.getenv("HUMAN_TURN_TIMEOUT") or "0"
+    try:
+        value = float(raw)
+    except ValueError:
+        print(f"HUMAN_TURN_TIMEOUT 不是有效的秒數：{raw!r}，人類玩家不限時", file=sys.stderr)
+        return None
+    return value if value > 0 else None
+
+
+class HumanInputHandler:
+    """人類玩家處理程序的基類：等待回應時不佔用事件循環，並可限制每回合的時間
+
+    子類實現 _ask，把提示交給玩家並等待回應。等待期間其他座位的 AI 調用照常進行；超過時限或
+    輸入已關閉時改由 fallback（通常是同一座位的規則機器人）給出默認行動，並在遊戲日誌中記錄。
+
+    共用同一個輸入渠道的人類座位（同一個終端或同一個界面分頁）可能同時被詢問，例如兩名人類狼人
+    或同時投票的人類玩家。子類通過 _turn_lock 返回該渠道的鎖，這些座位輪流回應，每回合的時限
+    從輪到該座位時開始計算。
+    """
+
+    def __init__(self, player_name: str, timeout: Optional[float] = None, fallback=None):
+        """初始化
+
+        Args:
+            player_name (str): 玩家名稱
+            timeout (Optional[float], optional): 每回合的時限（秒）。默認為 None（不限時）
+            fallback (optional): 超時時給出默認行動的處理程序（例如 BotPlayerHandler）。默認為 None，
+                此時回應為空，由角色代碼按隨機回退選擇目標
+        """
+        self.player_name = player_name
+        self.timeout = timeout
+        self.fallback = fallback
+        self.timeouts = 0  # 超時的回合數
+
+    async def get_response(self, prompt, system_message=None, temperature=0.7, max_tokens=500):
+        """等待人類玩家的回應，超時時返回默認行動
+
+        Args:
+            prompt (str): 提示
+            system_message (str, optional): 系統消息 (會顯示給玩家)
+            temperature (float, optional): 不適用於人類玩家
+            max_tokens (int, optional): 不適用於人類玩家
+
+        Returns:
+            str: 玩家的回應
+        """
+        lock = self._turn_lock()
+        if lock is None:
+            return await self._take_turn(prompt, system_message)
+        async with lock:
+            return await self._take_turn(prompt, system_message)
+
+    async def _take_turn(self, prompt: str, system_message: Optional[str]) -> str:
+        """詢問玩家一回合，超時或輸入關閉時返回默認行動"""
+        try:
+            if self.timeout is None:
+                return await self._ask(prompt, system_message)
+            return await asyncio.wait_for(self._ask(prompt, system_message), self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            response = await self._default_response(prompt, system_message, f"超過 {self.timeout:g} 秒未回應")
+            self._on_timeout(response)
+            return response
+        except EOFError:
+            # 輸入已關閉，玩家無法再回應
+            return await self._default_response(prompt, system_message, "的輸入已關閉")
+
+    async def _default_response(self, prompt: str, system_message: Optional[str], reason: str) -> str:
+        """由 fallback 給出默認行動並記錄到遊戲日誌
+
+        Args:
+            prompt (str): 提示
+            system_message (Optional[str]): 系統消息
+            reason (str): 原因，接在玩家名稱之後
+
+        Returns:
+            str: 默認回應，沒有 fallback 時為空
+        """
+        if self.fallback is None:
+            return ""
+        response = await self.fallback.get_response(prompt, system_message)
+        game_state = getattr(self.fallback, "game_state", None)
+        if game_state is not None:
+            game_state.add_log(f"{self.player_name}{reason}，由規則機器人代為行動")
+        return response
+
+    async def _ask(self, prompt: str, system_message: Optional[str]) -> str:
+        """把提示交給玩家並等待回應（子類實現）"""
+        raise NotImplementedError
+
+    def _turn_lock(self) -> Optional[asyncio.Lock]:
+        """共用輸入渠道的座位輪流回應所用的鎖（子類可覆蓋）
+
+        Returns:
+            Optional[asyncio.Lock]: 鎖，None 表示不需要輪流
+        """
+        return None
+
+    def _on_timeout(self, response: str):
+        """本回合超時後通知玩家（子類可覆蓋）
+
+        Args:
+            response (str): 代為給出的默認回應
+        """
+        pass
+
+
+class StdinReader:
+    """在後台線程中逐行讀取標準輸入，交給事件循環異步等待
+
+    input() 會阻塞整個事件循環，其他座位的 AI 調用也會停下來。這裡由一個守護線程讀取，
+    每一行通過 call_soon_threadsafe 放入事件循環中的隊列。回合超時後，下一回合開始時丟棄之前
+    殘留的輸入（那是對已超時回合的遲到回答）；預先輸入或通過管道提供的多行輸入照常按順序使用。
+    """
+
+    def __init__(self, stream=None):
+        """初始化
+
+        Args:
+            stream: 輸入流。默認為 sys.stdin
+        """
+        self.stream = stream
+        self._lock = threading.Lock()
+        self._loop = None
+        self._queue = None
+        self._thread = None
+        self._discard = False  # 下一次讀取前是否丟棄殘留的輸入
+        self._turn_locks = weakref.WeakKeyDictionary()  # {事件循環: asyncio.Lock}
+
+    def discard_pending(self):
+        """下一次讀取前丟棄已收到但尚未讀取的輸入（回合超時後調用）"""
+        self._discard = True
+
+    def turn_lock(self) -> asyncio.Lock:
+        """當前事件循環中輪流使用標準輸入的鎖：同一時間只有一個座位在等待輸入
+
+        Returns:
+            asyncio.Lock: 鎖
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if loop not in self._turn_locks:
+                self._turn_locks[loop] = asyncio.Lock()
+            return self._turn_locks[loop]
+
+    def _bind(self) -> asyncio.Queue:
+        """綁定當前事件循環（必要時啟動讀取線程）"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._loop is not loop:
+                self._loop = loop
+                self._queue = asyncio.Queue()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._read_loop, name="StdinReader", daemon=True)
+                self._thread.start()
+            return self._queue
+
+    def _read_loop(self):
+        stream = self.stream or sys.stdin
+        while True:
+            line = stream.readline()
+            with self._lock:
+                loop, queue = self._loop, self._queue
+            if loop is not None and not loop.is_closed():
+                # 讀到文件末尾時放入 None
+                loop.call_soon_threadsafe(queue.put_nowait, line.rstrip("\n") if line else None)
+            if not line:
+                return
+
+    async def readline(self) -> str:
+        """等待下一行輸入
+
+        Returns:
+            str: 輸入的一行（不含換行符）
+
+        Raises:
+            EOFError: 標準輸入已關閉
+        """
+        queue = self._bind()
+        if self._discard:
+            self._discard = False
+            while not queue.empty():
+                if queue.get_nowait() is None:
+                    raise EOFError("標準輸入已關閉")
+        line = await queue.get()
+        if line is None:
+            queue.put_nowait(None)
+            raise EOFError("標準輸入已關閉")
+        return line
+
+
+_stdin_reader = None
+
+
+def get_stdin_reader() -> StdinReader:
+    """獲取進程內共享的標準輸入讀取器
+
+    Returns:
+        StdinReader: 讀取器
+    """
+    global _stdin_reader
+    if _stdin_reader is None:
+        _stdin_reader = StdinReader()
+    return _stdin_reader
+
+
+class HumanPlayerHandler(HumanInputHandler):
+    """處理與人類玩家的交互（命令行）"""
+
+    async def _ask(self, prompt: str, system_message: Optional[str]) -> str:
+        """在控制台顯示提示並異步讀取一行輸入"""
+        print(f"\n=== {self.player_name} 的回合 ===")
+        if system_message:
+            print(f"【角色指引】{system_message}")
+        print(f"\n{prompt}\n")
+        if self.timeout is not None:
+            print(f"（請在 {self.timeout:g} 秒內回應，超時將自動行動）")
+        print("你的回應> ", end="", flush=True)
+
+        return await get_stdin_reader().readline()
+
+    def _turn_lock(self) -> asyncio.Lock:
+        # 所有人類座位共用一個終端，輪流顯示提示和讀取回應
+        return get_stdin_reader().turn_lock()
+
+    def _on_timeout(self, response: str):
+        get_stdin_reader().discard_pending()
+        print(f"\n（超時，已自動行動：{response or '無'}）")
@@ -0,0 +1,336 @@
+import hashlib
+import json
+import os
+import queue
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+# GameState.to_dict() 中只會追加的列表字段（角色的 game_history 同樣只追加），狀態增量只記錄新增的元素
+APPEND_ONLY_FIELDS = ("log", "phase_timings")
+
+# 討論摘要器的 LLM 調用在日誌和事件中使用的 player_id（不屬於任何座位）
+SUMMARIZER_KEY = "summarizer"
+
+
+def prompt_hash(prompt: str, system_message: Optional[str] = None) -> str:
+    """計算一次 LLM 調用的提示指紋（系統消息和提示）
+
+    Args:
+        prompt (str): 提示
+        system_message (Optional[str], optional): 系統消息。默認為 None
+
+    Returns:
+        str: SHA-1 十六進制摘要
+    """
+    return hashlib.sha1(f"{system_message}\x00{prompt}".encode("utf-8")).hexdigest()
+
+
+class GameJournal:
+    """只追加的 JSONL 遊戲日誌（預寫日誌）
+
+    每行一條記錄：設置、類型化的引擎事件（發言、投票、死亡、夜間行動）、LLM 調用，以及每個
+    階段邊界的狀態。日誌打開後的第一個階段邊界寫入完整的狀態快照（checkpoint，含角色私有狀態），
+    之後只寫入增量（delta）：遊戲日誌、階段耗時和角色歷史記錄只會追加，增量只包含新增的元素，
+    其餘較小的字段完整寫入，因此日誌大小與遊戲長度成線性關係。
+
+    記錄在調用時編碼進緩衝區，flush 把整批交給後台線程寫入並 fsync，事件循環不等待磁盤。
+    崩潰後從快照開始依次套用增量，可以恢復任意已完成階段的狀態。
+    """
+
+    def __init__(self, path: str):
+        """打開（或繼續追加）日誌文件
+
+        Args:
+            path (str): 日誌文件路徑
+        """
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._seq = self._repair(path)  # 事件序號，繼續追加時接續原有序號
+        self._file = open(path, "a", encoding="utf-8")
+        self._buffer = []  # 尚未交給寫入線程的事件行
+        self._lengths = None  # 上一次狀態記錄中只追加字段的長度，None 表示下一次寫入完整快照
+        self._error = None  # 寫入線程遇到的第一個錯誤
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._write_loop, name="GameJournal", daemon=True)
+        self._thread.start()
+
+    def record(self, event_type: str, data: Dict[str, Any] = None):
+        """記錄一個事件（編碼後寫入緩衝區，直到下一次 flush）
+
+        Args:
+            event_type (str): 事件類型，例如 "setup", "speech", "llm_call"
+            data (Dict[str, Any], optional): 事件數據。默認為 None
+        """
+        self._seq += 1
+        event = {"seq": self._seq, "type": event_type, "time": time.time(), "data": data or {}}
+        self._buffer.append(json.dumps(event, ensure_ascii=False, separators=(",", ":")))
+
+    def checkpoint(self, state: Dict[str, Any]):
+        """記錄階段邊界的遊戲狀態（第一次為完整快照，之後為增量）並交給寫入線程落盤
+
+        Args:
+            state (Dict[str, Any]): GameState.to_dict() 的結果
+        """
+        if self._lengths is None:
+            self.record("checkpoint", state)
+        else:
+            self.record("delta", self._delta(state))
+        self._lengths = self._append_lengths(state)
+        self.flush()
+
+    @staticmethod
+    def _append_lengths(state: Dict[str, Any]) -> Dict[str, Any]:
+        """狀態中只追加字段的長度"""
+        lengths = {key: len(state.get(key, [])) for key in APPEND_ONLY_FIELDS}
+        lengths["roles"] = {player_id: len(role.get("game_history", []))
+                            for player_id, role in state.get("roles", {}).items()}
+        return lengths
+
+    def _delta(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """相對於上一次狀態記錄的增量：只追加字段只保留新增的元素，其餘字段完整保留"""
+        delta = {key: value for key, value in state.items() if key not in APPEND_ONLY_FIELDS and key != "roles"}
+        delta["append"] = {key: state.get(key, [])[self._lengths[key]:] for key in APPEND_ONLY_FIELDS}
+        delta["roles"] = {}
+        for player_id, role in state.get("roles", {}).items():
+            role = dict(role)
+            history = role.pop("game_history", [])
+            role["history_append"] = history[self._lengths["roles"].get(player_id, 0):]
+            delta["roles"][player_id] = role
+        return delta
+
+    @staticmethod
+    def apply_delta(state: Dict[str, Any], delta: Dict[str, Any]) -> Dict[str, Any]:
+        """把增量套用到上一個狀態上（不修改原狀態）
+
+        Args:
+            state (Dict[str, Any]): 上一個狀態
+            delta (Dict[str, Any]): 增量記錄的數據
+
+        Returns:
+            Dict[str, Any]: 新的狀態
+        """
+        new_state = {key: value for key, value in delta.items() if key not in ("append", "roles")}
+        for key, items in delta.get("append", {}).items():
+            new_state[key] = state.get(key, []) + items
+        new_state["roles"] = {}
+        for player_id, role in delta.get("roles", {}).items():
+            role = dict(role)
+            history = state.get("roles", {}).get(player_id, {}).get("game_history", [])
+            role["game_history"] = history + role.pop("history_append", [])
+            new_state["roles"][player_id] = role
+        return new_state
+
+    def flush(self, sync: bool = True):
+        """把緩衝的事件交給寫入線程（不等待寫入完成）
+
+        Args:
+            sync (bool, optional): 寫入後是否調用 fsync 確保數據落盤。默認為 True
+        """
+        if self._buffer:
+            self._queue.put(("\n".join(self._buffer) + "\n", sync))
+            self._buffer = []
+        elif sync:
+            self._queue.put(("", sync))
+
+    def wait(self):
+        """等待已交給寫入線程的事件全部寫入
+
+        Raises:
+            OSError: 寫入線程寫入或 fsync 失敗
+        """
+        self._queue.join()
+        if self._error is not None:
+            raise self._error
+
+    def close(self):
+        """寫入剩餘事件，停止寫入線程並關閉文件
+
+        Raises:
+            OSError: 寫入線程寫入或 fsync 失敗
+        """
+        if self._file.closed:
+            return
+        self.flush()
+        self._queue.put(None)
+        self._thread.join()
+        self._file.close()
+        if self._error is not None:
+            raise self._error
+
+    def _write_loop(self):
+        """寫入線程：依次寫入每一批事件，需要時 fsync"""
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                if self._error is not None:
+                    continue
+                data, sync = item
+                try:
+                    if data:
+                        self._file.write(data)
+                    self._file.flush()
+                    if sync:
+                        os.fsync(self._file.fileno())
+                except OSError as e:
+                    self._error = e
+            finally:
+                self._queue.task_done()
+
+    @staticmethod
+    def read(path: str) -> List[Dict[str, Any]]:
+        """讀取日誌中的所有事件
+
+        崩潰可能留下寫了一半的最後一行，這樣的行會被忽略。
+
+        Args:
+            path (str): 日誌文件路徑
+
+        Returns:
+            List[Dict[str, Any]]: 事件列表
+        """
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"文件 {path} 不存在")
+
+        events = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    events.append(json.loads(line))
+                except json.JSONDecodeError:
+                    break
+        return events
+
+    @classmethod
+    def states(cls, path: str) -> Iterator[Dict[str, Any]]:
+        """按順序重建日誌中每個階段邊界的遊戲狀態（從快照開始依次套用增量）
+
+        Args:
+            path (str): 日誌文件路徑
+
+        Yields:
+            Dict[str, Any]: 遊戲狀態數據，可交給 GameState.from_dict
+        """
+        state = None
+        for event in cls.read(path):
+            if event["type"] == "checkpoint":
+                state = event["data"]
+            elif event["type"] == "delta" and state is not None:
+                state = cls.apply_delta(state, event["data"])
+            else:
+                continue
+            yield state
+
+    @classmethod
+    def last_checkpoint(cls, path: str) -> Optional[Dict[str, Any]]:
+        """獲取日誌中最後一個完整的遊戲狀態
+
+        Args:
+            path (str): 日誌文件路徑
+
+        Returns:
+            Optional[Dict[str, Any]]: 遊戲狀態數據，沒有狀態記錄時為 None
+        """
+        state = None
+        for state in cls.states(path):
+            pass
+        return state
+
+    @classmethod
+    def setup_info(cls, path: str) -> Dict[str, Any]:
+        """獲取日誌中記錄的遊戲設置（API 類型、模型、人類玩家等）
+
+        Args:
+            path (str): 日誌文件路徑
+
+        Returns:
+            Dict[str, Any]: 遊戲設置，沒有記錄時為空字典
+        """
+        for event in cls.read(path):
+            if event["type"] == "setup":
+                return event["data"]
+        return {}
+
+    @staticmethod
+    def _repair(path: str) -> int:
+        """截掉崩潰時寫了一半的最後一行，使後續事件能繼續追加
+
+        Args:
+            path (str): 日誌文件路徑
+
+        Returns:
+            int: 保留的事件數量
+        """
+        if not os.path.exists(path):
+            return 0
+
+        count = 0
+        valid_size = 0
+        with open(path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                if line.strip():
+                    try:
+                        json.loads(line)
+                    except ValueError:
+                        break
+                    count += 1
+                valid_size += len(line)
+
+        if valid_size < os.path.getsize(path):
+            with open(path, "r+b") as f:
+                f.truncate(valid_size)
+        return count
+
+
+class JournaledHandler:
+    """包裝 API 處理程序，把每次 LLM 調用記錄到遊戲日誌"""
+
+    def __init__(self, handler, journal: GameJournal, player_id: Optional[int] = None):
+        """初始化
+
+        Args:
+            handler: 被包裝的 API 處理程序
+            journal (GameJournal): 遊戲日誌
+            player_id (Optional[int], optional): 使用該處理程序的玩家 ID，摘要器為 SUMMARIZER_KEY。默認為 None
+        """
+        self.handler = handler
+        self.journal = journal
+        self.player_id = player_id
+
+    def __getattr__(self, name):
+        # 其餘屬性（例如 model）直接轉發給被包裝的處理程序
+        return getattr(self.handler, name)
+
+    async def get_response(self, prompt, system_message=None, temperature=0.7, max_tokens=500):
+        """獲取回應並記錄調用
+
+        Args:
+            prompt (str): 提示
+            system_message (str, optional): 系統消息。默認為 None
+            temperature (float, optional): 溫度參數。默認為 0.7
+            max_tokens (int, optional): 最大生成標記數。默認為 500
+
+        Returns:
+            str: 模型的回應文本
+        """
+        started_at = time.perf_counter()
+        response = await self.handler.get_response(prompt, system_message, temperature, max_tokens)
+
+        self.journal.record("llm_call", {
+            "player_id": self.player_id,
+            "model": getattr(self.handler, "model", None),
+            "prompt_hash": prompt_hash(prompt, system_message),
+            "prompt_chars": len(prompt),
+            "response": response,
+            "duration": time.perf_counter() - started_at
+        })
+        return response
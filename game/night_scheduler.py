@@ -0,0 +1,115 @@
+import asyncio
+from typing import Any, Dict, List
+
+
+class NightScheduler:
+    """按角色聲明的依賴關係安排夜間行動
+
+    每個角色類別通過 night_step 聲明自己的夜間步驟，通過 night_after 聲明需要哪些步驟的結果
+    （例如女巫需要狼人的攻擊目標）。每個步驟在它依賴的步驟完成後立即開始，不必等待同一層的
+    其他步驟，因此夜晚的耗時取決於依賴鏈的長度，而不是角色的數量；人類玩家思考時，與其行動
+    無關的步驟（包括依賴其他步驟的後續步驟）照常進行。同一步驟或不同步驟中的多名人類玩家
+    由 HumanInputHandler 的輪流鎖依次回應，AI 玩家的行動不受影響。
+
+    規則上的結算順序（例如守衛的守護先於狼人的攻擊生效）由 GameState 在所有行動收集完畢後處理，
+    不會讓 LLM 調用互相等待。
+    """
+
+    @staticmethod
+    def build_stages(step_dependencies: Dict[str, tuple]) -> List[List[str]]:
+        """把夜間步驟按依賴關係分層，同一層的步驟可以並發執行
+
+        不在本局中的依賴步驟會被忽略。
+
+        Args:
+            step_dependencies (Dict[str, tuple]): {步驟名稱: 依賴的步驟}
+
+        Returns:
+            List[List[str]]: 按執行順序排列的步驟批次
+        """
+        pending = {step: {dep for dep in deps if dep in step_dependencies and dep != step}
+                   for step, deps in step_dependencies.items()}
+        stages = []
+
+        while pending:
+            ready = sorted(step for step, deps in pending.items() if not deps)
+            if not ready:
+                raise ValueError(f"夜間步驟存在循環依賴: {', '.join(sorted(pending))}")
+            stages.append(ready)
+            for step in ready:
+                del pending[step]
+            for deps in pending.values():
+                deps.difference_update(ready)
+
+        return stages
+
+    async def run(self, game_state, api_handlers: Dict[int, Any]) -> Dict[int, Dict[str, Any]]:
+        """執行一晚的所有夜間行動
+
+        每個步驟完成後調用 game_state.update_night_context()，使依賴它的步驟能看到其結果。
+        全部完成後夜間行動按座位順序排列，與完成的先後無關。
+
+        Args:
+            game_state (GameState): 遊戲狀態
+            api_handlers (Dict[int, Any]): API 處理程序 {player_id: api_handler}
+
+        Returns:
+            Dict[int, Dict[str, Any]]: 夜間行動 {player_id: action}
+        """
+        # 按步驟收集存活的行動者（保持座位順序）
+        actors = {}
+        seats = []
+        for player_info in game_state.players:
+            player_id = player_info["player_id"]
+            if not player_info["is_alive"]:
+                continue
+
+            player_obj = game_state.player_objects[player_id]
+            if player_obj.night_step is None:
+                continue
+
+            if player_id not in api_handlers:
+                game_state.add_log(f"警告：玩家{player_id}沒有API處理程序")
+                continue
+
+            actors.setdefault(player_obj.night_step, []).append(player_id)
+            seats.append(player_id)
+
+        dependencies = {}
+        for step, player_ids in actors.items():
+            dependencies[step] = tuple(dep for dep in game_state.player_objects[player_ids[0]].night_after
+                                       if dep in actors and dep != step)
+
+        # 先檢查依賴關係（存在循環時拋出 ValueError）
+        self.build_stages(dependencies)
+        finished = {step: asyncio.Event() for step in actors}
+
+        async def run_step(step: str):
+            for dep in dependencies[step]:
+                await finished[dep].wait()
+
+            player_ids = actors[step]
+            results = await asyncio.gather(*[
+                game_state.player_objects[player_id].night_action(
+                    game_state.get_state_for_player(player_id), api_handlers[player_id]
+                )
+                for player_id in player_ids
+            ])
+
+            for player_id, action in zip(player_ids, results):
+                game_state.night_actions[player_id] = action
+
+            game_state.update_night_context()
+            finished[step].set()
+
+        tasks = [asyncio.ensure_future(run_step(step)) for step in sorted(actors)]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            # 某個步驟出錯時取消其餘仍在等待的步驟
+            for task in tasks:
+                task.cancel()
+
+        game_state.night_actions = {player_id: game_state.night_actions[player_id]
+                                    for player_id in seats if player_id in game_state.night_actions}
+        return game_state.night_actions
@@ -0,0 +1,216 @@
+import copy
+from typing import Any, Dict, List, Optional
+
+from utils.text_utils import ROLE_DISPLAY_NAMES, detect_role_claim, extract_accusations, extract_check_claims
+
+# 死因的公開描述（夜晚的死因對其他玩家來說無法區分）
+DEATH_CAUSE_LABELS = {
+    "night": "夜晚死亡",
+    "poison": "夜晚死亡",
+    "wolfkiller": "夜晚死亡",
+    "shot": "被獵人帶走",
+    "exile": "被放逐"
+}
+
+
+class PublicFactsTable:
+    """按座位記錄所有玩家都能看到的公開信息
+
+    每個事件（發言、投票、死亡）到達時只抽取一次，提示中直接使用渲染好的緊湊表格，
+    取代冗長的發言記錄。
+    """
+
+    def __init__(self):
+        """初始化公開信息表"""
+        self.rows = {}  # {player_id: 座位記錄}
+        self._version = 0  # 每次更新遞增
+        self._rendered = None  # 渲染緩存 (version, text)
+
+    def add_player(self, player_id: int, name: str):
+        """添加座位
+
+        Args:
+            player_id (int): 玩家 ID
+            name (str): 玩家名稱
+        """
+        self.rows[player_id] = {
+            "name": name,
+            "death": None,  # {"day", "cause", "role"}
+            "claim": None,  # 聲稱的角色代號
+            "check_claims": [],  # 公開的查驗結果 [{"day", "target", "result"}]
+            "votes": {},  # 投票記錄 {day: target_id}
+            "accusations": {},  # 指控過的玩家 {target_id: 次數}
+            "accused_by": {}  # 被誰指控 {accuser_id: 次數}
+        }
+        self._touch()
+
+    def record_speech(self, day: int, player_id: int, content: str):
+        """從一條發言中抽取身份聲明、查驗結果和指控
+
+        Args:
+            day (int): 遊戲天數
+            player_id (int): 發言者 ID
+            content (str): 發言內容
+        """
+        row = self.rows.get(player_id)
+        if row is None or not content:
+            return
+
+        claim = detect_role_claim(content)
+        if claim:
+            row["claim"] = claim
+
+        for target_id, result in extract_check_claims(content):
+            if target_id in self.rows and target_id != player_id:
+                row["check_claims"].append({"day": day, "target": target_id, "result": result})
+
+        for target_id in extract_accusations(content):
+            if target_id in self.rows and target_id != player_id:
+                row["accusations"][target_id] = row["accusations"].get(target_id, 0) + 1
+                accused_by = self.rows[target_id]["accused_by"]
+                accused_by[player_id] = accused_by.get(player_id, 0) + 1
+
+        self._touch()
+
+    def record_vote(self, day: int, voter_id: int, target_id: int):
+        """記錄投票
+
+        Args:
+            day (int): 遊戲天數
+            voter_id (int): 投票者 ID
+            target_id (int): 投票目標 ID
+        """
+        if voter_id in self.rows:
+            self.rows[voter_id]["votes"][day] = target_id
+            self._touch()
+
+    def record_death(self, day: int, player_id: int, cause: str, role: Optional[str] = None):
+        """記錄死亡及公開的身份
+
+        Args:
+            day (int): 遊戲天數
+            player_id (int): 死亡玩家 ID
+            cause (str): 死因（"night", "poison", "wolfkiller", "shot" 或 "exile"）
+            role (Optional[str]): 公開的角色代號。默認為 None
+        """
+        if player_id in self.rows:
+            self.rows[player_id]["death"] = {"day": day, "cause": cause, "role": role}
+            self._touch()
+
+    def vote_counts(self, day: int) -> Dict[int, int]:
+        """統計某天每位玩家的得票數
+
+        Args:
+            day (int): 遊戲天數
+
+        Returns:
+            Dict[int, int]: {target_id: 票數}
+        """
+        counts = {}
+        for row in self.rows.values():
+            target_id = row["votes"].get(day)
+            if target_id is not None:
+                counts[target_id] = counts.get(target_id, 0) + 1
+        return counts
+
+    def render(self) -> str:
+        """渲染為緊湊的文本表格（結果會被緩存，直到下一次更新）
+
+        Returns:
+            str: 公開信息表
+        """
+        if self._rendered and self._rendered[0] == self._version:
+            return self._rendered[1]
+
+        lines = ["座位｜狀態｜聲稱身份｜公開查驗｜投票記錄｜指控｜被指控"]
+        for player_id in sorted(self.rows):
+            row = self.rows[player_id]
+            lines.append("｜".join([
+                f"玩家{player_id}",
+                self._format_status(row),
+                ROLE_DISPLAY_NAMES.get(row["claim"], row["claim"]) if row["claim"] else "-",
+                "，".join(f"D{c['day']}:{c['target']}={c['result']}" for c in row["check_claims"]) or "-",
+                "，".join(f"D{day}→{target}" for day, target in sorted(row["votes"].items())) or "-",
+                self._format_counts(row["accusations"]),
+                self._format_counts(row["accused_by"])
+            ]))
+
+        text = "\n".join(lines)
+        self._rendered = (self._version, text)
+        return text
+
+    def to_dict(self) -> Dict[str, Any]:
+        """轉換為可序列化的字典
+
+        Returns:
+            Dict[str, Any]: 公開信息表數據
+        """
+        return {str(player_id): row for player_id, row in self.rows.items()}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "PublicFactsTable":
+        """從字典恢復（JSON 的鍵總是字符串，需要恢復為整數）
+
+        Args:
+            data (Dict[str, Any]): 公開信息表數據
+
+        Returns:
+            PublicFactsTable: 公開信息表
+        """
+        table = cls()
+        for player_id, row in data.items():
+            row = dict(row)
+            row["votes"] = {int(day): target for day, target in row.get("votes", {}).items()}
+            row["accusations"] = {int(pid): count for pid, count in row.get("accusations", {}).items()}
+            row["accused_by"] = {int(pid): count for pid, count in row.get("accused_by", {}).items()}
+            table.rows[int(player_id)] = row
+        table._touch()
+        return table
+
+    def fork(self) -> "PublicFactsTable":
+        """創建獨立的副本（每個座位的記錄很小，直接複製）
+
+        Returns:
+            PublicFactsTable: 公開信息表副本
+        """
+        table = PublicFactsTable()
+        table.rows = copy.deepcopy(self.rows)
+        table._version = self._version
+        table._rendered = self._rendered
+        return table
+
+    def _touch(self):
+        """標記表格已更新"""
+        self._version += 1
+
+    @staticmethod
+    def _format_status(row: Dict[str, Any]) -> str:
+        """格式化存活狀態
+
+        Args:
+            row (Dict[str, Any]): 座位記錄
+
+        Returns:
+            str: 狀態文本
+        """
+        death = row["death"]
+        if not death:
+            return "存活"
+        cause = DEATH_CAUSE_LABELS.get(death["cause"], "死亡")
+        role = ROLE_DISPLAY_NAMES.get(death["role"], death["role"]) if death["role"] else "未知"
+        return f"D{death['day']}{cause}({role})"
+
+    @staticmethod
+    def _format_counts(counts: Dict[int, int]) -> str:
+        """格式化指控次數
+
+        Args:
+            counts (Dict[int, int]): {player_id: 次數}
+
+        Returns:
+            str: 例如 "3×2，5"
+        """
+        parts: List[str] = []
+        for player_id, count in sorted(counts.items()):
+            parts.append(f"{player_id}×{count}" if count > 1 else str(player_id))
+        return "，".join(parts) or "-"
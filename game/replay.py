@@ -0,0 +1,196 @@
+import argparse
+import asyncio
+import contextlib
+import glob
+import io
+import os
+import sys
+from collections import deque
+from typing import Any, Dict, List
+
+from .game_manager import GameManager
+from .journal import GameJournal, SUMMARIZER_KEY, prompt_hash
+from .summarizer import DiscussionSummarizer
+
+
+class ReplayHandler:
+    """按順序返回某個座位在日誌中記錄的回應，不調用 API
+
+    每個座位有獨立的回應隊列，因此夜間並發行動的完成順序不影響重放。提示指紋與記錄不符時
+    只計數不中斷：這正是引擎或提示構建改動造成的差異。
+    """
+
+    def __init__(self, calls: List[Dict[str, Any]], model: str = None):
+        """初始化
+
+        Args:
+            calls (List[Dict[str, Any]]): 該座位按時間順序的 llm_call 事件數據
+            model (str, optional): 原始模型名稱。默認為 None
+        """
+        self.calls = deque(calls)
+        self.model = model
+        self.served = 0  # 已返回的回應數
+        self.mismatches = 0  # 提示指紋與記錄不符的次數
+        self.exhausted = 0  # 記錄用完後仍被調用的次數
+
+    async def get_response(self, prompt, system_message=None, temperature=0.7, max_tokens=500):
+        """返回下一條記錄的回應
+
+        Args:
+            prompt (str): 提示
+            system_message (str, optional): 系統消息。默認為 None
+            temperature (float, optional): 不適用於重放
+            max_tokens (int, optional): 不適用於重放
+
+        Returns:
+            str: 記錄的回應，記錄用完時為空字符串（角色會使用按種子確定的隨機回退）
+        """
+        if not self.calls:
+            self.exhausted += 1
+            return ""
+        call = self.calls.popleft()
+        self.served += 1
+        if call.get("prompt_hash") != prompt_hash(prompt, system_message):
+            self.mismatches += 1
+        return call.get("response") or ""
+
+
+class ReplayManager(GameManager):
+    """用日誌中記錄的回應代替所有 API 處理程序的遊戲管理器（全速運行，不寫結果和日誌）"""
+
+    def __init__(self, calls: Dict[int, List[Dict[str, Any]]], api_models: Dict[int, str] = None):
+        """初始化
+
+        Args:
+            calls (Dict[int, List[Dict[str, Any]]]): 每個座位的 llm_call 事件數據，摘要器的調用在 SUMMARIZER_KEY 下
+            api_models (Dict[int, str], optional): 原始遊戲的模型分配。默認為 None
+        """
+        super().__init__()
+        self.recorded_calls = calls
+        self.recorded_models = api_models or {}
+        self.save_results = False
+
+    def _setup_api_handlers(self):
+        """為每個座位設置重放處理程序（包括原來的人類和機器人座位，它們的回應同樣被記錄）"""
+        self.api_handlers = {}
+        self.api_models = {}
+        for player in self.game_state.players:
+            player_id = player["player_id"]
+            model = self.recorded_models.get(player_id)
+            self.api_handlers[player_id] = ReplayHandler(self.recorded_calls.get(player_id, []), model)
+            self.api_models[player_id] = model or "Replay"
+
+    def _setup_summarizer(self):
+        """按記錄的摘要器調用重放 LLM 摘要，日誌中沒有摘要器調用時（原遊戲使用規則摘要）使用規則摘要"""
+        self.summarizer_handler = None
+        if SUMMARIZER_KEY in self.recorded_calls:
+            self.summarizer_handler = ReplayHandler(self.recorded_calls[SUMMARIZER_KEY],
+                                                    self.recorded_calls[SUMMARIZER_KEY][0].get("model"))
+        self.game_state.summarizer = DiscussionSummarizer(self.summarizer_handler)
+
+
+async def replay_journal(path: str, max_days: int = 10) -> Dict[str, Any]:
+    """按日誌中記錄的設置、種子和回應重新運行一局遊戲，並與記錄的結果比較
+
+    Args:
+        path (str): 遊戲日誌路徑
+        max_days (int, optional): 最大遊戲天數（記錄的天數更大時以記錄為準）。默認為 10
+
+    Returns:
+        Dict[str, Any]: 重放報告，match 表示結果、天數和所有提示都與記錄一致
+    """
+    events = GameJournal.read(path)
+    setup = next((e["data"] for e in events if e["type"] == "setup"), None)
+    result = next((e["data"] for e in reversed(events) if e["type"] == "result"), {})
+    report = {"path": path, "status": "skipped"}
+
+    if setup is None:
+        report["reason"] = "日誌中沒有設置記錄"
+        return report
+    if setup.get("seed") is None:
+        report["reason"] = "日誌沒有記錄遊戲種子，無法重現角色分配"
+        return report
+
+    calls = {}
+    for event in events:
+        if event["type"] != "llm_call" or event["data"].get("player_id") is None:
+            continue
+        player_id = event["data"]["player_id"]
+        key = SUMMARIZER_KEY if player_id == SUMMARIZER_KEY else int(player_id)
+        calls.setdefault(key, []).append(event["data"])
+
+    api_models = {int(pid): model for pid, model in setup.get("api_models", {}).items()}
+    manager = ReplayManager(calls, api_models)
+    manager.setup_game(setup["player_count"], setup["werewolf_count"], setup.get("special_roles") or [],
+                       human_players=[], summarize_discussions=bool(setup.get("summarize_discussions")),
+                       journal_path="", bot_players=[], seed=setup["seed"])
+    await manager.run_game(max(max_days, result.get("day") or 0))
+
+    handlers = list(manager.api_handlers.values())
+    if manager.summarizer_handler:
+        handlers.append(manager.summarizer_handler)
+    report.update({
+        "status": "replayed",
+        "game_id": setup.get("game_id"),
+        "calls": sum(len(c) for c in calls.values()),
+        "served": sum(h.served for h in handlers),
+        "mismatches": sum(h.mismatches for h in handlers),
+        "exhausted": sum(h.exhausted for h in handlers),
+        "unused": sum(len(h.calls) for h in handlers),
+        "recorded_winner": result.get("winner"),
+        "winner": manager.game_state.winner,
+        "recorded_day": result.get("day"),
+        "day": manager.game_state.day
+    })
+    report["match"] = (report["winner"] == report["recorded_winner"] and report["day"] == report["recorded_day"]
+                       and report["mismatches"] == report["exhausted"] == report["unused"] == 0)
+    return report
+
+
+async def replay_all(paths: List[str], max_days: int = 10) -> List[Dict[str, Any]]:
+    """依次重放多個日誌（遊戲輸出被丟棄）
+
+    Args:
+        paths (List[str]): 日誌文件或目錄
+        max_days (int, optional): 最大遊戲天數。默認為 10
+
+    Returns:
+        List[Dict[str, Any]]: 每個日誌的重放報告
+    """
+    files = []
+    for path in paths:
+        files.extend(sorted(glob.glob(os.path.join(path, "*.jsonl"))) if os.path.isdir(path) else [path])
+
+    reports = []
+    for path in files:
+        with contextlib.redirect_stdout(io.StringIO()):
+            reports.append(await replay_journal(path, max_days))
+    return reports
+
+
+def main(argv=None):
+    """命令行入口：python -m game.replay game_results/journals"""
+    parser = argparse.ArgumentParser(description="用日誌中記錄的 LLM 回應全速重放遊戲，檢查引擎或提示改動造成的差異")
+    parser.add_argument("paths", nargs="+", help="遊戲日誌文件或目錄")
+    parser.add_argument("--max-days", type=int, default=10, help="最大遊戲天數")
+    args = parser.parse_args(argv)
+
+    reports = asyncio.run(replay_all(args.paths, args.max_days))
+    replayed = [r for r in reports if r["status"] == "replayed"]
+    diverged = [r for r in replayed if not r["match"]]
+
+    for report in diverged:
+        print(f"不一致：{report['path']}：勝者 {report['recorded_winner']} → {report['winner']}，"
+              f"天數 {report['recorded_day']} → {report['day']}，提示不符 {report['mismatches']}，"
+              f"回應不足 {report['exhausted']}，未使用 {report['unused']}")
+    for report in reports:
+        if report["status"] == "skipped":
+            print(f"跳過：{report['path']}：{report['reason']}")
+
+    print(f"重放 {len(replayed)} 局，一致 {len(replayed) - len(diverged)} 局，不一致 {len(diverged)} 局，"
+          f"跳過 {len(reports) - len(replayed)} 局")
+    return 1 if diverged else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+import hashlib
+from typing import Any, Dict, List, Optional
+
+from .events import ANNOUNCE
+from utils.text_utils import ROLE_DISPLAY_NAMES, detect_role_claim, extract_accusations, split_sentences
+
+
+class DiscussionSummarizer:
+    """將一天的討論壓縮成一份公開摘要，所有玩家共享"""
+
+    def __init__(self, api_handler=None, max_tokens: int = 400, excerpt_length: int = 40, events=None):
+        """初始化討論摘要器
+
+        Args:
+            api_handler: 用於生成摘要的 API 處理程序。默認為 None（使用規則抽取摘要）
+            max_tokens (int, optional): LLM 摘要的最大生成標記數。默認為 400
+            excerpt_length (int, optional): 規則摘要中每位玩家發言摘錄的最大字數。默認為 40
+            events (EventBus, optional): 發布摘要失敗提示的事件總線。默認為 None（不提示）
+        """
+        self.api_handler = api_handler
+        self.events = events
+        self.max_tokens = max_tokens
+        self.excerpt_length = excerpt_length
+        self._cache = {}  # {討論內容哈希: 摘要}
+
+    def fork(self) -> "DiscussionSummarizer":
+        """創建分支遊戲使用的摘要器，與原摘要器共享摘要緩存
+
+        Returns:
+            DiscussionSummarizer: 新的摘要器（處理程序由分支的管理器在每個階段設置）
+        """
+        summarizer = DiscussionSummarizer(self.api_handler, self.max_tokens, self.excerpt_length, self.events)
+        summarizer._cache = self._cache
+        return summarizer
+
+    async def summarize(self, day: int, discussions: List[Dict[str, Any]]) -> str:
+        """生成一天討論的摘要，相同的討論只計算一次
+
+        Args:
+            day (int): 遊戲天數
+            discussions (List[Dict[str, Any]]): 當天的討論 [{"player_id", "player_name", "content"}]
+
+        Returns:
+            str: 討論摘要
+        """
+        if not discussions:
+            return "無人發言"
+
+        cache_key = self._cache_key(day, discussions)
+        if cache_key in self._cache:
+            return self._cache[cache_key]
+
+        summary = None
+        if self.api_handler:
+            try:
+                summary = await self._summarize_with_llm(day, discussions)
+            except Exception as e:
+                if self.events:
+                    self.events.publish(ANNOUNCE, f"討論摘要生成失敗，改用規則摘要：{e}", day=day, tag="warning")
+
+        if not summary:
+            summary = self._summarize_extractive(discussions)
+
+        self._cache[cache_key] = summary
+        return summary
+
+    def _cache_key(self, day: int, discussions: List[Dict[str, Any]]) -> str:
+        """計算討論內容的緩存鍵
+
+        Args:
+            day (int): 遊戲天數
+            discussions (List[Dict[str, Any]]): 當天的討論
+
+        Returns:
+            str: 緩存鍵
+        """
+        digest = hashlib.sha1(str(day).encode("utf-8"))
+        for discussion in discussions:
+            digest.update(f"\x00{discussion['player_id']}\x00{discussion['content']}".encode("utf-8"))
+        return digest.hexdigest()
+
+    async def _summarize_with_llm(self, day: int, discussions: List[Dict[str, Any]]) -> Optional[str]:
+        """使用 LLM 生成摘要
+
+        Args:
+            day (int): 遊戲天數
+            discussions (List[Dict[str, Any]]): 當天的討論
+
+        Returns:
+            Optional[str]: 摘要文本
+        """
+        prompt = f"以下是狼人殺遊戲第{day}天白天的全部發言：\n\n"
+        for discussion in discussions:
+            prompt += f"- {discussion['player_name']}（玩家{discussion['player_id']}）說：「{discussion['content']}」\n"
+        prompt += ("\n請把這些發言整理成一份簡潔的公開摘要，每位玩家一行，格式為「玩家X：要點」。"
+                   "必須保留身份聲明、查驗結果聲明、懷疑或指控的對象以及投票意向，"
+                   "不要加入你自己的推測，也不要遺漏任何玩家。")
+
+        system_message = "你是狼人殺遊戲的中立記錄員，負責客觀、精確地整理玩家發言。"
+        response = await self.api_handler.get_response(prompt, system_message, temperature=0.2,
+                                                       max_tokens=self.max_tokens)
+        return response.strip() if response else None
+
+    def _summarize_extractive(self, discussions: List[Dict[str, Any]]) -> str:
+        """使用規則抽取摘要：身份聲明、懷疑對象和發言摘錄
+
+        Args:
+            discussions (List[Dict[str, Any]]): 當天的討論
+
+        Returns:
+            str: 摘要文本
+        """
+        lines = []
+        for discussion in discussions:
+            content = discussion["content"] or ""
+            points = []
+
+            claim = detect_role_claim(content)
+            if claim:
+                points.append(f"聲稱是{ROLE_DISPLAY_NAMES.get(claim, claim)}")
+
+            accused = extract_accusations(content)
+            if accused:
+                points.append("懷疑" + "、".join(f"玩家{pid}" for pid in accused))
+
+            sentences = split_sentences(content)
+            if sentences:
+                excerpt = sentences[0]
+                if len(excerpt) > self.excerpt_length:
+                    excerpt = excerpt[:self.excerpt_length] + "…"
+                points.append(f"「{excerpt}」")
+
+            lines.append(f"玩家{discussion['player_id']}：{'；'.join(points) or '未發表實質意見'}")
+
+        return "\n".join(lines)
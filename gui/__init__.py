@@ -7,6 +7,7 @@ try:
     from .settings_panel import SettingsPanel
     from .game_panel import GamePanel
     from .log_panel import LogPanel
+    from .session_panel import SessionPanel
     from .app import WerewolfApp
 except ImportError as e:
     print(f"GUI 初始化錯誤: {e}")
@@ -43,6 +43,24 @@ ROLE_ICONS = {
     "magician": "icons/magician.png"
 }
 
+# 遊戲階段顯示名稱
+PHASE_NAMES = {
+    "setup": "準備中",
+    "night": "夜晚",
+    "day": "白天討論",
+    "vote": "投票",
+    "gameover": "游戲結束"
+}
+
+# 引擎事件類型對應的日誌樣式（旁白事件自帶樣式）
+EVENT_TAGS = {
+    "speech": "player",
+    "vote": "info",
+    "death": "warning",
+    "game_over": "success",
+    "log": "info"
+}
+
 # 顏色主題
 COLORS = {
     "primary": "#3f51b5",     # 主要深藍色
@@ -21,6 +21,7 @@ class GamePanel(ctk.CTkFrame):
         self.phase_var = ctk.StringVar(value="游戲未開始")
         self.alive_status_var = ctk.StringVar(value="狼人: 0 | 村民: 0")
         self.game_status_var = ctk.StringVar(value="游戲狀態: 未開始")
+        self.queue_status_var = ctk.StringVar(value="")
         
         # 創建界面元素
         self._create_status_panel()
@@ -66,7 +67,16 @@ class GamePanel(ctk.CTkFrame):
             textvariable=self.game_status_var,
             font=("Arial", 12)
         )
-        status_text.grid(row=1, column=0, columnspan=3, padx=10, pady=(0, 10), sticky="w")
+        status_text.grid(row=1, column=0, columnspan=2, padx=10, pady=(0, 10), sticky="w")
+        
+        # 消息隊列狀態（深度和延遲）
+        queue_text = ctk.CTkLabel(
+            status_frame, 
+            textvariable=self.queue_status_var,
+            font=("Arial", 10),
+            text_color=COLORS["text_secondary"]
+        )
+        queue_text.grid(row=1, column=2, padx=10, pady=(0, 10), sticky="e")
     
     def update_status(self, day: str = None, phase: str = None, 
                       alive: str = None, status: str = None):
@@ -87,6 +97,15 @@ class GamePanel(ctk.CTkFrame):
         if status is not None:
             self.game_status_var.set(status)
     
+    def update_queue_stats(self, depth: int, lag_ms: int):
+        """更新消息隊列狀態
+        
+        Args:
+            depth (int): 待處理的消息數
+            lag_ms (int): 最近一條消息的處理延遲（毫秒）
+        """
+        self.queue_status_var.set(f"隊列: {depth} | 延遲: {lag_ms} ms")
+    
     def reset_status(self):
         """重置游戲狀態為默認值"""
         self.day_var.set("Day 0")
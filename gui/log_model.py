@@ -0,0 +1,264 @@
+import re
+import time
+from bisect import bisect_left
+from collections import deque
+from itertools import islice
+from typing import Dict, Iterator, List, Optional
+
+# ASCII 單詞和數字按整詞索引，中文按單字和相鄰二字索引
+_WORD_RE = re.compile(r"[a-z0-9_]+")
+_CJK_RE = re.compile(r"[㐀-鿿豈-﫿]+")
+
+
+def _cjk_terms(run: str) -> List[str]:
+    """中文片段的單字和二字詞"""
+    return list(run) + [run[i:i + 2] for i in range(len(run) - 1)]
+
+
+def index_terms(text: str) -> set:
+    """提取文本的索引詞
+
+    Args:
+        text (str): 文本
+
+    Returns:
+        set: 索引詞（小寫 ASCII 單詞、中文單字和二字詞）
+    """
+    text = text.lower()
+    terms = set(_WORD_RE.findall(text))
+    for run in _CJK_RE.findall(text):
+        terms.update(_cjk_terms(run))
+    return terms
+
+
+class LogRecord:
+    """日誌面板中的一條記錄"""
+
+    __slots__ = ("seq", "text", "tag", "time", "event_type", "player_id", "day", "phase", "_lower")
+
+    def __init__(self, seq: int, text: str, tag: str = "info", event_type: Optional[str] = None,
+                 player_id: Optional[int] = None, day: Optional[int] = None, phase: Optional[str] = None):
+        """初始化
+
+        Args:
+            seq (int): 遞增的記錄序號
+            text (str): 文本
+            tag (str, optional): 顯示樣式。默認為 "info"
+            event_type (Optional[str], optional): 來源事件類型。默認為 None（界面自身的消息）
+            player_id (Optional[int], optional): 相關玩家。默認為 None
+            day (Optional[int], optional): 遊戲天數。默認為 None
+            phase (Optional[str], optional): 遊戲階段。默認為 None
+        """
+        self.seq = seq
+        self.text = text
+        self.tag = tag
+        self.time = time.time()
+        self.event_type = event_type
+        self.player_id = player_id
+        self.day = day
+        self.phase = phase
+        self._lower = None
+
+    @property
+    def lower(self) -> str:
+        """小寫文本（用於子串匹配，按需計算）"""
+        if self._lower is None:
+            self._lower = self.text.lower()
+        return self._lower
+
+
+class LogModel:
+    """日誌面板的數據模型：保存完整的日誌記錄，文本框只顯示其中最近的一部分
+
+    每條記錄追加時增量更新倒排索引（ASCII 單詞、中文單字和二字詞，以及玩家、階段和事件類型），
+    搜索先用索引求候選集再逐條確認子串，因此幾萬行的日誌也能邊輸入邊搜索。搜索和過濾只讀取
+    模型，不會改變或丟失記錄。記錄數超過上限時丟棄最舊的記錄，使內存有界。
+    """
+
+    def __init__(self, max_records: int = 200000):
+        """初始化
+
+        Args:
+            max_records (int, optional): 保留的最大記錄數。默認為 200000
+        """
+        self.max_records = max_records
+        self.records = deque()
+        self._by_seq = {}  # {seq: LogRecord}
+        self._index = {}  # {索引詞: [seq, ...]}，序號遞增
+        self._words = set()  # 出現過的 ASCII 單詞（用於單詞內的子串查詢）
+        self._next_seq = 0
+        self._dropped = 0  # 上次清理索引後丟棄的記錄數
+
+    def append(self, text: str, tag: str = "info", **meta) -> LogRecord:
+        """追加一條記錄並更新索引
+
+        Args:
+            text (str): 文本
+            tag (str, optional): 顯示樣式。默認為 "info"
+            **meta: LogRecord 的其他字段（event_type, player_id, day, phase）
+
+        Returns:
+            LogRecord: 新記錄
+        """
+        record = LogRecord(self._next_seq, text, tag, **meta)
+        self._next_seq += 1
+        self.records.append(record)
+        self._by_seq[record.seq] = record
+        self._index_record(record)
+
+        if len(self.records) > self.max_records:
+            del self._by_seq[self.records.popleft().seq]
+            self._dropped += 1
+            # 索引中已丟棄記錄的序號在查詢時跳過，累積到一定數量再統一清理
+            if self._dropped >= max(1, self.max_records // 10):
+                self._prune_index()
+        return record
+
+    def _index_record(self, record: LogRecord):
+        """把記錄的索引詞加入倒排索引"""
+        terms = index_terms(record.text)
+        self._words.update(term for term in terms if term.isascii())
+        if record.player_id is not None:
+            terms.add(f"\0player:{record.player_id}")
+        if record.phase is not None:
+            terms.add(f"\0phase:{record.phase}")
+        if record.event_type is not None:
+            terms.add(f"\0type:{record.event_type}")
+        for term in terms:
+            postings = self._index.get(term)
+            if postings is None:
+                self._index[term] = [record.seq]
+            else:
+                postings.append(record.seq)
+
+    def _prune_index(self):
+        """從倒排列表中刪除已丟棄記錄的序號（丟棄的總是最舊的記錄，即每個列表的前綴）"""
+        self._dropped = 0
+        first = self.records[0].seq if self.records else self._next_seq
+        for term in list(self._index):
+            postings = self._index[term]
+            stale = bisect_left(postings, first)
+            if stale == len(postings):
+                del self._index[term]
+                self._words.discard(term)
+            elif stale:
+                del postings[:stale]
+
+    def clear(self):
+        """清空所有記錄（序號繼續遞增）"""
+        self.records.clear()
+        self._by_seq = {}
+        self._index = {}
+        self._words = set()
+        self._dropped = 0
+
+    def tail(self, count: int) -> List[LogRecord]:
+        """獲取最近的記錄
+
+        Args:
+            count (int): 數量
+
+        Returns:
+            List[LogRecord]: 按時間順序的記錄
+        """
+        return list(islice(reversed(self.records), count))[::-1]
+
+    def values(self, field: str) -> List:
+        """獲取某個字段出現過的所有值（用於過濾選項）
+
+        Args:
+            field (str): "player", "phase" 或 "type"
+
+        Returns:
+            List: 排序後的值
+        """
+        prefix = f"\0{field}:"
+        values = [term[len(prefix):] for term in self._index if term.startswith(prefix)]
+        if field == "player":
+            return sorted(int(value) for value in values)
+        return sorted(values)
+
+    def _query_postings(self, query: str, filters: Dict[str, object]) -> Optional[List[List[int]]]:
+        """把查詢和過濾條件轉換為需要求交集的倒排列表
+
+        Returns:
+            Optional[List[List[int]]]: 倒排列表，某個條件沒有任何匹配時為 None
+        """
+        groups = []
+        for field, value in filters.items():
+            if value is not None:
+                groups.append(self._index.get(f"\0{field}:{value}"))
+
+        text = query.lower()
+        for word in _WORD_RE.findall(text):
+            # 查詢詞可能只是某個單詞的一部分（例如還沒輸入完），合併所有包含它的單詞
+            seqs = set()
+            for term in self._words:
+                if word in term:
+                    seqs.update(self._index[term])
+            groups.append(sorted(seqs) if seqs else None)
+        for run in _CJK_RE.findall(text):
+            terms = [run] if len(run) == 1 else [run[i:i + 2] for i in range(len(run) - 1)]
+            groups.extend(self._index.get(term) for term in terms)
+
+        if any(group is None for group in groups):
+            return None
+        return groups
+
+    def search(self, query: str = "", player_id: Optional[int] = None, phase: Optional[str] = None,
+               event_type: Optional[str] = None, limit: Optional[int] = None) -> List[LogRecord]:
+        """搜索記錄
+
+        Args:
+            query (str, optional): 搜索文本（不區分大小寫的子串匹配）。默認為空（不限）
+            player_id (Optional[int], optional): 只看該玩家的記錄。默認為 None
+            phase (Optional[str], optional): 只看該階段的記錄。默認為 None
+            event_type (Optional[str], optional): 只看該事件類型的記錄。默認為 None
+            limit (Optional[int], optional): 最多返回最近的多少條。默認不限
+
+        Returns:
+            List[LogRecord]: 按時間順序的匹配記錄
+        """
+        query = query.strip()
+        groups = self._query_postings(query, {"player": player_id, "phase": phase, "type": event_type})
+        if groups is None:
+            return []
+
+        if groups:
+            groups.sort(key=len)
+            candidates = groups[0]
+            for group in groups[1:]:
+                members = set(group)
+                candidates = [seq for seq in candidates if seq in members]
+            records = (self._by_seq[seq] for seq in candidates if seq in self._by_seq)
+        else:
+            records = iter(self.records)
+
+        needle = query.lower()
+        matches = [record for record in records if needle in record.lower] if needle else list(records)
+        return matches[-limit:] if limit else matches
+
+    def matches(self, record: LogRecord, query: str = "", player_id: Optional[int] = None,
+                phase: Optional[str] = None, event_type: Optional[str] = None) -> bool:
+        """判斷單條記錄是否符合搜索條件（用於過濾狀態下新到達的記錄）
+
+        Args:
+            record (LogRecord): 記錄
+            query (str, optional): 搜索文本。默認為空
+            player_id (Optional[int], optional): 玩家。默認為 None
+            phase (Optional[str], optional): 階段。默認為 None
+            event_type (Optional[str], optional): 事件類型。默認為 None
+
+        Returns:
+            bool: 是否符合
+        """
+        return ((player_id is None or record.player_id == player_id)
+                and (phase is None or record.phase == phase)
+                and (event_type is None or record.event_type == event_type)
+                and query.strip().lower() in record.lower)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __iter__(self) -> Iterator[LogRecord]:
+        return iter(self.records)
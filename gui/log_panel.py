@@ -1,31 +1,60 @@
 import customtkinter as ctk
 from tkinter import messagebox
 from typing import Dict, Callable, Optional
-import threading
-import asyncio
 
-from .constants import COLORS
+from .constants import COLORS, PHASE_NAMES
 from .theme import ThemeStyles
+from .log_model import LogModel
+
+# 日誌樣式：文字顏色和字體（通過文本標籤設置，不改變整個文本框的字體）
+LOG_TAG_STYLES = {
+    "header": {"foreground": COLORS["primary"], "font": ("Arial", 12, "bold")},
+    "info": {"foreground": COLORS["text"]},
+    "warning": {"foreground": COLORS["warning"]},
+    "error": {"foreground": COLORS["error"]},
+    "success": {"foreground": COLORS["success"]},
+    "player": {"foreground": "#663399"},  # 紫色
+    "werewolf": {"foreground": COLORS["werewolf"]},
+    "villager": {"foreground": COLORS["villager"]},
+    "night": {"foreground": COLORS["night"], "font": ("Arial", 11, "bold")},
+    "day": {"foreground": COLORS["day"], "font": ("Arial", 11, "bold")}
+}
 
 class LogPanel(ctk.CTkFrame):
     """日誌面板，顯示游戲日誌並處理人類玩家的輸入"""
     
-    def __init__(self, master, **kwargs):
+    def __init__(self, master, max_visible_lines: int = 2000, frame_interval: int = 16, **kwargs):
         """初始化日誌面板
         
         Args:
             master: 父窗口
+            max_visible_lines (int, optional): 文本框中最多保留的行數，更早的記錄只保存在模型中。默認為 2000
+            frame_interval (int, optional): 合併插入的間隔（毫秒）。默認為 16（約每幀一次）
             **kwargs: 額外參數傳給父類
         """
         super().__init__(master, fg_color=COLORS["background"], **kwargs)
         
+        # 完整的日誌記錄保存在模型中，文本框只渲染最近的部分
+        self.model = LogModel()
+        self.max_visible_lines = max_visible_lines
+        self.frame_interval = frame_interval
+        self._pending = []  # 等待下一幀插入的記錄
+        self._flush_job = None
+        self._filter = None  # 當前的搜索和過濾條件，None 表示顯示全部
+        self._filter_job = None
+        self._match_count = 0  # 過濾狀態下的匹配記錄數
+        self._known_players = set()  # 出現過的玩家，用於玩家過濾選項
+        self._type_options = {"全部類型": None, "發言": "speech", "投票": "vote", "死亡": "death",
+                              "勝負": "game_over", "旁白": "announce", "日誌": "log"}
+        self._phase_options = {"全部階段": None}
+        self._phase_options.update({name: phase for phase, name in PHASE_NAMES.items()})
+        
         # 創建界面元素
         self._create_log_area()
         self._create_human_input_area()
         
-        # 人類玩家輸入處理
-        self.current_response = None
-        self.current_response_event = None
+        # 人類玩家輸入處理：提交的回應交給回調（由應用轉發給遊戲引擎）
+        self.on_response = None
     
     def _create_log_area(self):
         """創建日誌區域"""
@@ -63,6 +92,32 @@ class LogPanel(ctk.CTkFrame):
             **ThemeStyles.small_button()
         ).pack(side="right", padx=10)
         
+        # 過濾條件列：玩家、階段、事件類型
+        filter_frame = ctk.CTkFrame(log_frame, fg_color="transparent")
+        filter_frame.pack(fill="x", padx=10)
+        
+        self.player_filter_var = ctk.StringVar(value="全部玩家")
+        self.player_filter_menu = ctk.CTkOptionMenu(
+            filter_frame, variable=self.player_filter_var, values=["全部玩家"],
+            width=110, command=self._filter_log
+        )
+        self.player_filter_menu.pack(side="left", padx=(0, 5))
+        
+        self.phase_filter_var = ctk.StringVar(value="全部階段")
+        ctk.CTkOptionMenu(
+            filter_frame, variable=self.phase_filter_var, values=list(self._phase_options),
+            width=110, command=self._filter_log
+        ).pack(side="left", padx=5)
+        
+        self.type_filter_var = ctk.StringVar(value="全部類型")
+        ctk.CTkOptionMenu(
+            filter_frame, variable=self.type_filter_var, values=list(self._type_options),
+            width=110, command=self._filter_log
+        ).pack(side="left", padx=5)
+        
+        self.match_count_var = ctk.StringVar(value="")
+        ctk.CTkLabel(filter_frame, textvariable=self.match_count_var).pack(side="right", padx=5)
+        
         # 日誌文本區
         self.log_text = ctk.CTkTextbox(
             log_frame, 
@@ -75,9 +130,10 @@ class LogPanel(ctk.CTkFrame):
         )
         self.log_text.pack(fill="both", expand=True, padx=10, pady=10)
         
-        # 為不同日誌類型配置標籤
-        # CustomTkinter的CTkTextbox不支持原生的tag_configure，我們需要使用自定義的方法
-        # 這里我們使用文本插入時指定顏色的方法
+        # 為不同日誌類型配置標籤（CTkTextbox.tag_config 不允許設置字體，直接配置內部的 Text）
+        for tag, style in LOG_TAG_STYLES.items():
+            self.log_text._textbox.tag_configure(tag, **style)
+        self.log_text.configure(state="disabled")
         
         # 初始日誌消息
         self.log("歡迎使用狼人殺 LLM 游戲！", "header")
@@ -124,100 +180,124 @@ class LogPanel(ctk.CTkFrame):
         # 默認隱藏
         self.human_input_frame.pack_forget()
     
-    def log(self, message: str, tag: str = "info"):
-        """添加日誌消息
+    def log(self, message: str, tag: str = "info", **meta):
+        """添加日誌消息（記錄立即寫入模型，文本框在下一幀批量更新）
         
         Args:
             message (str): 日誌消息
             tag (str, optional): 消息類型標籤. 默認為 "info"
+            **meta: 記錄的其他字段（event_type, player_id, day, phase）
         """
-        # 設置不同標籤對應的文本顏色
-        tag_colors = {
-            "header": COLORS["primary"],
-            "info": COLORS["text"],
-            "warning": COLORS["warning"],
-            "error": COLORS["error"],
-            "success": COLORS["success"],
-            "player": "#663399",  # 紫色
-            "werewolf": COLORS["werewolf"],
-            "villager": COLORS["villager"],
-            "night": COLORS["night"],
-            "day": COLORS["day"]
-        }
-        
-        # 設置不同標籤對應的文本字體
-        tag_fonts = {
-            "header": ("Arial", 12, "bold"),
-            "night": ("Arial", 11, "bold"),
-            "day": ("Arial", 11, "bold")
-        }
-        
-        # 獲取顏色和字體
-        color = tag_colors.get(tag, COLORS["text"])
-        font = tag_fonts.get(tag, None)
+        self._pending.append(self.model.append(message, tag if tag in LOG_TAG_STYLES else "info", **meta))
         
-        # 插入文本
-        self.log_text.configure(state="normal")
+        player_id = meta.get("player_id")
+        if player_id is not None and player_id not in self._known_players:
+            self._known_players.add(player_id)
+            self.player_filter_menu.configure(
+                values=["全部玩家"] + [f"玩家{pid}" for pid in sorted(self._known_players)]
+            )
         
-        # 設置字體和顏色
-        if font:
-            current_font = self.log_text.cget("font")
-            self.log_text.configure(font=font)
+        if self._flush_job is None:
+            self._flush_job = self.after(self.frame_interval, self._flush_pending)
+    
+    def _flush_pending(self):
+        """把本幀累積的記錄一次性插入文本框，並裁剪超出上限的舊行"""
+        self._flush_job = None
+        records, self._pending = self._pending[-self.max_visible_lines:], []
+        if self._filter is not None:
+            # 過濾狀態下只追加符合條件的新記錄
+            records = [record for record in records if self.model.matches(record, **self._filter)]
+            if records:
+                self._match_count += len(records)
+                self.match_count_var.set(f"匹配 {self._match_count} 條")
+        if not records:
+            return
         
-        self.log_text.insert("end", message + "\n", {"text_color": color})
+        # 只有在用戶停留在底部時才自動滾動，避免打斷向上翻閱
+        follow = self.log_text.yview()[1] >= 0.999
         
-        # 恢復默認字體
-        if font:
-            self.log_text.configure(font=current_font)
+        chunks = []
+        for record in records:
+            chunks.extend((record.text + "\n", record.tag))
         
-        self.log_text.see("end")
+        self.log_text.configure(state="normal")
+        self.log_text._textbox.insert("end", *chunks)
+        self._trim_view()
         self.log_text.configure(state="disabled")
+        
+        if follow:
+            self.log_text.see("end")
     
-    def _clear_log(self):
-        """清空日誌區"""
+    def _trim_view(self):
+        """刪除超出行數上限的最舊文本（完整記錄仍在模型中）"""
+        line_count = int(self.log_text.index("end-1c").split(".")[0])
+        excess = line_count - self.max_visible_lines
+        if excess > 0:
+            self.log_text.delete("1.0", f"{excess + 1}.0")
+    
+    def _render(self, records):
+        """用指定的記錄重新渲染文本框
+        
+        Args:
+            records (List[LogRecord]): 要顯示的記錄
+        """
+        # 等待中的記錄已經在模型中，由本次渲染一併處理
+        self._pending = []
+        chunks = []
+        for record in records[-self.max_visible_lines:]:
+            chunks.extend((record.text + "\n", record.tag))
+        
         self.log_text.configure(state="normal")
         self.log_text.delete("1.0", "end")
+        if chunks:
+            self.log_text._textbox.insert("end", *chunks)
+            self._trim_view()
         self.log_text.configure(state="disabled")
+        self.log_text.see("end")
+    
+    def reset(self):
+        """清空日誌區、日誌模型和玩家過濾選項（不顯示提示，例如播放跳轉時重新渲染之前）"""
+        self.model.clear()
+        self._known_players = set()
+        self.player_filter_menu.configure(values=["全部玩家"])
+        self._render([])
+    
+    def _clear_log(self):
+        """清空日誌區和日誌模型"""
+        self.reset()
         self.log("日誌已清空", "info")
     
     def _filter_log(self, event=None):
-        """根據搜索條件過濾日誌"""
-        search_text = self.search_var.get().lower()
-        if not search_text:
-            # 如果沒有搜索文字，顯示所有內容
-            # 這個功能在CTkTextbox中比較難實現，需要保存原始日誌
-            # 簡化版本：僅清空並顯示已過濾的消息
-            self._clear_log()
-            self.log("搜索已清空，請重新開始游戲查看完整日誌", "info")
-            return
-            
-        # 獲取所有文本
-        self.log_text.configure(state="normal")
-        all_text = self.log_text.get("1.0", "end")
-        self.log_text.delete("1.0", "end")
-        
-        # 按行過濾並添加匹配的行
-        for line in all_text.split('\n'):
-            if search_text in line.lower():
-                # 保持原來的標籤（這需要更複雜的實現）
-                self.log_text.insert("end", line + '\n', {"text_color": COLORS["text"]})
-                
-        self.log_text.configure(state="disabled")
+        """搜索框或過濾條件改變時，稍後（合併連續輸入）重新過濾"""
+        if self._filter_job is not None:
+            self.after_cancel(self._filter_job)
+        self._filter_job = self.after(80, self._apply_filter)
     
-    def show_human_input(self, prompt: str, system_message: Optional[str] = None):
-        """顯示人類玩家輸入區並等待回應
+    def _apply_filter(self):
+        """按搜索文本和過濾條件從日誌模型中重新渲染（不修改模型中的記錄）"""
+        self._filter_job = None
+        player = self.player_filter_var.get()
+        criteria = {
+            "query": self.search_var.get().strip(),
+            "player_id": int(player[2:]) if player.startswith("玩家") else None,
+            "phase": self._phase_options.get(self.phase_filter_var.get()),
+            "event_type": self._type_options.get(self.type_filter_var.get())
+        }
         
-        Args:
-            prompt (str): 提示信息
-            system_message (Optional[str], optional): 系統消息
-        """
-        # 顯示提示
-        self.log("\n=== 你的回合 ===", "header")
-        if system_message:
-            self.log(f"【角色指引】{system_message}", "info")
-        self.log(f"\n{prompt}\n", "info")
+        if not criteria["query"] and all(value is None for key, value in criteria.items() if key != "query"):
+            self._filter = None
+            self.match_count_var.set("")
+            self._render(self.model.tail(self.max_visible_lines))
+            return
         
-        # 顯示輸入框
+        self._filter = criteria
+        results = self.model.search(**criteria)
+        self._match_count = len(results)
+        self.match_count_var.set(f"匹配 {self._match_count} 條")
+        self._render(results)
+    
+    def show_human_input(self):
+        """顯示人類玩家輸入區並等待回應（提示文本由會話面板放入播放時間線）"""
         self.human_input_frame.pack(fill="x", padx=10, pady=10)
         self.human_input_text.focus_set()
     
@@ -229,41 +309,22 @@ class LogPanel(ctk.CTkFrame):
             messagebox.showwarning("提示", "請輸入回應")
             return
         
-        # 記錄到日誌
-        self.log("\n你的回應：", "header")
-        self.log(response, "player")
-        
-        # 清空輸入區
+        # 清空並隱藏輸入區
         self.human_input_text.delete("1.0", "end")
-        
-        # 隱藏輸入框
         self.human_input_frame.pack_forget()
         
-        # 設置回應並觸發事件
-        if hasattr(self, 'current_response_event') and self.current_response_event:
-            self.current_response = response
-            # 在UI線程中調用asyncio的事件方法必須小心
-            # 我們將其放入一個線程中執行
-            threading.Thread(target=self._set_response_event).start()
+        # 把回應交給遊戲引擎（由回調記錄到日誌）
+        if self.on_response:
+            self.on_response(response)
     
-    def _set_response_event(self):
-        """設置回應事件（在單獨線程中執行）"""
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        loop.run_until_complete(self._set_event())
-        loop.close()
-    
-    async def _set_event(self):
-        """設置回應事件"""
-        if hasattr(self, 'current_response_event') and self.current_response_event:
-            self.current_response_event.set()
+    def hide_human_input(self):
+        """隱藏人類玩家輸入區（例如本回合已超時）"""
+        self.human_input_frame.pack_forget()
     
-    def set_event_and_wait(self, event, response):
-        """設置事件和響應
+    def set_on_response(self, callback: Optional[Callable[[str], None]]):
+        """設置提交人類玩家回應時的回調
         
         Args:
-            event (asyncio.Event): 事件對象
-            response (str): 響應文本
+            callback (Optional[Callable[[str], None]]): 接收回應文本的回調
         """
-        self.current_response_event = event
-        self.current_response = response
+        self.on_response = callback
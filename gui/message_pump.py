@@ -0,0 +1,182 @@
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+# 只保留最新值的消息類型：同一輪處理中多條狀態更新合併為一次
+COALESCED_TYPES = ("STATUS", "UPDATE_STATUS")
+
+
+class MessagePump:
+    """從遊戲線程到 UI 線程的消息泵
+
+    遊戲線程 put 消息後立即通過 Tk 虛擬事件喚醒 UI 線程（每批只喚醒一次），不需要定時輪詢。
+    UI 線程每一輪只處理不超過時間預算的消息，剩餘的消息在下一輪處理，中間讓 Tk 有機會重繪和
+    響應輸入；同一輪中相鄰的 STATUS / UPDATE_STATUS 合併為最終狀態（遇到其他消息前先應用，
+    因此不會覆蓋之後的消息設置的狀態）。另外保留一個低頻的兜底輪詢，防止喚醒事件丟失。
+    """
+
+    WAKEUP_EVENT = "<<MessagePumpWakeup>>"
+
+    def __init__(self, widget, handler: Callable[[tuple], None], frame_budget: float = 0.008,
+                 fallback_interval: int = 250, on_stats: Optional[Callable[[Dict[str, Any]], None]] = None):
+        """初始化
+
+        Args:
+            widget: Tk 根窗口，用於綁定喚醒事件和調度
+            handler (Callable[[tuple], None]): 處理單條消息的回調（在 UI 線程中調用）
+            frame_budget (float, optional): 每輪處理的時間預算（秒）。默認為 0.008
+            fallback_interval (int, optional): 兜底輪詢間隔（毫秒）。默認為 250
+            on_stats (Optional[Callable[[Dict[str, Any]], None]], optional): 隊列統計變化時的回調。默認為 None
+        """
+        self.widget = widget
+        self.handler = handler
+        self.frame_budget = frame_budget
+        self.fallback_interval = fallback_interval
+        self.on_stats = on_stats
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._wakeup_pending = False  # 是否已有喚醒或續處理在等待
+        self.processed = 0  # 已處理的消息數
+        self.coalesced = 0  # 被合併掉的狀態消息數
+        self.max_depth = 0  # 觀察到的最大隊列深度
+        self.last_lag = 0.0  # 最近一條消息從 put 到處理的延遲（秒）
+        self._last_reported = None
+        self._poll_job = None
+        self._stopped = False
+
+    def start(self):
+        """綁定喚醒事件並啟動兜底輪詢（在 UI 線程中調用）"""
+        self.widget.bind(self.WAKEUP_EVENT, lambda event: self._drain())
+        self._poll_job = self.widget.after(self.fallback_interval, self._fallback_poll)
+
+    def stop(self):
+        """停止處理消息（例如所屬的分頁關閉時，在 UI 線程中調用），之後放入的消息被丟棄"""
+        self._stopped = True
+        if self._poll_job is not None:
+            self.widget.after_cancel(self._poll_job)
+            self._poll_job = None
+
+    def put(self, message: tuple):
+        """放入一條消息（任意線程可調用）
+
+        Args:
+            message (tuple): 消息元組 (msg_type, content, ...)
+        """
+        if self._stopped:
+            return
+        self._queue.put((time.perf_counter(), message))
+        with self._lock:
+            if self._wakeup_pending:
+                return
+            self._wakeup_pending = True
+        try:
+            # 線程安全的 Tcl 會把事件轉交 UI 線程；失敗時由兜底輪詢處理
+            self.widget.event_generate(self.WAKEUP_EVENT, when="tail")
+        except Exception:
+            with self._lock:
+                self._wakeup_pending = False
+
+    def qsize(self) -> int:
+        """當前隊列深度"""
+        return self._queue.qsize()
+
+    def _fallback_poll(self):
+        """低頻兜底輪詢"""
+        if not self._queue.empty():
+            self._drain()
+        self._poll_job = self.widget.after(self.fallback_interval, self._fallback_poll)
+
+    def _drain(self):
+        """在時間預算內處理消息，超出預算時讓出 UI 線程並安排下一輪"""
+        if self._stopped:
+            return
+        with self._lock:
+            self._wakeup_pending = True
+
+        deadline = time.perf_counter() + self.frame_budget
+        self.max_depth = max(self.max_depth, self._queue.qsize())
+        pending = {"status": None, "update": {}}  # 合併後尚未應用的 STATUS 文本和 UPDATE_STATUS 字段
+
+        while time.perf_counter() < deadline:
+            try:
+                posted_at, message = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            self.last_lag = time.perf_counter() - posted_at
+            if message[0] == "STATUS":
+                if pending["status"] is not None:
+                    self.coalesced += 1
+                pending["status"] = message[1]
+            elif message[0] == "UPDATE_STATUS":
+                if pending["update"]:
+                    self.coalesced += 1
+                pending["update"].update({key: value for key, value in message[1].items() if value is not None})
+            else:
+                # 先應用之前的狀態，保持與其他消息的先後順序
+                self._apply_status(pending)
+                self._handle(message)
+
+        self._apply_status(pending)
+
+        if self._queue.empty():
+            with self._lock:
+                self._wakeup_pending = False
+            # 清除標記和最後一次檢查之間放入的消息不會再觸發喚醒，這裡補查一次
+            if not self._queue.empty():
+                self._schedule_next()
+        else:
+            self._schedule_next()
+        self._report()
+
+    def _schedule_next(self):
+        """讓 Tk 先處理重繪和輸入，再繼續處理剩餘消息"""
+        with self._lock:
+            self._wakeup_pending = True
+        self.widget.after(1, self._drain)
+
+    def _apply_status(self, pending: Dict[str, Any]):
+        """應用合併後的狀態消息並清空
+
+        Args:
+            pending (Dict[str, Any]): {"status": STATUS 文本, "update": UPDATE_STATUS 字段}
+        """
+        if pending["update"]:
+            self._handle(("UPDATE_STATUS", pending["update"]))
+            pending["update"] = {}
+        if pending["status"] is not None:
+            self._handle(("STATUS", pending["status"]))
+            pending["status"] = None
+
+    def _handle(self, message: tuple):
+        """調用處理回調，單條消息出錯不影響後續消息"""
+        self.processed += 1
+        try:
+            self.handler(message)
+        except Exception:
+            logging.exception("處理消息出錯：%s", message[0])
+
+    def stats(self) -> Dict[str, Any]:
+        """獲取消息泵統計
+
+        Returns:
+            Dict[str, Any]: depth, max_depth, processed, coalesced, lag_ms
+        """
+        return {
+            "depth": self._queue.qsize(),
+            "max_depth": self.max_depth,
+            "processed": self.processed,
+            "coalesced": self.coalesced,
+            "lag_ms": round(self.last_lag * 1000)
+        }
+
+    def _report(self):
+        """隊列深度或延遲變化時通知 on_stats"""
+        if not self.on_stats:
+            return
+        stats = self.stats()
+        key = (stats["depth"], stats["lag_ms"] // 50)
+        if key != self._last_reported:
+            self._last_reported = key
+            self.on_stats(stats)
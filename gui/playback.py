@@ -0,0 +1,162 @@
+import time
+from typing import Callable, List, Optional, Tuple
+
+from game.events import PHASE_CHANGE, MESSAGE_TYPES
+
+# 播放速度：倍數，None 表示即時（不等待）
+PLAYBACK_SPEEDS = {"1×": 1.0, "4×": 4.0, "即時": None}
+
+# 1× 速度下兩條消息之間和進入新階段之前的間隔（秒），其他倍數按比例縮短
+MESSAGE_INTERVAL = 0.4
+PHASE_INTERVAL = 1.0
+
+
+class PlaybackController:
+    """按記錄的事件時間線控制顯示速度
+
+    引擎全速運行並發布帶時間戳的事件，這裡把收到的事件追加到時間線，再按選擇的速度逐條
+    交給 render 顯示：可以暫停、切換 1× / 4× / 即時，或跳到某個階段（向前跳時重新渲染到
+    該位置）。時間線保存全部事件，因此顯示落後於引擎不會丟失任何內容。
+    """
+
+    def __init__(self, widget, render: Callable, reset: Callable[[], None],
+                 on_progress: Optional[Callable[[int, int], None]] = None, speed: str = "1×"):
+        """初始化
+
+        Args:
+            widget: Tk 部件，用於調度
+            render (Callable): 顯示一個事件的回調（參數為 GameEvent）
+            reset (Callable[[], None]): 清空顯示的回調（向前跳轉時使用）
+            on_progress (Optional[Callable[[int, int], None]], optional): 已顯示數量或總數變化時的回調，
+                參數為 (已顯示的事件數, 時間線長度)。默認為 None
+            speed (str, optional): 初始速度，PLAYBACK_SPEEDS 中的鍵。默認為 "1×"
+        """
+        self.widget = widget
+        self.render = render
+        self.reset = reset
+        self.on_progress = on_progress
+        self.timeline = []  # 按到達順序的 GameEvent
+        self.position = 0  # 已顯示的事件數
+        self.phase_marks = []  # [(標籤, 時間線位置)]，每個階段開始的位置
+        self.speed = PLAYBACK_SPEEDS[speed]
+        self.paused = False
+        self._job = None
+        self._last_shown = 0.0  # 上一條事件顯示的時間（time.monotonic）
+
+    def append(self, events: List, label_for_phase: Optional[Callable] = None):
+        """把新事件追加到時間線並按當前速度繼續播放
+
+        Args:
+            events (List[GameEvent]): 事件
+            label_for_phase (Optional[Callable], optional): 把 PHASE_CHANGE 事件轉為跳轉標籤的函數。默認為 None
+        """
+        for event in events:
+            if event.type == PHASE_CHANGE:
+                label = label_for_phase(event) if label_for_phase else f"{event.data.get('day')} {event.data.get('phase')}"
+                self.phase_marks.append((label, len(self.timeline)))
+            self.timeline.append(event)
+        self._schedule()
+        self._report()
+
+    def _interval(self, event) -> float:
+        """顯示該事件之前應有的間隔（秒）"""
+        if self.speed is None:
+            return 0.0
+        if event.type == PHASE_CHANGE:
+            return PHASE_INTERVAL / self.speed
+        if event.type in MESSAGE_TYPES:
+            return MESSAGE_INTERVAL / self.speed
+        return 0.0
+
+    def _schedule(self):
+        """安排下一條事件的顯示"""
+        if self._job is not None or self.paused or self.position >= len(self.timeline):
+            return
+        if self.speed is None:
+            self._show_until(len(self.timeline))
+            return
+        wait = self._last_shown + self._interval(self.timeline[self.position]) - time.monotonic()
+        self._job = self.widget.after(max(0, int(wait * 1000)), self._step)
+
+    def _step(self):
+        self._job = None
+        if self.paused or self.position >= len(self.timeline):
+            return
+        self._show_until(self.position + 1)
+        self._schedule()
+
+    def _show_until(self, index: int):
+        """立即顯示到時間線的指定位置"""
+        while self.position < index:
+            self.render(self.timeline[self.position])
+            self.position += 1
+        self._last_shown = time.monotonic()
+        self._report()
+
+    def _cancel(self):
+        if self._job is not None:
+            self.widget.after_cancel(self._job)
+            self._job = None
+
+    def set_speed(self, speed: str):
+        """切換播放速度
+
+        Args:
+            speed (str): PLAYBACK_SPEEDS 中的鍵
+        """
+        self.speed = PLAYBACK_SPEEDS[speed]
+        self._cancel()
+        self._schedule()
+
+    def pause(self):
+        """暫停顯示（時間線照常接收事件）"""
+        self.paused = True
+        self._cancel()
+
+    def play(self):
+        """繼續顯示"""
+        self.paused = False
+        self._schedule()
+
+    def catch_up(self):
+        """立即顯示到最新的事件（例如需要人類玩家回應時）"""
+        self._cancel()
+        self._show_until(len(self.timeline))
+        self._schedule()
+
+    def seek(self, index: int):
+        """跳到時間線的指定位置：向前跳時清空並重新渲染到該位置，向後跳時立即顯示到該位置
+
+        Args:
+            index (int): 時間線位置
+        """
+        index = max(0, min(index, len(self.timeline)))
+        self._cancel()
+        if index < self.position:
+            self.reset()
+            self.position = 0
+        self._show_until(index)
+        self._schedule()
+
+    def seek_phase(self, label: str):
+        """跳到某個階段的開始
+
+        Args:
+            label (str): phase_marks 中的標籤
+        """
+        for mark, index in self.phase_marks:
+            if mark == label:
+                self.seek(index)
+                return
+
+    def phase_labels(self) -> List[str]:
+        """所有可跳轉的階段標籤"""
+        return [label for label, _ in self.phase_marks]
+
+    def progress(self) -> Tuple[int, int]:
+        """已顯示的事件數和時間線長度"""
+        return self.position, len(self.timeline)
+
+    def _report(self):
+        if self.on_progress:
+            self.on_progress(self.position, len(self.timeline))
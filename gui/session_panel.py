@@ -0,0 +1,301 @@
+import customtkinter as ctk
+from tkinter import messagebox
+from typing import Dict, Any
+
+from .game_panel import GamePanel
+from .log_panel import LogPanel
+from .message_pump import MessagePump
+from .playback import PlaybackController, PLAYBACK_SPEEDS
+from .theme import ThemeStyles
+from .constants import COLORS, PHASE_NAMES, EVENT_TAGS
+
+from game.events import GameEvent, PHASE_CHANGE, ANNOUNCE
+
+# 界面自身的日誌行（例如游戲設置和總結），與引擎事件一起放入播放時間線，但不按消息間隔等待
+UI_LOG = "ui_log"
+
+class SessionPanel(ctk.CTkFrame):
+    """一個分頁中的游戲會話：自己的狀態面板、日誌面板和消息泵
+
+    每個會話在共享的游戲引擎中運行一局游戲，只處理帶有自己會話 ID 的消息，
+    因此多局游戲可以並排運行而互不干擾。引擎事件先放入播放時間線，再按選擇的速度顯示。
+    """
+
+    def __init__(self, master, session_id: str, title: str, engine, **kwargs):
+        """初始化會話面板
+
+        Args:
+            master: 父窗口（分頁）
+            session_id (str): 會話 ID
+            title (str): 分頁標題（用於錯誤提示）
+            engine (EngineProcess): 共享的游戲引擎
+            **kwargs: 額外參數傳給父類
+        """
+        super().__init__(master, fg_color=COLORS["background"], **kwargs)
+        self.session_id = session_id
+        self.title = title
+        self.engine = engine
+        self.started = False  # 是否已經開始過游戲
+        self._turn_id = None  # 等待回應的人類玩家回合
+
+        # 游戲狀態面板
+        self.game_panel = GamePanel(self)
+        self.game_panel.pack(fill="x")
+
+        # 播放控制（引擎全速運行，這裡控制顯示速度）
+        self.playback = PlaybackController(self, self._handle_event, self._reset_display,
+                                           on_progress=self._show_progress)
+        self._create_playback_bar()
+
+        # 日誌面板，人類玩家的回應帶上本會話的 ID 發給引擎
+        self.log_panel = LogPanel(self)
+        self.log_panel.pack(fill="both", expand=True)
+        self.log_panel.set_on_response(self._send_human_response)
+
+        # 本會話的消息隊列（從引擎接收線程到UI線程）
+        self.message_queue = MessagePump(self, self._process_message, on_stats=self._show_queue_stats)
+        self.message_queue.start()
+
+    def _create_playback_bar(self):
+        """創建播放控制列：暫停/播放、速度、跳到階段和進度"""
+        bar = ctk.CTkFrame(self, fg_color="transparent")
+        bar.pack(fill="x", padx=10)
+
+        self.play_button = ctk.CTkButton(
+            bar,
+            text="⏸ 暫停",
+            command=self._toggle_pause,
+            width=90,
+            height=30,
+            **ThemeStyles.small_button()
+        )
+        self.play_button.pack(side="left")
+
+        self.speed_var = ctk.StringVar(value="1×")
+        ctk.CTkSegmentedButton(
+            bar, values=list(PLAYBACK_SPEEDS), variable=self.speed_var,
+            command=self.playback.set_speed
+        ).pack(side="left", padx=10)
+
+        self.phase_jump_var = ctk.StringVar(value="跳到階段")
+        self.phase_jump_menu = ctk.CTkOptionMenu(
+            bar, variable=self.phase_jump_var, values=["跳到階段"],
+            width=150, command=self._jump_to_phase
+        )
+        self.phase_jump_menu.pack(side="left")
+
+        self.progress_var = ctk.StringVar(value="")
+        ctk.CTkLabel(bar, textvariable=self.progress_var).pack(side="right")
+        self._phase_count = 0  # 跳轉選單中的階段數
+
+    def _toggle_pause(self):
+        """暫停或繼續播放"""
+        if self.playback.paused:
+            self.playback.play()
+            self.play_button.configure(text="⏸ 暫停")
+        else:
+            self.playback.pause()
+            self.play_button.configure(text="▶ 播放")
+
+    def _jump_to_phase(self, label):
+        """跳到選擇的階段
+
+        Args:
+            label (str): 階段標籤
+        """
+        self.playback.seek_phase(label)
+        self.phase_jump_var.set("跳到階段")
+
+    def _show_progress(self, shown, total):
+        """顯示播放進度，有新階段時更新跳轉選單
+
+        Args:
+            shown (int): 已顯示的事件數
+            total (int): 時間線中的事件數
+        """
+        self.progress_var.set(f"已顯示 {shown} / {total}" if shown < total else "已顯示全部")
+        labels = self.playback.phase_labels()
+        if len(labels) != self._phase_count:
+            self._phase_count = len(labels)
+            self.phase_jump_menu.configure(values=labels)
+
+    @staticmethod
+    def _phase_label(event):
+        """階段開始事件在跳轉選單中的標籤"""
+        return f"第{event.data['day']}天 {PHASE_NAMES.get(event.data['phase'], event.data['phase'])}"
+
+    def _reset_display(self):
+        """清空顯示（向前跳轉時由播放控制器重新渲染）"""
+        self.log_panel.reset()
+        self.game_panel.reset_status()
+
+    def log(self, message, tag="info"):
+        """添加界面自身的日誌行（與引擎事件一起按時間線順序顯示）
+
+        Args:
+            message (str): 日誌消息
+            tag (str, optional): 消息類型標籤。默認為 "info"
+        """
+        self.playback.append([GameEvent(UI_LOG, message, {"tag": tag})])
+
+    def put(self, message):
+        """放入一條引擎消息（任意線程可調用）
+
+        Args:
+            message (tuple): 消息元組，格式為 (msg_type, content, ...)
+        """
+        self.message_queue.put(message)
+
+    def start(self, command: Dict[str, Any]):
+        """在引擎中開始本會話的游戲
+
+        Args:
+            command (Dict[str, Any]): 游戲命令，見 EngineProcess.start_game
+        """
+        self.started = True
+        self.engine.start_game(self.session_id, command)
+
+    def is_running(self) -> bool:
+        """本會話的游戲是否仍在運行"""
+        return self.engine.is_running(self.session_id)
+
+    def close(self):
+        """停止本會話的游戲並停止處理消息"""
+        self.engine.stop_game(self.session_id)
+        self.message_queue.stop()
+
+    def _send_human_response(self, text):
+        """把人類玩家的回應記錄到播放時間線，並連同回合編號發給引擎
+
+        Args:
+            text (str): 回應
+        """
+        self.log("\n你的回應：", "header")
+        self.log(text, "player")
+        self.playback.catch_up()
+        self.engine.send_human_response(self.session_id, text, self._turn_id)
+
+    def _show_queue_stats(self, stats):
+        """在狀態面板顯示消息隊列深度和延遲
+
+        Args:
+            stats (Dict[str, Any]): MessagePump.stats() 的結果
+        """
+        self.game_panel.update_queue_stats(stats["depth"], stats["lag_ms"])
+
+    def _process_message(self, message):
+        """處理來自游戲引擎的消息
+
+        Args:
+            message (tuple): 消息元組，格式為 (msg_type, content, ...)
+        """
+        msg_type = message[0]
+
+        if msg_type == "EVENTS":
+            # 引擎事件（每個事件循環 tick 一批），放入時間線按播放速度顯示
+            self.playback.append(message[1], self._phase_label)
+
+        elif msg_type == "LOG":
+            # 日誌消息
+            content = message[1]
+            tag = message[2] if len(message) > 2 else "info"
+            self.log(content, tag)
+
+        elif msg_type == "ERROR":
+            # 錯誤消息
+            content = message[1]
+            self.log(f"錯誤：{content}", "error")
+            self.playback.catch_up()
+            messagebox.showerror(f"錯誤 - {self.title}", content)
+
+        elif msg_type == "STATUS":
+            # 狀態更新
+            status = message[1]
+            self.game_panel.update_status(status=status)
+
+        elif msg_type == "UPDATE_STATUS":
+            # 游戲狀態面板更新
+            status_data = message[1]
+            self.game_panel.update_status(
+                day=status_data.get("day"),
+                phase=status_data.get("phase"),
+                alive=status_data.get("alive"),
+                status=status_data.get("status")
+            )
+
+        elif msg_type == "SUMMARY":
+            # 游戲結束總結
+            self._show_summary(message[1], message[2] if len(message) > 2 else None)
+
+        elif msg_type == "HUMAN_PROMPT":
+            # 人類玩家提示
+            prompt = message[1]
+            system_message = message[2] if len(message) > 2 else None
+            self._turn_id = message[3] if len(message) > 3 else None
+            timeout = message[4] if len(message) > 4 else None
+            player_name = message[5] if len(message) > 5 else None
+
+            # 提示放入播放時間線（向前跳轉後重新渲染時仍然保留），快進到最新的事件後顯示輸入框
+            # （引擎讓同一局的人類座位輪流回應，同一時間只有一個提示）
+            self.log(f"\n=== {player_name or '你'}的回合 ===", "header")
+            if system_message:
+                self.log(f"【角色指引】{system_message}", "info")
+            self.log(f"\n{prompt}\n", "info")
+            if timeout:
+                self.log(f"請在 {timeout:g} 秒內回應，超時將自動行動", "warning")
+            self.playback.catch_up()
+            self.log_panel.show_human_input()
+
+        elif msg_type == "HUMAN_TIMEOUT":
+            # 人類玩家回合超時，引擎已代為行動
+            if message[1] == self._turn_id:
+                self.log_panel.hide_human_input()
+                self.log(f"回應超時，已自動行動：{message[2] or '無'}", "warning")
+                self.playback.catch_up()
+
+    def _handle_event(self, event):
+        """在UI線程中顯示一個引擎事件
+
+        Args:
+            event (GameEvent): 引擎事件
+        """
+        if event.type == PHASE_CHANGE:
+            data = event.data
+            self.game_panel.update_status(
+                day=f"Day {data['day']}",
+                phase=PHASE_NAMES.get(data["phase"], data["phase"]),
+                alive=f"狼人: {data['alive_werewolves']} | 村民: {data['alive_villagers']}"
+            )
+            return
+
+        if event.type == UI_LOG:
+            self.log_panel.log(event.message, event.data["tag"])
+            return
+
+        if event.message is not None:
+            tag = event.data.get("tag", "info") if event.type == ANNOUNCE else EVENT_TAGS.get(event.type, "info")
+            self.log_panel.log(event.message, tag, event_type=event.type, player_id=event.data.get("player_id"),
+                               day=event.data.get("day"), phase=event.data.get("phase"))
+
+    def _show_summary(self, summary, result_path=None):
+        """顯示游戲總結
+
+        Args:
+            summary (Dict[str, Any]): GameManager.get_game_summary() 的結果
+            result_path (str, optional): 結果文件路徑
+        """
+        self.game_panel.update_status(status="游戲狀態: 游戲結束")
+        self.log("\n===== 游戲總結 =====", "header")
+        self.log(f"游戲天數：{summary['day']}", "info")
+        self.log(f"游戲狀態：{'已結束' if summary['game_over'] else '進行中'}", "info")
+        self.log(f"獲勝者：{summary['winner'] or '無'}", "success")
+        self.log(f"存活狼人：{summary['alive_werewolves']}，存活村民：{summary['alive_villagers']}", "info")
+
+        self.log("\n玩家狀態：", "header")
+        for player in summary["players"]:
+            status = "存活" if player["is_alive"] else "死亡"
+            self.log(f"玩家{player['player_id']}（{player['name']}）- {player['role']} - {status} - 使用模型：{player['model']}", "player")
+
+        # 游戲結果（含摘要）已由 GameManager 在後台寫入統一的結果文件
+        if result_path:
+            self.log(f"\n游戲結果已保存到：{result_path}", "info")
@@ -1,12 +1,13 @@
 import customtkinter as ctk
-from PIL import Image, ImageTk
 import os
 from tkinter import messagebox
-from typing import Dict, Callable, List, Any
+from typing import Dict, Callable, List, Any, Optional
 
 from .constants import AVAILABLE_MODELS, AVAILABLE_ROLES, ROLE_ICONS, COLORS
 from .theme import ThemeStyles
 
+from api import available_providers
+
 class SettingsPanel(ctk.CTkFrame):
     """設置面板，包含游戲配置，角色選擇和API設置"""
     
@@ -28,12 +29,14 @@ class SettingsPanel(ctk.CTkFrame):
         self.api_type_var = ctk.StringVar(value="mixed")
         self.model_name_var = ctk.StringVar(value="")
         self.human_players_var = ctk.StringVar(value="")
+        self.bot_players_var = ctk.StringVar(value="")
         
         # 保存角色選擇框引用的列表
         self.role_checkboxes = []
         
-        # 嘗試載入角色圖標
-        self.icons = self._load_icons()
+        # 角色圖標在角色選擇區第一次顯示時才載入（PIL 也在那時導入）
+        self.icons = {}  # {role: 圖標，None 表示沒有圖標}
+        self._icons_shown = False
         
         # 創建界面元素
         self._create_game_settings()
@@ -45,25 +48,37 @@ class SettingsPanel(ctk.CTkFrame):
         self.on_start_game = None
         self.on_load_game = None
     
-    def _load_icons(self) -> Dict[str, ImageTk.PhotoImage]:
-        """載入角色圖標
+    def _get_icon(self, role: str) -> Optional[ctk.CTkImage]:
+        """載入角色圖標（結果緩存）
+        
+        Args:
+            role (str): 角色名稱
         
         Returns:
-            Dict[str, ImageTk.PhotoImage]: 角色圖標字典
+            Optional[ctk.CTkImage]: 角色圖標，圖標文件不存在或未安裝 PIL 時為 None
         """
-        icons = {}
-        
-        # 載入角色圖標 (假設圖標存在於指定路徑)
-        icons_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "icons")
-        if os.path.exists(icons_dir):
-            for role, path in ROLE_ICONS.items():
-                full_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), path)
-                if os.path.exists(full_path):
-                    img = Image.open(full_path)
-                    img = img.resize((24, 24), Image.LANCZOS)  # 調整大小
-                    icons[role] = ImageTk.PhotoImage(img)
-        
-        return icons
+        if role not in self.icons:
+            self.icons[role] = None
+            path = ROLE_ICONS.get(role)
+            full_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), path) if path else None
+            if full_path and os.path.exists(full_path):
+                try:
+                    from PIL import Image
+                except ImportError:
+                    return None
+                self.icons[role] = ctk.CTkImage(Image.open(full_path), size=(24, 24))
+        return self.icons[role]
+    
+    def _show_role_icons(self, event=None):
+        """角色選擇區第一次顯示時在每個選擇框前加上角色圖標"""
+        if self._icons_shown:
+            return
+        self._icons_shown = True
+        
+        for cb in self.role_checkboxes:
+            icon = self._get_icon(cb.cget("text"))
+            if icon is not None:
+                ctk.CTkLabel(cb.master, image=icon, text="").pack(side="left", padx=(0, 2), before=cb)
     
     def _create_game_settings(self):
         """創建游戲設置區域"""
@@ -188,12 +203,6 @@ class SettingsPanel(ctk.CTkFrame):
             role_frame = ctk.CTkFrame(roles_grid, fg_color="transparent")
             role_frame.grid(row=row, column=col, sticky="w", padx=5, pady=3)
             
-            # 如果有圖標則使用
-            if role in self.icons:
-                # 在CustomTkinter中，我們需要使用CTkImage
-                role_img = ctk.CTkLabel(role_frame, image=self.icons[role], text="")
-                role_img.pack(side="left", padx=(0, 2))
-            
             cb = ctk.CTkCheckBox(
                 role_frame, 
                 text=role, 
@@ -203,6 +212,9 @@ class SettingsPanel(ctk.CTkFrame):
             cb.pack(side="left")
             self.role_checkboxes.append(cb)
         
+        # 圖標等到角色選擇區真正顯示時再載入
+        roles_grid.bind("<Map>", self._show_role_icons, add="+")
+        
         # 角色選擇按鈕
         buttons_frame = ctk.CTkFrame(roles_frame, fg_color="transparent")
         buttons_frame.pack(fill="x", padx=10, pady=(5, 10))
@@ -256,7 +268,8 @@ class SettingsPanel(ctk.CTkFrame):
             font=("Arial", 12, "bold")
         ).pack(side="left")
         
-        api_values = ["mixed", "openai", "anthropic"]
+        # 只列出已安裝 SDK 的提供者
+        api_values = ["mixed"] + available_providers()
         api_type_combo = ctk.CTkOptionMenu(
             api_type_frame, 
             variable=self.api_type_var, 
@@ -301,6 +314,22 @@ class SettingsPanel(ctk.CTkFrame):
             width=150
         ).pack(side="right")
         
+        # 機器人玩家（不調用 API）
+        bot_frame = ctk.CTkFrame(api_frame, fg_color="transparent")
+        bot_frame.pack(fill="x", padx=10, pady=5)
+        
+        ctk.CTkLabel(
+            bot_frame, 
+            text="機器人玩家:",
+            font=("Arial", 12, "bold")
+        ).pack(side="left")
+        
+        ctk.CTkEntry(
+            bot_frame, 
+            textvariable=self.bot_players_var,
+            width=150
+        ).pack(side="right")
+        
         # 格式提示
         ctk.CTkLabel(
             api_frame, 
@@ -398,6 +427,22 @@ class SettingsPanel(ctk.CTkFrame):
                 messagebox.showerror("參數錯誤", "人類玩家ID格式無效")
                 return
         
+        # 解析機器人玩家ID
+        bot_players = []
+        if self.bot_players_var.get():
+            try:
+                bot_players = [int(pid.strip()) for pid in self.bot_players_var.get().split(",")]
+                for pid in bot_players:
+                    if pid < 1 or pid > player_count:
+                        messagebox.showerror("參數錯誤", f"玩家ID {pid} 超出範圍（1-{player_count}）")
+                        return
+                    if pid in human_players:
+                        messagebox.showerror("參數錯誤", f"玩家ID {pid} 不能同時是人類玩家和機器人玩家")
+                        return
+            except ValueError:
+                messagebox.showerror("參數錯誤", "機器人玩家ID格式無效")
+                return
+        
         # 解析API設置
         api_type = None
         model_name = None
@@ -422,7 +467,8 @@ class SettingsPanel(ctk.CTkFrame):
                 human_players=human_players,
                 api_type=api_type,
                 model_name=model_name,
-                max_days=self.max_days_var.get()
+                max_days=self.max_days_var.get(),
+                bot_players=bot_players
             )
     
     def _load_game(self):
@@ -462,6 +508,14 @@ class SettingsPanel(ctk.CTkFrame):
             except ValueError:
                 pass
         
+        # 解析機器人玩家ID
+        bot_players = []
+        if self.bot_players_var.get():
+            try:
+                bot_players = [int(pid.strip()) for pid in self.bot_players_var.get().split(",")]
+            except ValueError:
+                pass
+        
         # 解析API設置
         api_type = None
         model_name = None
@@ -474,6 +528,7 @@ class SettingsPanel(ctk.CTkFrame):
             "werewolf_count": self.werewolf_count_var.get(),
             "special_roles": special_roles,
             "human_players": human_players,
+            "bot_players": bot_players,
             "api_type": api_type,
             "model_name": model_name,
             "max_days": self.max_days_var.get()
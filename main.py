@@ -1,4 +1,5 @@
 """狼人殺 LLM 游戲主程序"""
+import importlib.util
 import os
 import sys
 
@@ -15,14 +16,12 @@ def main():
             sys.path.insert(0, current_dir)
             logging.info(f"已將 {current_dir} 添加到 Python 路徑")
         
-        # 導入必要模塊
-        try:
-            import customtkinter
-            from PIL import Image, ImageTk
-            logging.info("必要的模塊導入成功")
-        except ImportError as e:
-            print(f"錯誤: 缺少必要的依賴項。請執行 'pip install customtkinter pillow'\n詳細信息: {e}")
+        # 檢查必要模塊（只查找不導入，真正的導入由界面模塊在需要時進行；PIL 只用於角色圖標，可選）
+        missing = [name for name in ("customtkinter",) if importlib.util.find_spec(name) is None]
+        if missing:
+            print(f"錯誤: 缺少必要的依賴項。請執行 'pip install customtkinter pillow'\n詳細信息: 找不到 {', '.join(missing)}")
             return 1
+        logging.info("必要的模塊已安裝")
         
         # 導入應用程序
         try:
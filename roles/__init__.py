@@ -1,6 +1,15 @@
 from .base_role import BaseRole
+from .registry import ROLE_REGISTRY, register_role, get_role_class, create_role
 from .villager import Villager
 from .werewolf import Werewolf
 from .seer import Seer
+from .witch import Witch
+from .hunter import Hunter
+from .guard import Guard
+from .fool import Fool
+from .elder import Elder
+from .wolfkiller import WolfKiller
+from .medium import Medium
+from .magician import Magician
 
-# 可以添加更多特殊角色，如女巫、獵人等
+# 新角色只需用 register_role 註冊並在此導入
@@ -1,8 +1,21 @@
+import copy
+import random
+import re
 from abc import ABC, abstractmethod
 
+from utils.context_budget import ContextBudgeter, estimate_tokens
+from utils.shared_log import SharedLog
+
 class BaseRole(ABC):
     """所有遊戲角色的基本類別"""
     
+    role_key = None  # 角色代號，由 register_role 設置
+    night_step = None  # 夜間行動步驟名稱，None 表示夜間沒有行動
+    night_after = ()  # 需要在這些夜間步驟的結果產生之後才能行動
+    night_info = ()  # 行動時可以看到的夜間信息，例如 ("attack_target",)
+    sees_werewolves = False  # 是否知道所有狼人的身份
+    state_fields = ()  # 需要隨存檔保存的角色私有狀態屬性
+    
     def __init__(self, player_id, name=None):
         """初始化角色
         
@@ -16,6 +29,7 @@ class BaseRole(ABC):
         self.role_name = "未知"  # 將由子類覆蓋
         self.team = "未知"  # 將由子類覆蓋（村民陣營或狼人陣營）
         self.game_history = []  # 記錄游戲歷史
+        self.rng = random.Random()  # 隨機回退使用的生成器，由 GameState 按遊戲種子在每個階段重新播種
     
     def add_history(self, event):
         """添加事件到遊戲歷史記錄
@@ -25,6 +39,118 @@ class BaseRole(ABC):
         """
         self.game_history.append(event)
     
+    def to_dict(self):
+        """轉換為可序列化的字典，包含角色的私有狀態
+        
+        Returns:
+            dict: 角色數據
+        """
+        return {
+            "role": self.role_key,
+            "player_id": self.player_id,
+            "name": self.name,
+            "is_alive": self.is_alive,
+            "game_history": list(self.game_history),
+            "state": {field: getattr(self, field) for field in self.state_fields}
+        }
+    
+    def restore_state(self, data):
+        """從 to_dict 的結果恢復角色的私有狀態
+        
+        Args:
+            data (dict): 角色數據
+        """
+        self.is_alive = data.get("is_alive", True)
+        self.game_history = list(data.get("game_history", []))
+        for field, value in data.get("state", {}).items():
+            if field in self.state_fields:
+                setattr(self, field, value)
+    
+    def fork(self):
+        """創建用於分支遊戲的副本：歷史記錄與原角色共享前綴，私有狀態獨立複製
+        
+        Returns:
+            BaseRole: 角色副本
+        """
+        clone = copy.copy(self)
+        clone.game_history = SharedLog.fork(self.game_history)
+        for field in self.state_fields:
+            setattr(clone, field, copy.deepcopy(getattr(self, field)))
+        clone.rng = random.Random()
+        clone.rng.setstate(self.rng.getstate())
+        return clone
+    
+    def setup_knowledge(self, players):
+        """遊戲設置完成後獲取角色初始知識（例如狼人隊友），默認沒有
+        
+        Args:
+            players (list): 所有玩家信息（包含真實角色）
+        """
+        pass
+    
+    def before_death(self, cause):
+        """即將死亡時調用，返回 False 可以免於這次死亡（例如長老、白痴）
+        
+        Args:
+            cause (str): 死因（"night", "poison", "wolfkiller", "shot" 或 "exile"）
+            
+        Returns:
+            bool: 是否死亡
+        """
+        return True
+    
+    def observe_exile(self, player_id, role):
+        """有玩家被放逐時調用（通靈師可以得知其真實身份），默認不處理
+        
+        Args:
+            player_id (int): 被放逐的玩家 ID
+            role (str): 被放逐玩家的角色代號
+        """
+        pass
+    
+    async def death_action(self, game_state, api_handler, cause):
+        """死亡時觸發的行動（例如獵人開槍），默認沒有
+        
+        Args:
+            game_state (dict): 當前遊戲狀態
+            api_handler: API 處理程序
+            cause (str): 死因
+            
+        Returns:
+            Optional[dict]: 行動結果，沒有行動時為 None
+        """
+        return None
+    
+    def _parse_target(self, response, valid_ids):
+        """從回應中解析第一個有效的玩家 ID
+        
+        Args:
+            response (str): LLM 回應
+            valid_ids (list): 有效的玩家 ID 列表
+            
+        Returns:
+            Optional[int]: 玩家 ID，沒有有效 ID 時為 None
+        """
+        for match in re.findall(r'玩家(\d+)', response or ""):
+            if int(match) in valid_ids:
+                return int(match)
+        return None
+    
+    def _choose_target(self, response, valid_ids):
+        """解析回應中的目標，沒有有效目標時隨機選擇一個
+        
+        Args:
+            response (str): LLM 回應
+            valid_ids (list): 有效的玩家 ID 列表
+            
+        Returns:
+            Optional[int]: 玩家 ID，沒有可選目標時為 None
+        """
+        target_id = self._parse_target(response, valid_ids)
+        if target_id is None and valid_ids:
+            target_id = self.rng.choice(valid_ids)
+        return target_id
+    
     def get_status(self):
         """獲取角色狀態
         
@@ -81,57 +207,120 @@ class BaseRole(ABC):
             return None
         
         # 構建投票提示
-        prompt = self._build_vote_prompt(game_state, alive_players)
+        prompt = self._build_vote_prompt(game_state, alive_players, api_handler)
         
         # 使用 API 獲取決策
         system_message = f"你是一名狼人殺遊戲中的{self.role_name}角色，名字是{self.name}。請根據遊戲情況做出投票決策。"
         response = await api_handler.get_response(prompt, system_message)
         
-        # 解析響應以獲取投票的玩家 ID
-        try:
-            # 嘗試找到數字ID引用
-            import re
-            vote_ids = re.findall(r'玩家(\d+)', response)
-            if vote_ids:
-                vote_id = int(vote_ids[0])
-                # 確保是有效的存活玩家
-                if any(p["player_id"] == vote_id and p["is_alive"] for p in game_state["players"]):
-                    return vote_id
+        # 解析響應以獲取投票的玩家 ID，沒有找到有效的ID時隨機選擇一個
+        return self._choose_target(response, [p["player_id"] for p in alive_players])
+    
+    def _build_context_section(self, game_state, api_handler=None, reserved_text="",
+                               include_discussions=True, max_output_tokens=500):
+        """在模型的 token 預算內構建公開信息表、遊戲歷史和今天討論的提示段落
+        
+        Args:
+            game_state (dict): 當前遊戲狀態
+            api_handler: API 處理程序，用於確定模型的預算配置。默認為 None
+            reserved_text (str, optional): 提示中的固定部分，用於扣除預算。默認為 ""
+            include_discussions (bool, optional): 是否包含今天的討論。默認為 True
+            max_output_tokens (int, optional): 預留給回應的 token 數。默認為 500
+            
+        Returns:
+            str: 上下文提示段落
+        """
+        budgeter = ContextBudgeter.for_handler(api_handler)
+        discussions = game_state["current_discussions"] if include_discussions else []
+        
+        # 公開信息表已包含舊發言中的身份聲明和指控，有表格時不再放入舊發言原文
+        facts_table = game_state.get("public_facts")
+        section = ""
+        skip_kinds = ()
+        if facts_table:
+            section += f"\n公開信息表（D=天數，→=投票目標，數字為玩家ID）：\n{facts_table}\n"
+            skip_kinds = ("speech", "claim")
+        
+        history_lines, discussion_lines, omitted = budgeter.select_context(
+            self.game_history, discussions, estimate_tokens(reserved_text + section), max_output_tokens,
+            skip_history_kinds=skip_kinds
+        )
+        
+        section += "\n遊戲歷史：\n"
+        for event in history_lines:
+            section += f"- {event}\n"
+        if omitted:
+            section += f"（為控制提示長度，已省略{omitted}條較早或次要的記錄）\n"
+        
+        if discussion_lines:
+            section += "\n今天的討論：\n"
+            for line in discussion_lines:
+                section += f"- {line}\n"
+        
+        return section
+    
+    def _build_night_prompt(self, game_state, api_handler, title, candidate_ids, instructions, notes=None,
+                            period="夜晚", include_discussions=False):
+        """構建通用的夜間行動提示（供村民陣營的特殊角色使用）
+        
+        Args:
+            game_state (dict): 當前遊戲狀態
+            api_handler: API 處理程序，用於確定上下文預算
+            title (str): 行動階段名稱，例如 "守衛行動階段"
+            candidate_ids (list): 可選目標的玩家 ID 列表
+            instructions (str): 行動指示和回答格式
+            notes (list, optional): 額外的局勢說明。默認為 None
+            period (str, optional): 提示開頭的時段，白天觸發的行動（例如被放逐的獵人開槍）使用 "白天"。默認為 "夜晚"
+            include_discussions (bool, optional): 是否包含當天的討論。默認為 False
             
-            # 如果沒有找到有效的ID，隨機選擇一個
-            import random
-            return random.choice(alive_players)["player_id"]
-        except Exception as e:
-            # 出錯時返回第一個存活玩家
-            return alive_players[0]["player_id"]
-    
-    def _build_vote_prompt(self, game_state, alive_players):
+        Returns:
+            str: 行動提示
+        """
+        prompt = f"現在是狼人殺遊戲的第{game_state['day']}天{period}，{title}。\n\n"
+        
+        # 添加遊戲現狀
+        prompt += "遊戲現狀：\n"
+        prompt += f"- 存活玩家：{len([p for p in game_state['players'] if p['is_alive']])}人\n"
+        for note in notes or []:
+            prompt += f"- {note}\n"
+        
+        # 添加可選目標
+        prompt += "\n可選的目標：\n"
+        for player in game_state["players"]:
+            if player["player_id"] in candidate_ids:
+                prompt += f"- 玩家{player['player_id']}（{player['name']}）\n"
+        
+        instructions = "\n" + instructions
+        
+        # 添加遊戲歷史上下文
+        prompt += self._build_context_section(game_state, api_handler, prompt + instructions,
+                                              include_discussions=include_discussions)
+        prompt += instructions
+        
+        return prompt
+    
+    def _build_vote_prompt(self, game_state, alive_players, api_handler=None):
         """構建投票提示
         
         Args:
             game_state (dict): 當前遊戲狀態
             alive_players (list): 存活玩家列表
+            api_handler: API 處理程序，用於確定上下文預算。默認為 None
             
         Returns:
             str: 投票提示
         """
-        prompt = f"現在是狼人殺遊戲的第{game_state['day']}天，需要進行投票。\n\n"
-        
-        # 添加遊戲歷史
-        prompt += "遊戲歷史：\n"
-        for event in self.game_history[-10:]:  # 只使用最近的10個事件
-            prompt += f"- {event}\n"
-        
-        # 添加今天的討論
-        prompt += "\n今天的討論：\n"
-        for discussion in game_state["current_discussions"]:
-            prompt += f"- {discussion['player_name']}（玩家{discussion['player_id']}）說：「{discussion['content']}」\n"
+        prompt = f"現在是狼人殺遊戲的第{game_state['day']}天，需要進行投票。\n"
         
         # 添加投票指示
-        prompt += "\n請投票選擇你認為最可能是狼人的玩家，僅回答玩家ID即可。可選的玩家：\n"
+        instructions = "\n請投票選擇你認為最可能是狼人的玩家，僅回答玩家ID即可。可選的玩家：\n"
         for player in alive_players:
-            prompt += f"- 玩家{player['player_id']}（{player['name']}）\n"
+            instructions += f"- 玩家{player['player_id']}（{player['name']}）\n"
+        
+        instructions += "\n請分析並做出決策，回答格式：'我投票給玩家X'，其中X是玩家ID。"
         
-        prompt += "\n請分析並做出決策，回答格式：'我投票給玩家X'，其中X是玩家ID。"
+        # 添加遊戲歷史和今天的討論
+        prompt += self._build_context_section(game_state, api_handler, prompt + instructions)
+        prompt += instructions
         
         return prompt
@@ -0,0 +1,43 @@
+from .villager import Villager
+from .registry import register_role
+
+@register_role("elder")
+class Elder(Villager):
+    """長老角色"""
+    
+    state_fields = ("extra_lives",)
+    
+    def __init__(self, player_id, name=None):
+        """初始化長老角色
+        
+        Args:
+            player_id (int): 玩家 ID
+            name (str, optional): 玩家名稱
+        """
+        super().__init__(player_id, name)
+        self.role_name = "長老"
+        self.extra_lives = 1  # 可以承受狼人攻擊的次數
+    
+    def before_death(self, cause):
+        """長老可以承受狼人的第一次攻擊
+        
+        Args:
+            cause (str): 死因
+            
+        Returns:
+            bool: 是否死亡
+        """
+        if cause == "night" and self.extra_lives > 0:
+            self.extra_lives -= 1
+            self.add_history("你在夜晚遭到狼人攻擊，但憑藉長老的體魄活了下來")
+            return False
+        return True
+    
+    def _discussion_guidance(self):
+        """白天討論的角色指引
+        
+        Returns:
+            str: 角色指引
+        """
+        return """作為長老，你可以承受狼人的第一次攻擊而不死亡。
+如果你在夜晚被攻擊卻活了下來，這是判斷局勢的重要信息；請根據發言找出可疑的玩家。"""
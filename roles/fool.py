@@ -0,0 +1,41 @@
+from .villager import Villager
+from .registry import register_role
+
+@register_role("fool")
+class Fool(Villager):
+    """白痴角色"""
+    
+    state_fields = ("revealed",)
+    
+    def __init__(self, player_id, name=None):
+        """初始化白痴角色
+        
+        Args:
+            player_id (int): 玩家 ID
+            name (str, optional): 玩家名稱
+        """
+        super().__init__(player_id, name)
+        self.role_name = "白痴"
+        self.revealed = False  # 是否已經因為被投票而翻牌
+    
+    def before_death(self, cause):
+        """白痴第一次被投票放逐時翻牌公開身份，不會出局
+        
+        Args:
+            cause (str): 死因
+            
+        Returns:
+            bool: 是否死亡
+        """
+        if cause == "exile" and not self.revealed:
+            self.revealed = True
+            return False
+        return True
+    
+    def _discussion_guidance(self):
+        """白天討論的角色指引
+        
+        Returns:
+            str: 角色指引
+        """
+        return """作為白痴，你第一次被投票放逐時會公開身份並留在場上，因此你可以大膽地發言和指認可疑的玩家。"""
@@ -0,0 +1,61 @@
+from .villager import Villager
+from .registry import register_role
+
+@register_role("guard")
+class Guard(Villager):
+    """守衛角色"""
+    
+    night_step = "guard"
+    state_fields = ("last_protected",)
+    
+    def __init__(self, player_id, name=None):
+        """初始化守衛角色
+        
+        Args:
+            player_id (int): 玩家 ID
+            name (str, optional): 玩家名稱
+        """
+        super().__init__(player_id, name)
+        self.role_name = "守衛"
+        self.last_protected = None  # 上一晚守護的玩家 ID（不能連續兩晚守護同一人）
+    
+    async def night_action(self, game_state, api_handler):
+        """夜晚行動 - 守護一名玩家免受狼人攻擊
+        
+        Args:
+            game_state (dict): 當前遊戲狀態
+            api_handler: API 處理程序
+            
+        Returns:
+            dict: 行動結果，包含守護的玩家 ID
+        """
+        valid_ids = [p["player_id"] for p in game_state["players"]
+                     if p["is_alive"] and p["player_id"] != self.last_protected]
+        
+        prompt = self._build_night_prompt(
+            game_state, api_handler, "守衛行動階段", valid_ids,
+            "請選擇一名玩家作為今晚的守護目標（可以守護自己）。考慮誰最可能成為狼人的攻擊目標。"
+            "回答格式：'我選擇守護玩家X'，其中X是玩家ID。",
+            notes=[f"你上一晚守護了玩家{self.last_protected}，今晚不能再守護他"] if self.last_protected else None
+        )
+        
+        system_message = f"""你是一名狼人殺遊戲中的守衛角色，名字是{self.name}。
+現在是夜晚，你可以守護一名玩家，使他今晚不會被狼人殺死。
+你需要做出最有利於村民陣營的決策。"""
+        
+        response = await api_handler.get_response(prompt, system_message)
+        
+        target_id = self._choose_target(response, valid_ids)
+        self.last_protected = target_id
+        if target_id is None:
+            return {"action": "wait", "target": None, "result": "無有效目標"}
+        return {"action": "protect", "target": target_id, "result": None}
+    
+    def _discussion_guidance(self):
+        """白天討論的角色指引
+        
+        Returns:
+            str: 角色指引
+        """
+        return """作為守衛，你每晚可以守護一名玩家免受狼人攻擊，但不能連續兩晚守護同一人。
+公開身份會讓你成為狼人的目標，請謹慎決定是否透露，並根據發言找出可疑的玩家。"""
@@ -0,0 +1,67 @@
+from .villager import Villager
+from .registry import register_role
+
+@register_role("hunter")
+class Hunter(Villager):
+    """獵人角色"""
+    
+    def __init__(self, player_id, name=None):
+        """初始化獵人角色
+        
+        Args:
+            player_id (int): 玩家 ID
+            name (str, optional): 玩家名稱
+        """
+        super().__init__(player_id, name)
+        self.role_name = "獵人"
+    
+    async def death_action(self, game_state, api_handler, cause):
+        """死亡時開槍帶走一名玩家（被毒死時不能開槍）
+        
+        Args:
+            game_state (dict): 當前遊戲狀態
+            api_handler: API 處理程序
+            cause (str): 死因
+            
+        Returns:
+            Optional[dict]: 開槍的行動結果，不開槍時為 None
+        """
+        if cause == "poison":
+            return None
+        
+        valid_ids = [p["player_id"] for p in game_state["players"]
+                     if p["is_alive"] and p["player_id"] != self.player_id]
+        if not valid_ids:
+            return None
+        
+        # 白天的死亡（被放逐或在放逐後被帶走）發生在投票之後，當天的討論也是判斷的依據
+        daytime = game_state.get("phase") != "night"
+        reason = "被放逐" if cause == "exile" else "死亡"
+        prompt = self._build_night_prompt(
+            game_state, api_handler, f"你已經{reason}，獵人開槍階段", valid_ids,
+            "你可以開槍帶走一名你認為是狼人的玩家，也可以選擇不開槍。"
+            "回答格式：'我開槍帶走玩家X' 或 '我不開槍'。",
+            period="白天" if daytime else "夜晚", include_discussions=daytime
+        )
+        
+        system_message = f"""你是一名狼人殺遊戲中的獵人角色，名字是{self.name}。
+你剛剛{reason}，可以立即開槍帶走一名玩家。
+你需要做出最有利於村民陣營的決策，不要誤傷好人。"""
+        
+        response = await api_handler.get_response(prompt, system_message) or ""
+        if "不開槍" in response:
+            return None
+        
+        target_id = self._parse_target(response, valid_ids)
+        if target_id is None:
+            return None
+        return {"action": "shoot", "target": target_id, "result": None}
+    
+    def _discussion_guidance(self):
+        """白天討論的角色指引
+        
+        Returns:
+            str: 角色指引
+        """
+        return """作為獵人，你被狼人殺死或被放逐時可以開槍帶走一名玩家，因此狼人通常不敢輕易動你。
+你可以選擇是否公開身份來威懾狼人，並根據發言找出可疑的玩家。"""
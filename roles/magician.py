@@ -0,0 +1,62 @@
+from .villager import Villager
+from .registry import register_role
+
+@register_role("magician")
+class Magician(Villager):
+    """魔術師角色"""
+    
+    night_step = "magician"
+    
+    def __init__(self, player_id, name=None):
+        """初始化魔術師角色
+        
+        Args:
+            player_id (int): 玩家 ID
+            name (str, optional): 玩家名稱
+        """
+        super().__init__(player_id, name)
+        self.role_name = "魔術師"
+    
+    async def night_action(self, game_state, api_handler):
+        """夜晚行動 - 交換兩名玩家的位置，使指向其中一人的攻擊轉移到另一人身上
+        
+        Args:
+            game_state (dict): 當前遊戲狀態
+            api_handler: API 處理程序
+            
+        Returns:
+            dict: 行動結果，targets 為交換的兩名玩家 ID
+        """
+        valid_ids = [p["player_id"] for p in game_state["players"] if p["is_alive"]]
+        if len(valid_ids) < 2:
+            return {"action": "sleep", "target": None, "result": None}
+        
+        prompt = self._build_night_prompt(
+            game_state, api_handler, "魔術師行動階段", valid_ids,
+            "請選擇兩名玩家交換位置，今晚指向其中一人的狼人攻擊會轉移到另一人身上（可以包括你自己）。"
+            "回答格式：'我交換玩家X和玩家Y' 或 '今晚不行動'。"
+        )
+        
+        system_message = f"""你是一名狼人殺遊戲中的魔術師角色，名字是{self.name}。
+現在是夜晚，你可以交換兩名玩家的位置來擾亂狼人的攻擊。
+你需要做出最有利於村民陣營的決策。"""
+        
+        response = await api_handler.get_response(prompt, system_message) or ""
+        if "不行動" in response:
+            return {"action": "sleep", "target": None, "result": None}
+        
+        first = self._parse_target(response, valid_ids)
+        second = self._parse_target(response, [pid for pid in valid_ids if pid != first])
+        if first is None or second is None:
+            return {"action": "sleep", "target": None, "result": None}
+        
+        return {"action": "swap", "target": None, "targets": [first, second], "result": None}
+    
+    def _discussion_guidance(self):
+        """白天討論的角色指引
+        
+        Returns:
+            str: 角色指引
+        """
+        return """作為魔術師，你每晚可以交換兩名玩家的位置來轉移狼人的攻擊。
+公開身份會讓你成為狼人的目標，請謹慎決定是否透露，並根據發言找出可疑的玩家。"""
@@ -0,0 +1,48 @@
+from .villager import Villager
+from .registry import register_role
+from utils.text_utils import ROLE_DISPLAY_NAMES
+
+@register_role("medium")
+class Medium(Villager):
+    """通靈師角色"""
+    
+    state_fields = ("medium_results",)
+    
+    def __init__(self, player_id, name=None):
+        """初始化通靈師角色
+        
+        Args:
+            player_id (int): 玩家 ID
+            name (str, optional): 玩家名稱
+        """
+        super().__init__(player_id, name)
+        self.role_name = "通靈師"
+        self.medium_results = {}  # 通靈結果 {player_id: role}
+    
+    def observe_exile(self, player_id, role):
+        """得知被放逐玩家的真實身份
+        
+        Args:
+            player_id (int): 被放逐的玩家 ID
+            role (str): 被放逐玩家的角色代號
+        """
+        self.medium_results[player_id] = role
+        self.add_history(f"通靈結果：被放逐的玩家{player_id}的真實身份是{ROLE_DISPLAY_NAMES.get(role, role)}")
+    
+    def restore_state(self, data):
+        """恢復私有狀態（JSON 的鍵總是字符串，需要恢復為整數 ID）
+        
+        Args:
+            data (dict): 角色數據
+        """
+        super().restore_state(data)
+        self.medium_results = {int(pid): role for pid, role in self.medium_results.items()}
+    
+    def _discussion_guidance(self):
+        """白天討論的角色指引
+        
+        Returns:
+            str: 角色指引
+        """
+        return """作為通靈師，你能得知每個被放逐玩家的真實身份，可以據此驗證其他人的發言和投票是否可信。
+公開身份會讓你成為狼人的目標，請謹慎決定是否透露。"""
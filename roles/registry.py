@@ -0,0 +1,48 @@
+from typing import Dict, Type
+
+# 角色註冊表 {角色代號: 角色類別}
+ROLE_REGISTRY: Dict[str, Type] = {}
+
+
+def register_role(role_key: str):
+    """註冊角色類別的裝飾器
+
+    Args:
+        role_key (str): 角色代號，例如 "seer"
+
+    Returns:
+        Callable: 類別裝飾器
+    """
+    def decorator(cls):
+        cls.role_key = role_key
+        ROLE_REGISTRY[role_key] = cls
+        return cls
+    return decorator
+
+
+def get_role_class(role_key: str):
+    """獲取已註冊的角色類別
+
+    Args:
+        role_key (str): 角色代號
+
+    Returns:
+        Type: 角色類別
+    """
+    if role_key not in ROLE_REGISTRY:
+        raise ValueError(f"未知的角色: {role_key}")
+    return ROLE_REGISTRY[role_key]
+
+
+def create_role(role_key: str, player_id: int, name: str = None):
+    """按角色代號創建角色對象
+
+    Args:
+        role_key (str): 角色代號
+        player_id (int): 玩家 ID
+        name (str, optional): 玩家名稱
+
+    Returns:
+        BaseRole: 角色對象
+    """
+    return get_role_class(role_key)(player_id, name)
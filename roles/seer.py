@@ -1,8 +1,13 @@
 from .base_role import BaseRole
+from .registry import register_role
 
+@register_role("seer")
 class Seer(BaseRole):
     """預言家角色"""
     
+    night_step = "seer"
+    state_fields = ("checked_players",)
+    
     def __init__(self, player_id, name=None):
         """初始化預言家角色
         
@@ -15,6 +20,24 @@ class Seer(BaseRole):
         self.team = "村民陣營"
         self.checked_players = {}  # 已查驗的玩家 {player_id: is_werewolf}
     
+    def record_check(self, target_id, is_werewolf):
+        """記錄由遊戲引擎結算的查驗結果
+        
+        Args:
+            target_id (int): 被查驗的玩家 ID
+            is_werewolf (bool): 是否是狼人
+        """
+        self.checked_players[target_id] = is_werewolf
+    
+    def restore_state(self, data):
+        """恢復私有狀態（JSON 的鍵總是字符串，需要恢復為整數 ID）
+        
+        Args:
+            data (dict): 角色數據
+        """
+        super().restore_state(data)
+        self.checked_players = {int(pid): is_werewolf for pid, is_werewolf in self.checked_players.items()}
+    
     async def night_action(self, game_state, api_handler):
         """夜晚行動 - 查驗一名玩家的身份
         
@@ -23,10 +46,10 @@ class Seer(BaseRole):
             api_handler: API 處理程序
             
         Returns:
-            dict: 行動結果，包含目標玩家 ID 和查驗結果
+            dict: 行動結果，包含目標玩家 ID（查驗結果由遊戲引擎結算）
         """
         # 構建夜間行動提示
-        prompt = self._build_night_action_prompt(game_state)
+        prompt = self._build_night_action_prompt(game_state, api_handler)
         
         # 使用 API 獲取決策
         system_message = f"""你是一名狼人殺遊戲中的預言家角色，名字是{self.name}。
@@ -35,56 +58,14 @@ class Seer(BaseRole):
         
         response = await api_handler.get_response(prompt, system_message)
         
-        # 解析響應以獲取目標玩家 ID
-        try:
-            # 嘗試找到數字ID引用
-            import re
-            target_ids = re.findall(r'玩家(\d+)', response)
-            if target_ids:
-                target_id = int(target_ids[0])
-                # 確保是有效的存活玩家且尚未被查驗
-                valid_targets = [p for p in game_state["players"] 
-                               if p["is_alive"] and p["player_id"] != self.player_id 
-                               and p["player_id"] not in self.checked_players]
-                if any(p["player_id"] == target_id for p in valid_targets):
-                    # 查詢目標玩家的身份
-                    target_player = next((p for p in game_state["players"] if p["player_id"] == target_id), None)
-                    is_werewolf = target_player.get("role") == "狼人" if target_player else False
-                    
-                    # 記錄查驗結果
-                    self.checked_players[target_id] = is_werewolf
-                    
-                    return {
-                        "action": "check", 
-                        "target": target_id, 
-                        "result": "狼人" if is_werewolf else "好人"
-                    }
-            
-            # 如果沒有找到有效的ID，隨機選擇一個
-            import random
-            valid_targets = [p for p in game_state["players"] 
-                           if p["is_alive"] and p["player_id"] != self.player_id 
-                           and p["player_id"] not in self.checked_players]
-            if valid_targets:
-                target = random.choice(valid_targets)
-                target_id = target["player_id"]
-                
-                # 查詢目標玩家的身份
-                is_werewolf = target.get("role") == "狼人"
-                
-                # 記錄查驗結果
-                self.checked_players[target_id] = is_werewolf
-                
-                return {
-                    "action": "check", 
-                    "target": target_id, 
-                    "result": "狼人" if is_werewolf else "好人"
-                }
-            
+        # 解析響應以獲取目標玩家 ID（必須是存活且尚未被查驗的玩家），沒有找到時隨機選擇一個
+        valid_ids = [p["player_id"] for p in game_state["players"]
+                     if p["is_alive"] and p["player_id"] != self.player_id
+                     and p["player_id"] not in self.checked_players]
+        target_id = self._choose_target(response, valid_ids)
+        if target_id is None:
             return {"action": "wait", "target": None, "result": "無有效目標"}
-        except Exception as e:
-            # 出錯時返回等待
-            return {"action": "wait", "target": None, "result": f"錯誤：{str(e)}"}
+        return {"action": "check", "target": target_id, "result": None}
     
     async def day_discussion(self, game_state, api_handler):
         """白天討論
@@ -97,7 +78,7 @@ class Seer(BaseRole):
             str: 討論發言
         """
         # 構建討論提示
-        prompt = self._build_discussion_prompt(game_state)
+        prompt = self._build_discussion_prompt(game_state, api_handler)
         
         # 使用 API 獲取發言
         system_message = f"""你是一名狼人殺遊戲中的預言家角色，名字是{self.name}。
@@ -108,11 +89,12 @@ class Seer(BaseRole):
         response = await api_handler.get_response(prompt, system_message, temperature=0.8, max_tokens=300)
         return response
     
-    def _build_night_action_prompt(self, game_state):
+    def _build_night_action_prompt(self, game_state, api_handler=None):
         """構建夜間行動提示
         
         Args:
             game_state (dict): 當前遊戲狀態
+            api_handler: API 處理程序，用於確定上下文預算。默認為 None
             
         Returns:
             str: 夜間行動提示
@@ -139,20 +121,21 @@ class Seer(BaseRole):
                 and player["player_id"] not in self.checked_players):
                 prompt += f"- 玩家{player['player_id']}（{player['name']}）\n"
         
-        # 添加遊戲歷史上下文
-        prompt += "\n遊戲歷史：\n"
-        for event in self.game_history[-10:]:  # 只使用最近的10個事件
-            prompt += f"- {event}\n"
+        instructions = "\n請選擇一名玩家作為今晚的查驗目標。考慮誰的行為最可疑，或者誰可能是關鍵角色。回答格式：'我選擇查驗玩家X'，其中X是玩家ID。"
         
-        prompt += "\n請選擇一名玩家作為今晚的查驗目標。考慮誰的行為最可疑，或者誰可能是關鍵角色。回答格式：'我選擇查驗玩家X'，其中X是玩家ID。"
+        # 添加遊戲歷史上下文
+        prompt += self._build_context_section(game_state, api_handler, prompt + instructions,
+                                              include_discussions=False)
+        prompt += instructions
         
         return prompt
     
-    def _build_discussion_prompt(self, game_state):
+    def _build_discussion_prompt(self, game_state, api_handler=None):
         """構建討論提示
         
         Args:
             game_state (dict): 當前遊戲狀態
+            api_handler: API 處理程序，用於確定上下文預算。默認為 None
             
         Returns:
             str: 討論提示
@@ -174,17 +157,10 @@ class Seer(BaseRole):
                     result = "狼人" if is_werewolf else "好人"
                     prompt += f"- 玩家{pid}（{player['name']}）{is_alive}：{result}\n"
         
-        # 添加遊戲歷史
-        prompt += "\n遊戲歷史：\n"
-        for event in self.game_history[-15:]:  # 只使用最近的15個事件
-            prompt += f"- {event}\n"
-        
-        # 添加今天已有的討論
-        if game_state["current_discussions"]:
-            prompt += "\n今天的討論：\n"
-            for discussion in game_state["current_discussions"]:
-                prompt += f"- {discussion['player_name']}（玩家{discussion['player_id']}）說：「{discussion['content']}」\n"
+        instructions = "\n請以第一人稱發表你的看法和分析。作為預言家，你需要決定是否要在此時揭露自己的身份和分享查驗結果。你可以選擇公開或隱藏你的身份，但請注意狼人可能會對公開的預言家發起攻擊。無論如何，你的目標都是幫助村民找出狼人。"
         
-        prompt += "\n請以第一人稱發表你的看法和分析。作為預言家，你需要決定是否要在此時揭露自己的身份和分享查驗結果。你可以選擇公開或隱藏你的身份，但請注意狼人可能會對公開的預言家發起攻擊。無論如何，你的目標都是幫助村民找出狼人。"
+        # 添加遊戲歷史和今天已有的討論
+        prompt += self._build_context_section(game_state, api_handler, prompt + instructions, max_output_tokens=300)
+        prompt += instructions
         
         return prompt
@@ -1,5 +1,7 @@
 from .base_role import BaseRole
+from .registry import register_role
 
+@register_role("villager")
 class Villager(BaseRole):
     """普通村民角色"""
     
@@ -38,22 +40,31 @@ class Villager(BaseRole):
             str: 討論發言
         """
         # 構建討論提示
-        prompt = self._build_discussion_prompt(game_state)
+        prompt = self._build_discussion_prompt(game_state, api_handler)
         
         # 使用 API 獲取發言
         system_message = f"""你是一名狼人殺遊戲中的{self.role_name}角色，名字是{self.name}。
 你的目標是找出並消滅所有狼人。
-進行合理的分析和推理，但不要透露自己是村民（因為這在遊戲中是很明顯的，所有人都聲稱自己是村民）。
-觀察其他玩家的行為，找出可能的矛盾和可疑之處。"""
+{self._discussion_guidance()}"""
         
         response = await api_handler.get_response(prompt, system_message, temperature=0.8, max_tokens=300)
         return response
     
-    def _build_discussion_prompt(self, game_state):
+    def _discussion_guidance(self):
+        """白天討論的角色指引，村民陣營的特殊角色可以覆蓋
+        
+        Returns:
+            str: 角色指引
+        """
+        return """進行合理的分析和推理，但不要透露自己是村民（因為這在遊戲中是很明顯的，所有人都聲稱自己是村民）。
+觀察其他玩家的行為，找出可能的矛盾和可疑之處。"""
+    
+    def _build_discussion_prompt(self, game_state, api_handler=None):
         """構建討論提示
         
         Args:
             game_state (dict): 當前遊戲狀態
+            api_handler: API 處理程序，用於確定上下文預算。默認為 None
             
         Returns:
             str: 討論提示
@@ -63,19 +74,12 @@ class Villager(BaseRole):
         # 添加遊戲現狀
         prompt += "遊戲現狀：\n"
         prompt += f"- 存活玩家：{len([p for p in game_state['players'] if p['is_alive']])}人\n"
-        prompt += f"- 昨晚死亡：{game_state['last_night_deaths'] or '無'}\n\n"
-        
-        # 添加遊戲歷史
-        prompt += "遊戲歷史：\n"
-        for event in self.game_history[-15:]:  # 只使用最近的15個事件
-            prompt += f"- {event}\n"
+        prompt += f"- 昨晚死亡：{game_state['last_night_deaths'] or '無'}\n"
         
-        # 添加今天已有的討論
-        if game_state["current_discussions"]:
-            prompt += "\n今天的討論：\n"
-            for discussion in game_state["current_discussions"]:
-                prompt += f"- {discussion['player_name']}（玩家{discussion['player_id']}）說：「{discussion['content']}」\n"
+        instructions = "\n請以第一人稱發表你的看法和分析，試圖找出誰可能是狼人。你的發言應該是合理的，基於遊戲中已知的信息進行推理。"
         
-        prompt += "\n請以第一人稱發表你的看法和分析，試圖找出誰可能是狼人。你的發言應該是合理的，基於遊戲中已知的信息進行推理。"
+        # 添加遊戲歷史和今天已有的討論
+        prompt += self._build_context_section(game_state, api_handler, prompt + instructions, max_output_tokens=300)
+        prompt += instructions
         
         return prompt
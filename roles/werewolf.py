@@ -1,8 +1,14 @@
 from .base_role import BaseRole
+from .registry import register_role
 
+@register_role("werewolf")
 class Werewolf(BaseRole):
     """狼人角色"""
     
+    night_step = "werewolf"
+    sees_werewolves = True
+    state_fields = ("teammates",)
+    
     def __init__(self, player_id, name=None):
         """初始化狼人角色
         
@@ -23,6 +29,15 @@ class Werewolf(BaseRole):
         """
         self.teammates = teammate_ids
     
+    def setup_knowledge(self, players):
+        """狼人知道所有隊友的身份
+        
+        Args:
+            players (list): 所有玩家信息（包含真實角色）
+        """
+        self.set_teammates([p["player_id"] for p in players
+                            if p["role"] == "werewolf" and p["player_id"] != self.player_id])
+    
     async def night_action(self, game_state, api_handler):
         """夜晚行動 - 選擇一名玩家攻擊
         
@@ -38,7 +53,7 @@ class Werewolf(BaseRole):
             return {"action": "wait", "target": None, "result": None}
         
         # 構建夜間行動提示
-        prompt = self._build_night_action_prompt(game_state)
+        prompt = self._build_night_action_prompt(game_state, api_handler)
         
         # 使用 API 獲取決策
         system_message = f"""你是一名狼人殺遊戲中的狼人角色，名字是{self.name}。
@@ -47,30 +62,13 @@ class Werewolf(BaseRole):
         
         response = await api_handler.get_response(prompt, system_message)
         
-        # 解析響應以獲取目標玩家 ID
-        try:
-            # 嘗試找到數字ID引用
-            import re
-            target_ids = re.findall(r'玩家(\d+)', response)
-            if target_ids:
-                target_id = int(target_ids[0])
-                # 確保是有效的存活玩家且不是狼人
-                valid_targets = [p for p in game_state["players"] 
-                               if p["is_alive"] and p["player_id"] not in [self.player_id] + self.teammates]
-                if any(p["player_id"] == target_id for p in valid_targets):
-                    return {"action": "attack", "target": target_id, "result": None}
-            
-            # 如果沒有找到有效的ID，隨機選擇一個
-            import random
-            valid_targets = [p for p in game_state["players"] 
-                           if p["is_alive"] and p["player_id"] not in [self.player_id] + self.teammates]
-            if valid_targets:
-                target = random.choice(valid_targets)
-                return {"action": "attack", "target": target["player_id"], "result": None}
+        # 解析響應以獲取目標玩家 ID（必須是存活且不是狼人的玩家），沒有找到時隨機選擇一個
+        valid_ids = [p["player_id"] for p in game_state["players"]
+                     if p["is_alive"] and p["player_id"] not in [self.player_id] + self.teammates]
+        target_id = self._choose_target(response, valid_ids)
+        if target_id is None:
             return {"action": "wait", "target": None, "result": "無有效目標"}
-        except Exception as e:
-            # 出錯時返回等待
-            return {"action": "wait", "target": None, "result": f"錯誤：{str(e)}"}
+        return {"action": "attack", "target": target_id, "result": None}
     
     async def day_discussion(self, game_state, api_handler):
         """白天討論
@@ -83,7 +81,7 @@ class Werewolf(BaseRole):
             str: 討論發言
         """
         # 構建討論提示
-        prompt = self._build_discussion_prompt(game_state)
+        prompt = self._build_discussion_prompt(game_state, api_handler)
         
         # 使用 API 獲取發言
         system_message = f"""你是一名狼人殺遊戲中的狼人角色，名字是{self.name}，正在偽裝成村民。
@@ -108,11 +106,12 @@ class Werewolf(BaseRole):
                                                  for p in game_state["players"])]
         return self.player_id == min(alive_werewolves) if alive_werewolves else False
     
-    def _build_night_action_prompt(self, game_state):
+    def _build_night_action_prompt(self, game_state, api_handler=None):
         """構建夜間行動提示
         
         Args:
             game_state (dict): 當前遊戲狀態
+            api_handler: API 處理程序，用於確定上下文預算。默認為 None
             
         Returns:
             str: 夜間行動提示
@@ -141,20 +140,21 @@ class Werewolf(BaseRole):
                 and player["player_id"] not in self.teammates):
                 prompt += f"- 玩家{player['player_id']}（{player['name']}）\n"
         
-        # 添加遊戲歷史上下文
-        prompt += "\n遊戲歷史：\n"
-        for event in self.game_history[-10:]:  # 只使用最近的10個事件
-            prompt += f"- {event}\n"
+        instructions = "\n請選擇一名玩家作為今晚的攻擊目標。考慮誰可能是重要角色（如預言家、女巫），以及如何製造混亂。回答格式：'我選擇攻擊玩家X'，其中X是玩家ID。"
         
-        prompt += "\n請選擇一名玩家作為今晚的攻擊目標。考慮誰可能是重要角色（如預言家、女巫），以及如何製造混亂。回答格式：'我選擇攻擊玩家X'，其中X是玩家ID。"
+        # 添加遊戲歷史上下文
+        prompt += self._build_context_section(game_state, api_handler, prompt + instructions,
+                                              include_discussions=False)
+        prompt += instructions
         
         return prompt
     
-    def _build_discussion_prompt(self, game_state):
+    def _build_discussion_prompt(self, game_state, api_handler=None):
         """構建討論提示
         
         Args:
             game_state (dict): 當前遊戲狀態
+            api_handler: API 處理程序，用於確定上下文預算。默認為 None
             
         Returns:
             str: 討論提示
@@ -177,17 +177,10 @@ class Werewolf(BaseRole):
                     if teammate:
                         prompt += f"  - 玩家{tid}（{teammate['name']}）\n"
         
-        # 添加遊戲歷史
-        prompt += "\n遊戲歷史：\n"
-        for event in self.game_history[-15:]:  # 只使用最近的15個事件
-            prompt += f"- {event}\n"
-        
-        # 添加今天已有的討論
-        if game_state["current_discussions"]:
-            prompt += "\n今天的討論：\n"
-            for discussion in game_state["current_discussions"]:
-                prompt += f"- {discussion['player_name']}（玩家{discussion['player_id']}）說：「{discussion['content']}」\n"
+        instructions = "\n請以第一人稱發表你的看法和分析，偽裝成村民，試圖找出'狼人'（當然不是你自己）。你的發言應該看起來像是一個熱心的村民在分析局勢，但實際上你的目標是誤導其他玩家，保護自己和狼人同伴。"
         
-        prompt += "\n請以第一人稱發表你的看法和分析，偽裝成村民，試圖找出'狼人'（當然不是你自己）。你的發言應該看起來像是一個熱心的村民在分析局勢，但實際上你的目標是誤導其他玩家，保護自己和狼人同伴。"
+        # 添加遊戲歷史和今天已有的討論
+        prompt += self._build_context_section(game_state, api_handler, prompt + instructions, max_output_tokens=300)
+        prompt += instructions
         
         return prompt
@@ -0,0 +1,94 @@
+import re
+
+from .villager import Villager
+from .registry import register_role
+
+@register_role("witch")
+class Witch(Villager):
+    """女巫角色"""
+    
+    night_step = "witch"
+    night_after = ("werewolf", "magician")  # 需要知道狼人今晚（魔術師交換之後）的最終攻擊目標
+    night_info = ("attack_target",)
+    state_fields = ("has_antidote", "has_poison")
+    
+    def __init__(self, player_id, name=None):
+        """初始化女巫角色
+        
+        Args:
+            player_id (int): 玩家 ID
+            name (str, optional): 玩家名稱
+        """
+        super().__init__(player_id, name)
+        self.role_name = "女巫"
+        self.has_antidote = True  # 救藥
+        self.has_poison = True  # 毒藥
+    
+    async def night_action(self, game_state, api_handler):
+        """夜晚行動 - 使用救藥救活被攻擊的玩家，或使用毒藥毒死一名玩家
+        
+        Args:
+            game_state (dict): 當前遊戲狀態
+            api_handler: API 處理程序
+            
+        Returns:
+            dict: 行動結果
+        """
+        if not self.has_antidote and not self.has_poison:
+            return {"action": "sleep", "target": None, "result": None}
+        
+        attack_target = game_state.get("night_context", {}).get("attack_target")
+        can_save = self.has_antidote and attack_target is not None
+        valid_ids = [p["player_id"] for p in game_state["players"]
+                     if p["is_alive"] and p["player_id"] != self.player_id] if self.has_poison else []
+        
+        notes = []
+        if attack_target is not None:
+            notes.append(f"今晚狼人攻擊了玩家{attack_target}")
+        else:
+            notes.append("今晚狼人沒有攻擊任何人")
+        notes.append(f"救藥：{'可用' if self.has_antidote else '已用完'}，毒藥：{'可用' if self.has_poison else '已用完'}")
+        
+        options = []
+        if can_save:
+            options.append(f"'我使用解藥救玩家{attack_target}'")
+        if self.has_poison:
+            options.append("'我使用毒藥毒死玩家X'")
+        options.append("'我不使用藥水'")
+        
+        prompt = self._build_night_prompt(
+            game_state, api_handler, "女巫行動階段", valid_ids,
+            f"每晚最多使用一瓶藥水，每種藥水整局只能使用一次。回答格式：{' 或 '.join(options)}。",
+            notes=notes
+        )
+        
+        system_message = f"""你是一名狼人殺遊戲中的女巫角色，名字是{self.name}。
+現在是夜晚，你可以用救藥救活今晚被狼人攻擊的玩家，或者用毒藥毒死一名你懷疑是狼人的玩家。
+你需要做出最有利於村民陣營的決策。"""
+        
+        response = await api_handler.get_response(prompt, system_message) or ""
+        
+        # 按子句分別判斷兩種藥水，否定只作用於所在的子句（例如「不用毒藥，使用解藥救玩家3」）
+        clauses = [clause for clause in re.split(r'[，,。；;！!\n]', response) if "不" not in clause]
+        
+        if can_save and any(re.search(rf'救(?:活)?玩家{attack_target}(?!\d)', clause) for clause in clauses):
+            self.has_antidote = False
+            return {"action": "save", "target": attack_target, "result": None}
+        
+        if self.has_poison:
+            for clause in clauses:
+                match = re.search(r'毒死玩家(\d+)', clause)
+                if match and int(match.group(1)) in valid_ids:
+                    self.has_poison = False
+                    return {"action": "poison", "target": int(match.group(1)), "result": None}
+        
+        return {"action": "sleep", "target": None, "result": None}
+    
+    def _discussion_guidance(self):
+        """白天討論的角色指引
+        
+        Returns:
+            str: 角色指引
+        """
+        return """作為女巫，你掌握著救藥和毒藥，知道每晚狼人攻擊了誰（在你還有救藥時）。
+公開身份會讓你成為狼人的目標，請謹慎決定是否透露，並利用你掌握的夜間信息找出狼人。"""
@@ -0,0 +1,76 @@
+from .villager import Villager
+from .registry import register_role
+
+@register_role("wolfkiller")
+class WolfKiller(Villager):
+    """狼殺手角色"""
+    
+    night_step = "wolfkiller"
+    sees_werewolves = True
+    state_fields = ("known_werewolves", "kill_used")
+    
+    def __init__(self, player_id, name=None):
+        """初始化狼殺手角色
+        
+        Args:
+            player_id (int): 玩家 ID
+            name (str, optional): 玩家名稱
+        """
+        super().__init__(player_id, name)
+        self.role_name = "狼殺手"
+        self.known_werewolves = []  # 已知的狼人 ID 列表
+        self.kill_used = False  # 整局只能擊殺一次
+    
+    def setup_knowledge(self, players):
+        """狼殺手知道所有狼人的身份
+        
+        Args:
+            players (list): 所有玩家信息（包含真實角色）
+        """
+        self.known_werewolves = [p["player_id"] for p in players if p["role"] == "werewolf"]
+    
+    async def night_action(self, game_state, api_handler):
+        """夜晚行動 - 選擇是否擊殺一名狼人（整局一次）
+        
+        Args:
+            game_state (dict): 當前遊戲狀態
+            api_handler: API 處理程序
+            
+        Returns:
+            dict: 行動結果
+        """
+        valid_ids = [p["player_id"] for p in game_state["players"]
+                     if p["is_alive"] and p["player_id"] in self.known_werewolves]
+        if self.kill_used or not valid_ids:
+            return {"action": "sleep", "target": None, "result": None}
+        
+        prompt = self._build_night_prompt(
+            game_state, api_handler, "狼殺手行動階段", valid_ids,
+            "你整局只能擊殺一次，可以選擇今晚動手，也可以等待更好的時機。"
+            "回答格式：'我選擇擊殺玩家X' 或 '今晚不行動'。",
+            notes=["以下可選目標都是狼人"]
+        )
+        
+        system_message = f"""你是一名狼人殺遊戲中的狼殺手角色，名字是{self.name}。
+你屬於村民陣營，知道所有狼人的身份，整局可以在夜晚擊殺一名狼人。
+你需要做出最有利於村民陣營的決策。"""
+        
+        response = await api_handler.get_response(prompt, system_message) or ""
+        if "不行動" in response:
+            return {"action": "sleep", "target": None, "result": None}
+        
+        target_id = self._parse_target(response, valid_ids)
+        if target_id is None:
+            return {"action": "sleep", "target": None, "result": None}
+        
+        self.kill_used = True
+        return {"action": "kill", "target": target_id, "result": None}
+    
+    def _discussion_guidance(self):
+        """白天討論的角色指引
+        
+        Returns:
+            str: 角色指引
+        """
+        return """作為狼殺手，你知道所有狼人的身份，但過早暴露會讓你成為狼人的首要目標。
+請巧妙地引導其他玩家投票給狼人，同時保護好自己。"""
@@ -1,10 +1,16 @@
 import os
 import sys
-import json
 import argparse
 from rich.console import Console
 from rich.table import Table
 
+from utils.result_index import scan_directory
+from utils.result_writer import load_result, result_state
+from utils.warehouse import Warehouse
+
+# 查詢子命令；第一個參數不是子命令時按舊用法分析單個文件
+COMMANDS = ("show", "scan", "ingest", "winrate", "days", "vote-accuracy", "stats", "survival")
+
 def analyze_game(game_file: str):
     """分析遊戲結果
     
@@ -16,9 +22,8 @@ def analyze_game(game_file: str):
         print(f"錯誤：文件 {game_file} 不存在")
         return 1
     
-    # 讀取遊戲結果
-    with open(game_file, 'r', encoding='utf-8') as f:
-        game_data = json.load(f)
+    # 讀取遊戲結果（統一結果記錄中的遊戲狀態，或舊版的遊戲狀態文件）
+    game_data = result_state(load_result(game_file))
     
     # 創建控制台對象
     console = Console()
@@ -67,16 +72,188 @@ def analyze_game(game_file: str):
     
     return 0
 
-def main():
+def scan(directory, index_path=None, workers=None):
+    """增量分析整個結果目錄並打印匯總表
+    
+    Args:
+        directory (str): 結果目錄
+        index_path (str, optional): 索引文件路徑。默認為目錄下的 .analyzer_index.json
+        workers (int, optional): 工作進程數。默認為 CPU 核心數
+    """
+    if not os.path.isdir(directory):
+        print(f"錯誤：目錄 {directory} 不存在")
+        return 1
+    
+    console = Console()
+    result = scan_directory(directory, index_path, workers)
+    aggregate = result["aggregate"]
+    
+    console.print(f"[bold cyan]===== 目錄分析：{directory} =====")
+    console.print(f"[bold]新分析：[/bold]{result['new']}　[bold]使用緩存：[/bold]{result['cached']}　"
+                  f"[bold]已移除：[/bold]{result['removed']}　[bold]無法解析：[/bold]{aggregate['errors']}")
+    
+    decided = aggregate["decided"]
+    summary_table = Table(title="匯總")
+    for column in ("遊戲數", "分出勝負", "狼人勝率", "平均天數"):
+        summary_table.add_column(column, justify="right")
+    summary_table.add_row(str(aggregate["games"]), str(decided),
+                          f"{aggregate['wolf_wins'] / decided:.1%}" if decided else "-",
+                          f"{aggregate['total_days'] / decided:.2f}" if decided else "-")
+    console.print(summary_table)
+    
+    seat_table = Table(title="模型 × 角色勝率")
+    for column in ("模型", "角色", "局數", "勝場", "勝率"):
+        seat_table.add_column(column, justify="left" if column in ("模型", "角色") else "right")
+    for model in sorted(aggregate["seats"]):
+        for role, (games, wins) in sorted(aggregate["seats"][model].items()):
+            seat_table.add_row(model, role, str(games), str(wins), f"{wins / games:.1%}")
+    console.print(seat_table)
+    
+    vote_table = Table(title="村民陣營投票準確率（投給狼人的比例）")
+    for column in ("模型", "投票數", "投中狼人", "準確率"):
+        vote_table.add_column(column, justify="left" if column == "模型" else "right")
+    for model, (votes, hits) in sorted(aggregate["votes"].items()):
+        vote_table.add_row(model, str(votes), str(hits), f"{hits / votes:.1%}" if votes else "-")
+    console.print(vote_table)
+    return 0
+
+def ingest(paths, db_path=None, replace=False):
+    """把遊戲結果導入 SQLite 結果倉庫
+    
+    Args:
+        paths (list): 結果文件、目錄或歸檔文件
+        db_path (str, optional): 數據庫路徑。默認為 game_results/warehouse.db
+        replace (bool, optional): 是否覆蓋已導入的遊戲。默認為 False
+    """
+    with Warehouse(db_path) as warehouse:
+        imported, skipped = warehouse.ingest_paths(paths, replace)
+        print(f"已導入 {imported} 局遊戲，跳過 {skipped} 局，數據庫：{warehouse.path}")
+    return 0
+
+def show_query(command, db_path=None):
+    """在結果倉庫上運行跨遊戲查詢並打印表格
+    
+    Args:
+        command (str): 查詢子命令（winrate, days 或 vote-accuracy）
+        db_path (str, optional): 數據庫路徑。默認為 game_results/warehouse.db
+    """
+    console = Console()
+    
+    with Warehouse(db_path) as warehouse:
+        if command == "winrate":
+            table = Table(title="模型 × 角色勝率")
+            for column in ("模型", "角色", "局數", "勝場", "勝率"):
+                table.add_column(column, justify="left" if column in ("模型", "角色") else "right")
+            for model, role, games, wins, rate in warehouse.win_rate_by_model_role():
+                table.add_row(model, role, str(games), str(wins), f"{rate:.1%}")
+        
+        elif command == "days":
+            table = Table(title="按設置統計的遊戲天數")
+            for column in ("玩家數", "狼人數", "特殊角色", "局數", "平均天數", "狼人勝率"):
+                table.add_column(column, justify="left" if column == "特殊角色" else "right")
+            for players, werewolves, roles, games, days, wolf_rate in warehouse.average_days():
+                table.add_row(str(players), str(werewolves), roles or "-", str(games), f"{days:.2f}", f"{wolf_rate:.1%}")
+        
+        else:
+            table = Table(title="村民陣營投票準確率（投給狼人的比例）")
+            for column in ("模型", "投票數", "投中狼人", "準確率"):
+                table.add_column(column, justify="left" if column == "模型" else "right")
+            for model, votes, hits, rate in warehouse.vote_accuracy():
+                table.add_row(model, str(votes), str(hits), f"{rate:.1%}")
+    
+    console.print(table)
+    return 0
+
+def show_stats(command, db_path=None, by=None, method="wilson"):
+    """用向量化統計引擎計算帶置信區間的勝率、投票準確率或存活曲線
+    
+    Args:
+        command (str): "stats" 或 "survival"
+        db_path (str, optional): 數據庫路徑。默認為 game_results/warehouse.db
+        by (str, optional): 分組鍵（model, role, seat 或 model_role）
+        method (str, optional): 區間方法（wilson 或 bootstrap）。默認為 "wilson"
+    """
+    # NumPy 只有統計子命令需要
+    from utils.stats import load_columns_from_warehouse, survival_curves, vote_accuracy, win_rates
+    
+    console = Console()
+    with Warehouse(db_path) as warehouse:
+        columns = load_columns_from_warehouse(warehouse.path)
+    
+    if command == "survival":
+        curves = survival_curves(columns, by or "role")
+        table = Table(title=f"存活曲線（{columns.game_count} 局）")
+        table.add_column("分組", justify="left")
+        for day in curves["days"]:
+            table.add_column(f"D{day}", justify="right")
+        for group, survival in zip(curves["group"], curves["survival"]):
+            table.add_row(group, *[f"{value:.0%}" for value in survival])
+        console.print(table)
+        return 0
+    
+    for title, result in ((f"勝率（按 {by or 'model'}，{columns.game_count} 局）", win_rates(columns, by or "model", method)),
+                          ("村民陣營投票準確率（按模型）", vote_accuracy(columns, method))):
+        table = Table(title=title)
+        for column in ("分組", "樣本", "成功", "比例", "95% 區間"):
+            table.add_column(column, justify="left" if column == "分組" else "right")
+        for i, group in enumerate(result["group"]):
+            table.add_row(group, str(result["n"][i]), str(result["successes"][i]), f"{result['rate'][i]:.1%}",
+                          f"{result['low'][i]:.1%} – {result['high'][i]:.1%}")
+        console.print(table)
+    return 0
+
+def main(argv=None):
     """主程序入口"""
+    argv = list(sys.argv[1:] if argv is None else argv)
+    
+    # 兼容舊用法：analyzer.py game.json（參數是目錄時分析整個目錄）
+    if argv and argv[0] not in COMMANDS and not argv[0].startswith("-"):
+        argv.insert(0, "scan" if os.path.isdir(argv[0]) else "show")
+    
     # 解析命令行參數
     parser = argparse.ArgumentParser(description="狼人殺遊戲結果分析器")
-    parser.add_argument("game_file", help="遊戲結果文件路徑")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    show_parser = subparsers.add_parser("show", help="分析單個遊戲結果文件")
+    show_parser.add_argument("game_file", help="遊戲結果文件路徑")
+    
+    scan_parser = subparsers.add_parser("scan", help="增量分析整個結果目錄")
+    scan_parser.add_argument("directory", help="結果目錄")
+    scan_parser.add_argument("--index", help="索引文件路徑（默認為目錄下的 .analyzer_index.json）")
+    scan_parser.add_argument("--workers", type=int, help="工作進程數（默認為 CPU 核心數）")
+    
+    ingest_parser = subparsers.add_parser("ingest", help="把遊戲結果導入 SQLite 結果倉庫")
+    ingest_parser.add_argument("paths", nargs="+", help="結果文件、目錄或歸檔文件")
+    ingest_parser.add_argument("--db", help="數據庫路徑（默認為 game_results/warehouse.db）")
+    ingest_parser.add_argument("--replace", action="store_true", help="覆蓋已導入的遊戲")
+    
+    for command, help_text in (("winrate", "按模型 × 角色統計勝率"),
+                               ("days", "按設置統計平均天數和勝率"),
+                               ("vote-accuracy", "按模型統計投票準確率")):
+        query_parser = subparsers.add_parser(command, help=help_text)
+        query_parser.add_argument("--db", help="數據庫路徑（默認為 game_results/warehouse.db）")
+    
+    stats_parser = subparsers.add_parser("stats", help="帶置信區間的勝率和投票準確率")
+    stats_parser.add_argument("--db", help="數據庫路徑（默認為 game_results/warehouse.db）")
+    stats_parser.add_argument("--by", choices=["model", "role", "seat", "model_role"], default="model", help="分組鍵")
+    stats_parser.add_argument("--method", choices=["wilson", "bootstrap"], default="wilson", help="區間方法")
+    
+    survival_parser = subparsers.add_parser("survival", help="按天的存活曲線")
+    survival_parser.add_argument("--db", help="數據庫路徑（默認為 game_results/warehouse.db）")
+    survival_parser.add_argument("--by", choices=["model", "role", "seat", "model_role"], default="role", help="分組鍵")
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
-    # 分析遊戲
-    return analyze_game(args.game_file)
+    if args.command == "show":
+        # 分析遊戲
+        return analyze_game(args.game_file)
+    if args.command == "scan":
+        return scan(args.directory, args.index, args.workers)
+    if args.command == "ingest":
+        return ingest(args.paths, args.db, args.replace)
+    if args.command in ("stats", "survival"):
+        return show_stats(args.command, args.db, args.by, getattr(args, "method", "wilson"))
+    return show_query(args.command, args.db)
 
 if __name__ == "__main__":
     # 運行主程序
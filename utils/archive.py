@@ -0,0 +1,405 @@
+"""遊戲結果歸檔格式
+
+把大量遊戲記錄按段（segment）分組壓縮到單一文件，文件末尾附帶索引，
+可以通過 mmap 隨機讀取任意一局遊戲，不需要逐個打開和解析 JSON 文件。
+
+文件佈局：
+
+    MAGIC | 段 0 | 段 1 | ... | 索引 | 尾部
+
+- 每個段是 zlib 壓縮的 JSONL，每行一局遊戲的完整記錄
+- 索引是 zlib 壓縮的 JSON，包含每個段的位置和每局遊戲的 game_id、模型、設置、獲勝者
+- 尾部固定 24 字節：索引偏移量（8 字節）、索引長度（8 字節）和 END_MAGIC
+
+用法：
+
+    python -m utils.archive pack game_results results.wwa
+    python -m utils.archive list results.wwa --model gpt-4 --winner 狼人陣營
+    python -m utils.archive unpack results.wwa output_dir
+"""
+import argparse
+import glob
+import json
+import mmap
+import os
+import struct
+import sys
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional
+
+from utils.result_writer import load_result, result_state, serialize_result, write_atomic
+
+MAGIC = b"WWARC01\n"
+END_MAGIC = b"WWARCEND"
+TRAILER = struct.Struct("<QQ")
+TRAILER_SIZE = TRAILER.size + len(END_MAGIC)
+FORMAT_VERSION = 1
+
+
+def index_entry(record: Dict[str, Any], fallback_id: str = None) -> Dict[str, Any]:
+    """從遊戲記錄中提取索引字段
+
+    支持 ResultWriter 的統一結果記錄和舊版 save_game 的遊戲狀態文件；
+    舊版文件沒有設置信息時從玩家列表推導。
+
+    Args:
+        record (Dict[str, Any]): 遊戲記錄
+        fallback_id (str, optional): 記錄中沒有 game_id 時使用的 ID。默認為 None
+
+    Returns:
+        Dict[str, Any]: 索引條目 {"game_id", "models", "config", "winner", "day"}
+    """
+    state = result_state(record)
+    players = state.get("players", [])
+    summary = record.get("summary", {})
+
+    config = dict(record.get("config") or {})
+    config.setdefault("player_count", len(players))
+    config.setdefault("werewolf_count", sum(1 for p in players if p.get("role") == "werewolf"))
+    config.setdefault("special_roles", sorted({p.get("role") for p in players} - {"villager", "werewolf"}))
+
+    models = sorted({p["model"] for p in summary.get("players", []) if p.get("model")})
+
+    return {
+        "game_id": record.get("game_id") or fallback_id,
+        "models": models,
+        "config": config,
+        "winner": state.get("winner"),
+        "day": state.get("day", 0)
+    }
+
+
+class ArchiveWriter:
+    """按段寫入歸檔文件"""
+
+    def __init__(self, path: str, segment_size: int = 256, level: int = 6):
+        """創建歸檔文件
+
+        Args:
+            path (str): 歸檔文件路徑
+            segment_size (int, optional): 每個段包含的遊戲數量。默認為 256
+            level (int, optional): zlib 壓縮等級。默認為 6
+        """
+        self.path = path
+        self.segment_size = segment_size
+        self.level = level
+        self._temp_path = path + ".part"
+        self._file = open(self._temp_path, "wb")
+        self._file.write(MAGIC)
+        self._pending = []  # 當前段的記錄行
+        self._segments = []  # [{"offset", "length", "count"}]
+        self._games = []  # 索引條目
+        self._ids = set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close()
+            os.remove(self._temp_path)
+
+    def __contains__(self, game_id):
+        return game_id in self._ids
+
+    def add(self, record: Dict[str, Any], fallback_id: str = None):
+        """添加一局遊戲
+
+        Args:
+            record (Dict[str, Any]): 遊戲記錄
+            fallback_id (str, optional): 記錄中沒有 game_id 時使用的 ID。默認為 None
+        """
+        entry = index_entry(record, fallback_id)
+        if not entry["game_id"]:
+            raise ValueError("遊戲記錄缺少 game_id")
+        if entry["game_id"] in self._ids:
+            raise ValueError(f"重複的 game_id: {entry['game_id']}")
+
+        entry["segment"] = len(self._segments)
+        entry["position"] = len(self._pending)
+        self._ids.add(entry["game_id"])
+        self._games.append(entry)
+        self._pending.append(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+
+        if len(self._pending) >= self.segment_size:
+            self._flush_segment()
+
+    def close(self):
+        """寫入最後一個段、索引和尾部，然後把文件移動到目標路徑"""
+        if self._file.closed:
+            return
+
+        self._flush_segment()
+
+        index = {"version": FORMAT_VERSION, "segments": self._segments, "games": self._games}
+        data = zlib.compress(json.dumps(index, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), self.level)
+        offset = self._file.tell()
+        self._file.write(data)
+        self._file.write(TRAILER.pack(offset, len(data)) + END_MAGIC)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        os.replace(self._temp_path, self.path)
+
+    def _flush_segment(self):
+        """壓縮並寫入當前段"""
+        if not self._pending:
+            return
+        data = zlib.compress(("\n".join(self._pending)).encode("utf-8"), self.level)
+        self._segments.append({"offset": self._file.tell(), "length": len(data), "count": len(self._pending)})
+        self._file.write(data)
+        self._pending = []
+
+
+class ArchiveReader:
+    """通過 mmap 隨機讀取歸檔文件"""
+
+    def __init__(self, path: str, cache_segments: int = 4):
+        """打開歸檔文件
+
+        Args:
+            path (str): 歸檔文件路徑
+            cache_segments (int, optional): 緩存的已解壓段數量。默認為 4
+        """
+        self.path = path
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mmap[:len(MAGIC)] != MAGIC or self._mmap[-len(END_MAGIC):] != END_MAGIC:
+            self.close()
+            raise ValueError(f"{path} 不是有效的遊戲歸檔文件")
+
+        offset, length = TRAILER.unpack(self._mmap[-TRAILER_SIZE:-len(END_MAGIC)])
+        index = json.loads(zlib.decompress(self._mmap[offset:offset + length]).decode("utf-8"))
+
+        self.segments = index["segments"]
+        self.games = index["games"]
+        self._by_id = {entry["game_id"]: entry for entry in self.games}
+        self._cache = OrderedDict()  # {段序號: 記錄行列表}
+        self._cache_size = cache_segments
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __len__(self):
+        return len(self.games)
+
+    def __contains__(self, game_id):
+        return game_id in self._by_id
+
+    def close(self):
+        """關閉文件"""
+        if not self._mmap.closed:
+            self._mmap.close()
+        self._file.close()
+
+    def find(self, model: str = None, winner: str = None, role: str = None,
+             **config) -> List[Dict[str, Any]]:
+        """按索引篩選遊戲，不解壓任何段
+
+        Args:
+            model (str, optional): 包含該模型的遊戲（部分匹配，例如 "gpt-4"）。默認為 None
+            winner (str, optional): 獲勝陣營。默認為 None
+            role (str, optional): 包含該特殊角色的遊戲。默認為 None
+            **config: 設置字段的精確匹配，例如 player_count=8
+
+        Returns:
+            List[Dict[str, Any]]: 索引條目
+        """
+        results = []
+        for entry in self.games:
+            if model is not None and not any(model in name for name in entry["models"]):
+                continue
+            if winner is not None and entry["winner"] != winner:
+                continue
+            if role is not None and role not in entry["config"].get("special_roles", []):
+                continue
+            if any(entry["config"].get(key) != value for key, value in config.items()):
+                continue
+            results.append(entry)
+        return results
+
+    def get(self, game_id: str) -> Dict[str, Any]:
+        """讀取一局遊戲的完整記錄（只解壓所在的段）
+
+        Args:
+            game_id (str): 遊戲 ID
+
+        Returns:
+            Dict[str, Any]: 遊戲記錄
+        """
+        entry = self._by_id.get(game_id)
+        if entry is None:
+            raise KeyError(f"歸檔中沒有遊戲 {game_id}")
+        return json.loads(self._segment_lines(entry["segment"])[entry["position"]])
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """按寫入順序逐段讀取所有遊戲記錄
+
+        Yields:
+            Dict[str, Any]: 遊戲記錄
+        """
+        for segment_index in range(len(self.segments)):
+            for line in self._read_segment(segment_index):
+                yield json.loads(line)
+
+    def _segment_lines(self, segment_index: int) -> List[str]:
+        """獲取段的記錄行（帶 LRU 緩存）
+
+        Args:
+            segment_index (int): 段序號
+
+        Returns:
+            List[str]: 記錄行
+        """
+        if segment_index in self._cache:
+            self._cache.move_to_end(segment_index)
+            return self._cache[segment_index]
+
+        lines = self._read_segment(segment_index)
+        self._cache[segment_index] = lines
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+        return lines
+
+    def _read_segment(self, segment_index: int) -> List[str]:
+        """解壓一個段
+
+        Args:
+            segment_index (int): 段序號
+
+        Returns:
+            List[str]: 記錄行
+        """
+        segment = self.segments[segment_index]
+        data = zlib.decompress(self._mmap[segment["offset"]:segment["offset"] + segment["length"]])
+        return data.decode("utf-8").split("\n")
+
+
+def result_files(source: str) -> List[str]:
+    """列出目錄中的遊戲結果文件（不包含日誌和臨時文件）
+
+    Args:
+        source (str): 目錄或單個文件路徑
+
+    Returns:
+        List[str]: 文件路徑
+    """
+    if os.path.isfile(source):
+        return [source]
+    paths = glob.glob(os.path.join(source, "*.json")) + glob.glob(os.path.join(source, "*.json.gz"))
+    return sorted(path for path in paths if not os.path.basename(path).startswith("."))
+
+
+def file_game_id(path: str) -> str:
+    """從文件名推導遊戲 ID（舊版文件沒有 game_id）
+
+    Args:
+        path (str): 文件路徑
+
+    Returns:
+        str: 遊戲 ID
+    """
+    name = os.path.basename(path)
+    for suffix in (".json.gz", ".json"):
+        if name.endswith(suffix):
+            name = name[:-len(suffix)]
+    return name[len("game_"):] if name.startswith("game_") else name
+
+
+def pack(sources: List[str], archive_path: str, segment_size: int = 256) -> int:
+    """把 JSON 遊戲結果文件打包為歸檔
+
+    Args:
+        sources (List[str]): 目錄或文件路徑
+        archive_path (str): 歸檔文件路徑
+        segment_size (int, optional): 每個段包含的遊戲數量。默認為 256
+
+    Returns:
+        int: 打包的遊戲數量
+    """
+    count = 0
+    with ArchiveWriter(archive_path, segment_size) as writer:
+        for source in sources:
+            for path in result_files(source):
+                try:
+                    record = load_result(path)
+                except (OSError, ValueError) as e:
+                    print(f"跳過無法讀取的文件 {path}：{e}")
+                    continue
+                game_id = record.get("game_id") or file_game_id(path)
+                if game_id in writer:
+                    print(f"跳過重複的遊戲 {game_id}：{path}")
+                    continue
+                writer.add(record, game_id)
+                count += 1
+    return count
+
+
+def unpack(archive_path: str, output_dir: str, compress: bool = False) -> int:
+    """把歸檔還原為單獨的 JSON 遊戲結果文件
+
+    Args:
+        archive_path (str): 歸檔文件路徑
+        output_dir (str): 輸出目錄
+        compress (bool, optional): 是否輸出 gzip 壓縮文件。默認為 False
+
+    Returns:
+        int: 還原的遊戲數量
+    """
+    count = 0
+    suffix = ".json.gz" if compress else ".json"
+    with ArchiveReader(archive_path) as reader:
+        for entry, record in zip(reader.games, reader):
+            path = os.path.join(output_dir, f"game_{entry['game_id']}{suffix}")
+            write_atomic(path, serialize_result(record, compress))
+            count += 1
+    return count
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="狼人殺遊戲結果歸檔工具")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    pack_parser = subparsers.add_parser("pack", help="把 JSON 結果文件打包為歸檔")
+    pack_parser.add_argument("sources", nargs="+", help="結果目錄或文件")
+    pack_parser.add_argument("archive", help="輸出的歸檔文件")
+    pack_parser.add_argument("--segment-size", type=int, default=256, help="每個段包含的遊戲數量")
+
+    unpack_parser = subparsers.add_parser("unpack", help="把歸檔還原為 JSON 結果文件")
+    unpack_parser.add_argument("archive", help="歸檔文件")
+    unpack_parser.add_argument("output_dir", help="輸出目錄")
+    unpack_parser.add_argument("--compress", action="store_true", help="輸出 gzip 壓縮文件")
+
+    list_parser = subparsers.add_parser("list", help="按索引列出歸檔中的遊戲")
+    list_parser.add_argument("archive", help="歸檔文件")
+    list_parser.add_argument("--model", help="只列出包含該模型的遊戲")
+    list_parser.add_argument("--winner", help="只列出該陣營獲勝的遊戲")
+    list_parser.add_argument("--role", help="只列出包含該特殊角色的遊戲")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "pack":
+        count = pack(args.sources, args.archive, args.segment_size)
+        print(f"已打包 {count} 局遊戲到 {args.archive}")
+    elif args.command == "unpack":
+        count = unpack(args.archive, args.output_dir, args.compress)
+        print(f"已還原 {count} 局遊戲到 {args.output_dir}")
+    else:
+        with ArchiveReader(args.archive) as reader:
+            entries = reader.find(model=args.model, winner=args.winner, role=args.role)
+            for entry in entries:
+                print(f"{entry['game_id']}\t第{entry['day']}天\t{entry['winner'] or '未結束'}\t{', '.join(entry['models']) or '-'}")
+            print(f"共 {len(entries)} / {len(reader)} 局")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
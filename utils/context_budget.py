@@ -0,0 +1,222 @@
+"""提示上下文的 token 預算管理
+
+根據模型的上下文窗口與成本配置，為每次 LLM 調用挑選最重要的遊戲事件，
+使提示長度不隨玩家數量和遊戲天數無限增長。
+"""
+import math
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from .text_utils import detect_role_claim
+
+# 模型配置：上下文窗口（token）、每百萬 token 成本（美元）、每次調用的提示預算（token）
+# 昂貴的模型使用較緊的預算，便宜的模型可以放入更多上下文
+MODEL_PROFILES = {
+    "gpt-4": {"context_window": 8192, "input_cost": 30.0, "output_cost": 60.0, "prompt_budget": 2000},
+    "gpt-4-32k": {"context_window": 32768, "input_cost": 60.0, "output_cost": 120.0, "prompt_budget": 2000},
+    "gpt-4-turbo": {"context_window": 128000, "input_cost": 10.0, "output_cost": 30.0, "prompt_budget": 3000},
+    "gpt-4o": {"context_window": 128000, "input_cost": 2.5, "output_cost": 10.0, "prompt_budget": 4000},
+    "gpt-4o-mini": {"context_window": 128000, "input_cost": 0.15, "output_cost": 0.6, "prompt_budget": 6000},
+    "gpt-3.5-turbo": {"context_window": 16385, "input_cost": 0.5, "output_cost": 1.5, "prompt_budget": 4000},
+    "claude-3-opus": {"context_window": 200000, "input_cost": 15.0, "output_cost": 75.0, "prompt_budget": 2500},
+    "claude-3-sonnet": {"context_window": 200000, "input_cost": 3.0, "output_cost": 15.0, "prompt_budget": 4000},
+    "claude-3-haiku": {"context_window": 200000, "input_cost": 0.25, "output_cost": 1.25, "prompt_budget": 6000},
+    "claude-3.5-sonnet": {"context_window": 200000, "input_cost": 3.0, "output_cost": 15.0, "prompt_budget": 4000},
+    "claude-3.7-sonnet": {"context_window": 200000, "input_cost": 3.0, "output_cost": 15.0, "prompt_budget": 4000},
+}
+
+# 未知模型（包括人類玩家）使用的默認配置
+DEFAULT_PROFILE = {"context_window": 8192, "input_cost": 0.0, "output_cost": 0.0, "prompt_budget": 3000}
+
+# 事件優先級：死亡與放逐 > 查驗結果 > 身份聲明 > 討論摘要 > 自己的夜間行動 > 投票 > 發言
+EVENT_PRIORITIES = {
+    "death": 100,
+    "exile": 100,
+    "check": 90,
+    "claim": 80,
+    "summary": 70,
+    "action": 60,
+    "vote": 50,
+    "speech": 30,
+    "other": 20
+}
+
+# 越新的事件額外加分的上限
+RECENCY_BONUS = 25
+
+# 上下文部分至少保留的 token 數
+MIN_CONTEXT_TOKENS = 200
+
+_CJK_CHARS = re.compile(r'[\u2e80-\u9fff\uf900-\ufaff\uff00-\uffef\u3000-\u303f]')
+
+
+def estimate_tokens(text: str) -> int:
+    """估算文本的 token 數
+
+    中文字符（含全形標點）在常見的分詞器中通常佔 1-2 個 token，這裡按 1.5 保守估算；
+    其他字符按每 4 個字符 1 個 token 估算。
+
+    Args:
+        text (str): 文本
+
+    Returns:
+        int: 估算的 token 數
+    """
+    if not text:
+        return 0
+    cjk_count = len(_CJK_CHARS.findall(text))
+    other_count = len(text) - cjk_count
+    return math.ceil(cjk_count * 1.5 + other_count / 4)
+
+
+def get_model_profile(model_name: Optional[str]) -> Dict[str, Any]:
+    """獲取模型配置，按最長前綴匹配（例如 claude-3-opus-20240229 匹配 claude-3-opus）
+
+    Args:
+        model_name (Optional[str]): 模型名稱
+
+    Returns:
+        Dict[str, Any]: 模型配置
+    """
+    if not model_name:
+        return DEFAULT_PROFILE
+
+    matches = [key for key in MODEL_PROFILES if model_name.startswith(key)]
+    if not matches:
+        return DEFAULT_PROFILE
+    return MODEL_PROFILES[max(matches, key=len)]
+
+
+def classify_event(event: str) -> str:
+    """按遊戲引擎寫入的歷史記錄格式對事件分類
+
+    Args:
+        event (str): 歷史事件描述
+
+    Returns:
+        str: 事件類型，見 EVENT_PRIORITIES
+    """
+    # 摘要和發言內容可能包含任意關鍵字，先判斷這兩類
+    if "討論摘要" in event:
+        return "summary"
+    if "說：" in event:
+        return "claim" if detect_role_claim(event) else "speech"
+    if "被放逐" in event:
+        return "exile"
+    if "被殺死" in event or "死亡" in event:
+        return "death"
+    if "查驗" in event:
+        return "check"
+    if "投票" in event:
+        return "vote"
+    if "你選擇" in event:
+        return "action"
+    return "other"
+
+
+class ContextBudgeter:
+    """按優先級和 token 預算挑選提示中的上下文事件"""
+
+    def __init__(self, model_name: Optional[str] = None, prompt_budget: Optional[int] = None):
+        """初始化上下文預算器
+
+        Args:
+            model_name (Optional[str]): 模型名稱。默認為 None（使用默認配置）
+            prompt_budget (Optional[int]): 每次調用的提示 token 預算。默認使用模型配置，
+                可通過環境變量 CONTEXT_TOKEN_BUDGET 設置上限
+        """
+        self.model_name = model_name
+        self.profile = get_model_profile(model_name)
+
+        if prompt_budget is None:
+            prompt_budget = self.profile["prompt_budget"]
+            env_budget = os.getenv("CONTEXT_TOKEN_BUDGET")
+            if env_budget:
+                prompt_budget = min(prompt_budget, int(env_budget))
+        self.prompt_budget = prompt_budget
+
+    @classmethod
+    def for_handler(cls, api_handler) -> "ContextBudgeter":
+        """為 API 處理程序創建預算器（沒有 model 屬性的處理程序使用默認配置）
+
+        Args:
+            api_handler: API 處理程序
+
+        Returns:
+            ContextBudgeter: 上下文預算器
+        """
+        return cls(getattr(api_handler, "model", None))
+
+    def get_context_budget(self, reserved_tokens: int = 0, max_output_tokens: int = 500) -> int:
+        """計算可用於上下文事件的 token 數
+
+        Args:
+            reserved_tokens (int, optional): 提示中固定部分已佔用的 token 數。默認為 0
+            max_output_tokens (int, optional): 預留給回應的 token 數。默認為 500
+
+        Returns:
+            int: 上下文 token 預算
+        """
+        window_left = self.profile["context_window"] - max_output_tokens - reserved_tokens
+        budget = min(self.prompt_budget - reserved_tokens, window_left)
+        return max(budget, min(MIN_CONTEXT_TOKENS, window_left))
+
+    def estimate_cost(self, prompt_tokens: int, completion_tokens: int = 0) -> float:
+        """估算一次調用的成本（美元）
+
+        Args:
+            prompt_tokens (int): 提示 token 數
+            completion_tokens (int, optional): 回應 token 數。默認為 0
+
+        Returns:
+            float: 估算成本
+        """
+        return (prompt_tokens * self.profile["input_cost"] +
+                completion_tokens * self.profile["output_cost"]) / 1_000_000
+
+    def select_context(self, history: List[str], discussions: List[Dict[str, Any]],
+                       reserved_tokens: int = 0, max_output_tokens: int = 500,
+                       skip_history_kinds: Tuple[str, ...] = ()) -> Tuple[List[str], List[str], int]:
+        """在預算內挑選歷史事件和今天的討論
+
+        先按優先級（死亡、放逐、查驗、身份聲明、投票、最近發言）貪心選取，
+        再按原本的時間順序輸出。
+
+        Args:
+            history (List[str]): 玩家的歷史記錄
+            discussions (List[Dict[str, Any]]): 今天的討論 [{"player_id", "player_name", "content"}]
+            reserved_tokens (int, optional): 提示固定部分的 token 數。默認為 0
+            max_output_tokens (int, optional): 預留給回應的 token 數。默認為 500
+            skip_history_kinds (Tuple[str, ...], optional): 不從歷史記錄中選取的事件類型，
+                例如提示中已有公開信息表時跳過舊發言。默認為 ()
+
+        Returns:
+            Tuple[List[str], List[str], int]: (選中的歷史事件, 選中的討論行, 省略的條數)
+        """
+        lines = [("history", event) for event in history
+                 if not skip_history_kinds or classify_event(event) not in skip_history_kinds]
+        for discussion in discussions:
+            line = f"{discussion['player_name']}（玩家{discussion['player_id']}）說：「{discussion['content']}」"
+            lines.append(("discussion", line))
+
+        total = len(lines)
+        candidates = []
+        for index, (section, line) in enumerate(lines):
+            kind = classify_event(line)
+            score = EVENT_PRIORITIES[kind] + RECENCY_BONUS * (index + 1) / total
+            candidates.append((score, index, estimate_tokens(line) + 2))
+
+        budget = self.get_context_budget(reserved_tokens, max_output_tokens)
+        used = 0
+        selected = set()
+        for score, index, tokens in sorted(candidates, key=lambda c: (-c[0], -c[1])):
+            if used + tokens <= budget:
+                selected.add(index)
+                used += tokens
+
+        history_lines = [line for index, (section, line) in enumerate(lines)
+                         if index in selected and section == "history"]
+        discussion_lines = [line for index, (section, line) in enumerate(lines)
+                            if index in selected and section == "discussion"]
+        return history_lines, discussion_lines, total - len(selected)
@@ -0,0 +1,97 @@
+import argparse
+import subprocess
+import sys
+from typing import Dict, List, Optional
+
+from rich.console import Console
+from rich.table import Table
+
+# 默認檢查的入口模塊
+DEFAULT_MODULES = ("game", "game.engine_process", "gui.app")
+
+# 導入較慢的第三方套件，出現在入口模塊的導入鏈中時標記出來
+HEAVY_PACKAGES = ("openai", "anthropic", "customtkinter", "PIL", "numpy", "rich", "httpx", "pydantic")
+
+
+def measure_imports(module: str) -> List[Dict[str, object]]:
+    """在新的解釋器中導入模塊並收集 -X importtime 的結果
+
+    Args:
+        module (str): 模塊名
+
+    Returns:
+        List[Dict[str, object]]: 每個被導入的模塊一項，包含 module、self_us、cumulative_us 和 depth，
+            按導入完成的順序排列
+
+    Raises:
+        RuntimeError: 導入失敗
+    """
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          capture_output=True, text=True)
+    rows = []
+    errors = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            errors.append(line)
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # 表頭
+        name = parts[2].rstrip()
+        rows.append({
+            "module": name.strip(),
+            "self_us": int(parts[0]),
+            "cumulative_us": int(parts[1]),
+            "depth": (len(name) - len(name.lstrip())) // 2,
+        })
+    if proc.returncode != 0:
+        raise RuntimeError("\n".join(errors[-5:]) or f"導入 {module} 失敗")
+    return rows
+
+
+def heavy_imports(rows: List[Dict[str, object]]) -> Dict[str, int]:
+    """找出導入鏈中的較慢第三方套件
+
+    Args:
+        rows (List[Dict[str, object]]): measure_imports 的結果
+
+    Returns:
+        Dict[str, int]: {套件名: 累計導入時間（微秒）}
+    """
+    return {row["module"]: row["cumulative_us"] for row in rows if row["module"] in HEAVY_PACKAGES}
+
+
+def main(argv=None):
+    """命令行入口：python -m utils.import_report [模塊 ...] --top 15"""
+    parser = argparse.ArgumentParser(description="報告入口模塊的導入時間，檢查啟動時是否導入了不需要的套件")
+    parser.add_argument("modules", nargs="*", default=list(DEFAULT_MODULES), help="要檢查的模塊")
+    parser.add_argument("--top", type=int, default=15, help="每個模塊列出累計時間最長的子模塊數")
+    args = parser.parse_args(argv)
+
+    console = Console()
+    status = 0
+    for module in args.modules:
+        try:
+            rows = measure_imports(module)
+        except RuntimeError as e:
+            console.print(f"[bold red]{module}：導入失敗[/bold red]\n{e}")
+            status = 1
+            continue
+
+        total = next((row["cumulative_us"] for row in reversed(rows) if row["module"] == module), 0)
+        table = Table(title=f"{module}（共 {total / 1000:.1f} ms，導入 {len(rows)} 個模塊）")
+        for column in ("模塊", "自身 (ms)", "累計 (ms)"):
+            table.add_column(column, justify="left" if column == "模塊" else "right")
+        for row in sorted(rows, key=lambda row: row["cumulative_us"], reverse=True)[:args.top]:
+            table.add_row(row["module"], f"{row['self_us'] / 1000:.1f}", f"{row['cumulative_us'] / 1000:.1f}")
+        console.print(table)
+
+        heavy = heavy_imports(rows)
+        if heavy:
+            console.print("[yellow]導入時載入的較慢套件：[/yellow]" +
+                          "，".join(f"{name} {us / 1000:.1f} ms" for name, us in heavy.items()))
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
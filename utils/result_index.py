@@ -0,0 +1,233 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+
+from utils.archive import result_files
+from utils.result_writer import load_result, result_state, serialize_result, write_atomic
+
+INDEX_VERSION = 1
+SAVE_EVERY = 200  # 每處理這麼多文件保存一次索引，中斷後不會丟失已完成的進度
+
+
+def empty_aggregate() -> Dict[str, Any]:
+    """創建空的聚合結果
+
+    Returns:
+        Dict[str, Any]: 聚合結果
+    """
+    return {
+        "games": 0,  # 遊戲數
+        "decided": 0,  # 分出勝負的遊戲數
+        "wolf_wins": 0,  # 狼人陣營獲勝的遊戲數
+        "total_days": 0,  # 分出勝負的遊戲的天數總和
+        "seats": {},  # {model: {role: [局數, 勝場]}}
+        "votes": {},  # {model: [村民陣營投票數, 投中狼人數]}
+        "errors": 0  # 無法解析的文件數
+    }
+
+
+def summarize_file(path: str) -> Tuple[str, float, int, Dict[str, Any]]:
+    """解析一個結果文件並計算它的部分聚合結果（在工作進程中運行）
+
+    Args:
+        path (str): 文件路徑
+
+    Returns:
+        Tuple[str, float, int, Dict[str, Any]]: (路徑, 修改時間, 文件大小, 部分聚合結果)
+    """
+    stat = os.stat(path)
+    try:
+        partial = _summarize_record(load_result(path))
+    except (OSError, ValueError, AttributeError, KeyError, TypeError):
+        # 無法讀取或結構不符的文件只計入錯誤數，不中斷整個掃描
+        partial = empty_aggregate()
+        partial["errors"] = 1
+    return path, stat.st_mtime, stat.st_size, partial
+
+
+def _summarize_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    """計算一條結果記錄的部分聚合結果
+
+    Args:
+        record (Dict[str, Any]): 結果記錄
+
+    Returns:
+        Dict[str, Any]: 部分聚合結果
+
+    Raises:
+        ValueError: 記錄不是 JSON 對象
+    """
+    if not isinstance(record, dict):
+        raise ValueError("結果記錄不是 JSON 對象")
+
+    partial = empty_aggregate()
+    state = result_state(record)
+    summary = record.get("summary", record)
+    models = {p["player_id"]: p.get("model") or "未知" for p in summary.get("players", [])}
+    players = state.get("players") or summary.get("players", [])
+    winner = state.get("winner", summary.get("winner"))
+    werewolves = {p["player_id"] for p in players if p["role"] == "werewolf"}
+
+    partial["games"] = 1
+    if winner:
+        partial["decided"] = 1
+        partial["wolf_wins"] = int(winner == "狼人陣營")
+        partial["total_days"] = state.get("day", summary.get("day", 0))
+
+        for player in players:
+            team = "狼人陣營" if player["player_id"] in werewolves else "村民陣營"
+            counts = partial["seats"].setdefault(models.get(player["player_id"], "未知"), {}) \
+                .setdefault(player["role"], [0, 0])
+            counts[0] += 1
+            counts[1] += int(team == winner)
+
+    for voter_id, row in (state.get("public_facts") or {}).items():
+        voter_id = int(voter_id)
+        if voter_id in werewolves or not row.get("votes"):
+            continue
+        counts = partial["votes"].setdefault(models.get(voter_id, "未知"), [0, 0])
+        for target_id in row.get("votes", {}).values():
+            counts[0] += 1
+            counts[1] += int(target_id in werewolves)
+
+    return partial
+
+
+def merge_aggregate(total: Dict[str, Any], partial: Dict[str, Any]):
+    """把部分聚合結果合併到總結果中
+
+    Args:
+        total (Dict[str, Any]): 總聚合結果（就地修改）
+        partial (Dict[str, Any]): 部分聚合結果
+    """
+    for key in ("games", "decided", "wolf_wins", "total_days", "errors"):
+        total[key] += partial[key]
+
+    for model, roles in partial["seats"].items():
+        model_counts = total["seats"].setdefault(model, {})
+        for role, (games, wins) in roles.items():
+            counts = model_counts.setdefault(role, [0, 0])
+            counts[0] += games
+            counts[1] += wins
+
+    for model, (votes, hits) in partial["votes"].items():
+        counts = total["votes"].setdefault(model, [0, 0])
+        counts[0] += votes
+        counts[1] += hits
+
+
+class ResultIndex:
+    """記錄已分析文件的修改時間和部分聚合結果，重新分析時只處理新的或變更的文件"""
+
+    def __init__(self, path: str):
+        """加載索引文件（不存在或版本不符時從空索引開始）
+
+        Args:
+            path (str): 索引文件路徑
+        """
+        self.path = path
+        self.entries = {}  # {文件名: {"mtime", "size", "partial"}}
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") == INDEX_VERSION:
+                    self.entries = data.get("entries", {})
+            except (OSError, ValueError):
+                self.entries = {}
+
+    def is_current(self, name: str, stat: os.stat_result) -> bool:
+        """檢查文件是否已經以當前的內容被分析過
+
+        Args:
+            name (str): 文件名
+            stat (os.stat_result): 文件狀態
+
+        Returns:
+            bool: 是否不需要重新分析
+        """
+        entry = self.entries.get(name)
+        return entry is not None and entry["mtime"] == stat.st_mtime and entry["size"] == stat.st_size
+
+    def update(self, name: str, mtime: float, size: int, partial: Dict[str, Any]):
+        """記錄文件的分析結果
+
+        Args:
+            name (str): 文件名
+            mtime (float): 修改時間
+            size (int): 文件大小
+            partial (Dict[str, Any]): 部分聚合結果
+        """
+        self.entries[name] = {"mtime": mtime, "size": size, "partial": partial}
+
+    def save(self):
+        """原子地保存索引"""
+        write_atomic(self.path, serialize_result({"version": INDEX_VERSION, "entries": self.entries}))
+
+
+def scan_directory(directory: str, index_path: Optional[str] = None, workers: Optional[int] = None,
+                   progress=None) -> Dict[str, Any]:
+    """增量分析整個結果目錄
+
+    只有新增或修改過的文件會被重新解析（在進程池中流式處理），其餘文件直接使用索引中
+    緩存的部分聚合結果，因此耗時與新遊戲的數量成正比。
+
+    Args:
+        directory (str): 結果目錄
+        index_path (Optional[str], optional): 索引文件路徑。默認為目錄下的 .analyzer_index.json
+        workers (Optional[int], optional): 工作進程數。默認為 CPU 核心數
+        progress (callable, optional): 每處理完一個文件時調用 progress(已完成數, 待處理數)。默認為 None
+
+    Returns:
+        Dict[str, Any]: {"aggregate": 總聚合結果, "new": 新分析的文件數, "cached": 使用緩存的文件數,
+                         "removed": 已刪除的文件數}
+    """
+    index = ResultIndex(index_path or os.path.join(directory, ".analyzer_index.json"))
+
+    pending = []
+    current = set()
+    for path in result_files(directory):
+        name = os.path.basename(path)
+        current.add(name)
+        if not index.is_current(name, os.stat(path)):
+            pending.append(path)
+
+    removed = [name for name in index.entries if name not in current]
+    for name in removed:
+        del index.entries[name]
+
+    if pending:
+        # 文件很少時不值得啟動進程池
+        if len(pending) < 8 or workers == 1:
+            results = map(summarize_file, pending)
+            executor = None
+        else:
+            executor = ProcessPoolExecutor(max_workers=workers)
+            chunksize = max(1, min(64, len(pending) // ((workers or os.cpu_count() or 1) * 4)))
+            results = executor.map(summarize_file, pending, chunksize=chunksize)
+
+        try:
+            for done, (path, mtime, size, partial) in enumerate(results, 1):
+                index.update(os.path.basename(path), mtime, size, partial)
+                if done % SAVE_EVERY == 0:
+                    index.save()
+                if progress:
+                    progress(done, len(pending))
+        finally:
+            if executor:
+                executor.shutdown()
+
+    if pending or removed:
+        index.save()
+
+    aggregate = empty_aggregate()
+    for entry in index.entries.values():
+        merge_aggregate(aggregate, entry["partial"])
+
+    return {
+        "aggregate": aggregate,
+        "new": len(pending),
+        "cached": len(current) - len(pending),
+        "removed": len(removed)
+    }
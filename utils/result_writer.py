@@ -0,0 +1,243 @@
+import atexit
+import datetime
+import gzip
+import json
+import logging
+import os
+import queue
+import tempfile
+import threading
+import uuid
+from typing import Any, Dict, Optional
+
+
+def new_game_id() -> str:
+    """生成唯一的遊戲 ID（時間前綴便於排序，隨機後綴避免並行遊戲衝突）
+
+    Returns:
+        str: 遊戲 ID，例如 "20250322_123456_1a2b3c4d5e6f"
+    """
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    return f"{timestamp}_{uuid.uuid4().hex[:12]}"
+
+
+def serialize_result(record: Dict[str, Any], compress: bool = False, indent: Optional[int] = None) -> bytes:
+    """把結果記錄序列化為字節
+
+    Args:
+        record (Dict[str, Any]): 結果記錄
+        compress (bool, optional): 是否使用 gzip 壓縮。默認為 False
+        indent (Optional[int], optional): JSON 縮進，None 表示緊湊輸出。默認為 None
+
+    Returns:
+        bytes: 序列化後的數據
+    """
+    separators = (",", ":") if indent is None else None
+    data = json.dumps(record, ensure_ascii=False, indent=indent, separators=separators).encode("utf-8")
+    if compress:
+        # mtime=0 使相同內容的壓縮結果一致
+        data = gzip.compress(data, mtime=0)
+    return data
+
+
+def write_atomic(path: str, data: bytes):
+    """原子地寫入文件：先寫入同目錄的臨時文件，落盤後再重命名
+
+    讀取者只會看到完整的舊文件或完整的新文件。
+
+    Args:
+        path (str): 目標文件路徑
+        data (bytes): 文件內容
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".tmp_", suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def load_result(path: str) -> Dict[str, Any]:
+    """讀取結果文件（自動識別 gzip 壓縮）
+
+    Args:
+        path (str): 文件路徑
+
+    Returns:
+        Dict[str, Any]: 結果記錄
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"文件 {path} 不存在")
+
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[:2] == b"\x1f\x8b":
+        data = gzip.decompress(data)
+    return json.loads(data.decode("utf-8"))
+
+
+def result_state(record: Dict[str, Any]) -> Dict[str, Any]:
+    """從結果記錄中取出遊戲狀態（兼容舊版直接保存遊戲狀態的文件）
+
+    Args:
+        record (Dict[str, Any]): 結果記錄
+
+    Returns:
+        Dict[str, Any]: 遊戲狀態數據
+    """
+    return record["state"] if "state" in record and "game_id" in record else record
+
+
+class ResultWriteError(OSError):
+    """後台線程寫入結果文件失敗（由 flush 或 close 拋出）"""
+
+    def __init__(self, failures):
+        """初始化
+
+        Args:
+            failures (List[Tuple[str, Exception]]): 寫入失敗的記錄 [(path, error)]
+        """
+        self.failures = failures
+        super().__init__("保存遊戲結果失敗：" + "；".join(f"{path}：{error}" for path, error in failures))
+
+
+class ResultWriter:
+    """在後台線程中序列化並寫入遊戲結果，不阻塞遊戲的事件循環
+
+    多個並行的遊戲可以共享同一個寫入器（見 get_result_writer）。
+    """
+
+    def __init__(self, results_dir: str = None, compress: bool = None, indent: Optional[int] = None):
+        """初始化結果寫入器
+
+        Args:
+            results_dir (str, optional): 結果目錄。默認為當前目錄下的 game_results
+            compress (bool, optional): 是否使用 gzip 壓縮輸出。默認使用環境變量 COMPRESS_RESULTS
+            indent (Optional[int], optional): JSON 縮進，None 表示緊湊輸出。默認為 None
+        """
+        if compress is None:
+            compress = os.getenv("COMPRESS_RESULTS", "0").lower() in ("1", "true", "yes")
+
+        self.results_dir = results_dir or os.path.join(os.getcwd(), "game_results")
+        self.compress = compress
+        self.indent = indent
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.errors = []  # 寫入失敗的記錄 [(path, error)]
+        self._reported = 0  # 已由 flush 或 close 拋出的失敗數
+
+    def path_for(self, game_id: str) -> str:
+        """獲取遊戲結果的文件路徑
+
+        Args:
+            game_id (str): 遊戲 ID
+
+        Returns:
+            str: 文件路徑
+        """
+        suffix = ".json.gz" if self.compress else ".json"
+        return os.path.join(self.results_dir, f"game_{game_id}{suffix}")
+
+    def submit(self, record: Dict[str, Any], path: str = None) -> str:
+        """提交一條結果記錄，立即返回，序列化和寫入在後台線程完成
+
+        調用者不應再修改 record 的內容。
+
+        Args:
+            record (Dict[str, Any]): 結果記錄，需包含 game_id
+            path (str, optional): 目標文件路徑。默認按 game_id 生成
+
+        Returns:
+            str: 目標文件路徑
+        """
+        path = path or self.path_for(record["game_id"])
+        self._ensure_thread()
+        self._queue.put((path, record))
+        return path
+
+    def flush(self):
+        """等待所有已提交的記錄寫入完成
+
+        Raises:
+            ResultWriteError: 上一次 flush 或 close 之後有記錄寫入失敗
+        """
+        self._queue.join()
+        self._raise_errors()
+
+    def close(self, raise_errors: bool = True):
+        """寫入剩餘記錄並停止後台線程
+
+        Args:
+            raise_errors (bool, optional): 是否拋出尚未報告的寫入失敗。默認為 True
+
+        Raises:
+            ResultWriteError: 上一次 flush 或 close 之後有記錄寫入失敗
+        """
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread:
+            self._queue.put(None)
+            thread.join()
+        if raise_errors:
+            self._raise_errors()
+
+    def _raise_errors(self):
+        """拋出尚未報告的寫入失敗"""
+        with self._lock:
+            failures = self.errors[self._reported:]
+            self._reported = len(self.errors)
+        if failures:
+            raise ResultWriteError(failures)
+
+    def _ensure_thread(self):
+        """按需啟動後台線程"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="ResultWriter", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        """後台線程：依次序列化並原子寫入"""
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                path, record = item
+                try:
+                    write_atomic(path, serialize_result(record, self.compress, self.indent))
+                except Exception as e:
+                    logging.exception("保存遊戲結果失敗：%s", path)
+                    with self._lock:
+                        self.errors.append((path, e))
+            finally:
+                self._queue.task_done()
+
+
+_default_writer = None
+_default_writer_lock = threading.Lock()
+
+
+def get_result_writer() -> ResultWriter:
+    """獲取進程內共享的結果寫入器
+
+    Returns:
+        ResultWriter: 結果寫入器
+    """
+    global _default_writer
+    with _default_writer_lock:
+        if _default_writer is None:
+            _default_writer = ResultWriter()
+            # 進程退出前寫完所有已提交的結果（失敗已寫入日誌，退出時不再拋出）
+            atexit.register(_default_writer.close, raise_errors=False)
+        return _default_writer
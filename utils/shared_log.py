@@ -0,0 +1,69 @@
+from itertools import islice
+from typing import Any, Iterator, List, Sequence
+
+
+class SharedLog:
+    """只追加的序列，與分叉來源共享已有的前綴
+
+    分叉時只記錄來源序列和當時的長度（O(1)），之後雙方各自追加，互不可見。遊戲日誌和玩家
+    歷史記錄只會追加，因此來源可以是普通列表，也可以是另一個 SharedLog（多次分叉形成鏈）。
+    """
+
+    __slots__ = ("_parent", "_parent_len", "_items")
+
+    def __init__(self, parent: Sequence[Any] = (), items: List[Any] = None):
+        """初始化
+
+        Args:
+            parent (Sequence[Any], optional): 共享的來源序列，只使用其當前長度以內的部分。默認為空
+            items (List[Any], optional): 自己追加的元素。默認為空
+        """
+        self._parent = parent
+        self._parent_len = len(parent)
+        self._items = items if items is not None else []
+
+    @classmethod
+    def fork(cls, sequence: Sequence[Any]) -> "SharedLog":
+        """創建共享 sequence 當前內容的分叉
+
+        Args:
+            sequence (Sequence[Any]): 列表或 SharedLog
+
+        Returns:
+            SharedLog: 新的分叉
+        """
+        return cls(sequence)
+
+    def append(self, item: Any):
+        """追加元素"""
+        self._items.append(item)
+
+    def extend(self, items):
+        """追加多個元素"""
+        self._items.extend(items)
+
+    def __len__(self) -> int:
+        return self._parent_len + len(self._items)
+
+    def __iter__(self) -> Iterator[Any]:
+        yield from islice(self._parent, self._parent_len)
+        yield from self._items
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self)[index]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("SharedLog index out of range")
+        if index < self._parent_len:
+            return self._parent[index]
+        return self._items[index - self._parent_len]
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (list, SharedLog)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"SharedLog({list(self)!r})"
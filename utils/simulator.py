@@ -0,0 +1,396 @@
+import argparse
+import itertools
+import sys
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from utils.stats import wilson_interval
+
+# 角色編碼
+VILLAGER, WEREWOLF, SEER, WITCH, GUARD = range(5)
+ROLE_CODES = {"villager": VILLAGER, "werewolf": WEREWOLF, "seer": SEER, "witch": WITCH, "guard": GUARD}
+
+# 模擬器實現了規則的特殊角色（其他角色的技能沒有建模）
+SIMULATED_ROLES = ("seer", "witch", "guard")
+POLICIES = ("random", "heuristic")
+
+# 勝負編碼
+UNDECIDED, VILLAGE_WIN, WEREWOLF_WIN = 0, 1, 2
+
+# 隨機策略下女巫使用藥水的概率
+RANDOM_SAVE_RATE = 0.5
+RANDOM_POISON_RATE = 0.2
+
+
+def validate_config(player_count: int, werewolf_count: int, special_roles: Sequence[str]):
+    """按 GameState.setup_game 的規則檢查遊戲設置
+
+    Args:
+        player_count (int): 玩家數量
+        werewolf_count (int): 狼人數量
+        special_roles (Sequence[str]): 特殊角色列表
+
+    Raises:
+        ValueError: 設置無效或包含無法模擬的角色
+    """
+    if player_count < 4:
+        raise ValueError("玩家數量必須至少為4")
+    if werewolf_count < 1 or werewolf_count >= player_count // 2:
+        raise ValueError(f"狼人數量必須在1到{player_count // 2 - 1}之間")
+    if len(special_roles) > player_count - werewolf_count - 1:
+        raise ValueError("特殊角色數量過多")
+    for role in special_roles:
+        if role not in SIMULATED_ROLES:
+            raise ValueError(f"模擬器不支持角色: {role}（支持 {', '.join(SIMULATED_ROLES)}）")
+    if len(set(special_roles)) != len(special_roles):
+        raise ValueError("模擬器中每種特殊角色最多一名")
+
+
+def _pick(rng: np.random.Generator, *masks: np.ndarray):
+    """在每行中按優先順序從候選掩碼裡均勻隨機選一個位置（向量化）
+
+    第一個在該行有候選的掩碼勝出，後面的掩碼只作為後備。
+
+    Args:
+        rng (np.random.Generator): 隨機數生成器
+        *masks (np.ndarray): 形狀相同的布爾掩碼，最後一維是候選位置
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (選中的位置, 該行是否有候選)
+    """
+    priority = np.zeros(masks[0].shape, dtype=np.int8)
+    for level, mask in enumerate(masks):
+        priority = np.where(mask & (priority == 0), len(masks) - level, priority)
+    # 優先級佔整數部分，隨機數佔小數部分，argmax 即在最高優先級的候選中均勻抽取
+    scores = np.where(priority > 0, priority + rng.random(priority.shape), -1.0)
+    return scores.argmax(axis=-1), priority.any(axis=-1)
+
+
+class SimulationBatch:
+    """一批並行模擬的遊戲，每局遊戲是數組中的一行
+
+    規則與 GameState 一致：夜晚依次結算守衛、狼人攻擊、女巫藥水和預言家查驗；白天
+    所有存活玩家投票，得票最多者被放逐，平票無人被放逐；每次死亡後立即判定勝負。
+    討論沒有建模，策略只使用角色掌握的信息（以及預言家公開的查驗結果）。
+    """
+
+    def __init__(self, games: int, player_count: int, werewolf_count: int,
+                 special_roles: Sequence[str], policy: str, rng: np.random.Generator):
+        """按 GameState.setup_game 的方式為每局遊戲隨機分配角色
+
+        Args:
+            games (int): 遊戲局數
+            player_count (int): 玩家數量
+            werewolf_count (int): 狼人數量
+            special_roles (Sequence[str]): 特殊角色列表
+            policy (str): 策略（random 或 heuristic）
+            rng (np.random.Generator): 隨機數生成器
+        """
+        self.rng = rng
+        self.policy = policy
+        self.games = games
+        self.player_count = player_count
+        self.rows = np.arange(games)
+
+        template = [WEREWOLF] * werewolf_count + [ROLE_CODES[r] for r in special_roles]
+        template += [VILLAGER] * (player_count - len(template))
+        self.roles = rng.permuted(np.tile(np.array(template, dtype=np.int8), (games, 1)), axis=1)
+        self.werewolf = self.roles == WEREWOLF
+
+        # 特殊角色的座位（該角色不存在時為 -1）
+        self.seats = {code: np.where((self.roles == code).any(axis=1), (self.roles == code).argmax(axis=1), -1)
+                      for code in (SEER, WITCH, GUARD)}
+
+        self.alive = np.ones((games, player_count), dtype=bool)
+        self.day = np.zeros(games, dtype=np.int16)
+        self.winner = np.full(games, UNDECIDED, dtype=np.int8)
+        self.death_day = np.full((games, player_count), -1, dtype=np.int16)
+
+        self.known = np.zeros((games, player_count), dtype=np.int8)  # 預言家查驗結果：0 未查驗、1 好人、2 狼人
+        self.revealed = np.zeros(games, dtype=bool)  # 預言家是否已公開查驗結果
+        self.has_antidote = np.ones(games, dtype=bool)
+        self.has_poison = np.ones(games, dtype=bool)
+        self.last_protected = np.full(games, -1, dtype=np.int16)
+
+    def _role_alive(self, code: int) -> np.ndarray:
+        """每局遊戲中該角色是否存在且存活"""
+        seat = self.seats[code]
+        return (seat >= 0) & self.alive[self.rows, np.maximum(seat, 0)]
+
+    def _seat_mask(self, seat: np.ndarray) -> np.ndarray:
+        """把每局一個座位號轉換為 (局, 座位) 掩碼，座位號為 -1 時全為 False"""
+        return np.arange(self.player_count) == seat[:, None]
+
+    def _kill(self, games: np.ndarray, target: np.ndarray):
+        """殺死選中的玩家並立即判定勝負
+
+        Args:
+            games (np.ndarray): 執行擊殺的遊戲掩碼
+            target (np.ndarray): 每局的目標座位
+        """
+        games = games & self.alive[self.rows, target]
+        self.alive[self.rows[games], target[games]] = False
+        self.death_day[self.rows[games], target[games]] = self.day[games]
+        self._check_game_over()
+
+    def _check_game_over(self):
+        """與 GameState.check_game_over 相同：狼人全滅村民勝；狼人數不少於村民數狼人勝"""
+        alive_werewolves = (self.alive & self.werewolf).sum(axis=1)
+        alive_villagers = (self.alive & ~self.werewolf).sum(axis=1)
+        undecided = self.winner == UNDECIDED
+        self.winner[undecided & (alive_werewolves == 0)] = VILLAGE_WIN
+        self.winner[undecided & (alive_werewolves > 0) & (alive_werewolves >= alive_villagers)] = WEREWOLF_WIN
+
+    def _public_wolves(self) -> np.ndarray:
+        """預言家公開過的、仍然存活的狼人"""
+        return self.revealed[:, None] & (self.known == 2) & self.alive
+
+    def night(self):
+        """模擬一個夜晚"""
+        rng = self.rng
+        heuristic = self.policy == "heuristic"
+        active = self.winner == UNDECIDED
+        self.day[active] += 1
+        alive_at_dusk = self.alive.copy()
+        seer_alive = self._role_alive(SEER) & active
+        revealed_seer = self._seat_mask(np.where(self.revealed & seer_alive, self.seats[SEER], -1))
+
+        # 守衛：不能連續兩晚守護同一人，啟發式策略優先守護公開身份的預言家
+        protected = np.full(self.games, -1)
+        guarding = self._role_alive(GUARD) & active
+        if guarding.any():
+            candidates = self.alive & ~self._seat_mask(self.last_protected)
+            masks = (revealed_seer & candidates, candidates) if heuristic else (candidates,)
+            target, has = _pick(rng, *masks)
+            protected = np.where(guarding & has, target, -1)
+            self.last_protected = np.where(guarding, protected, self.last_protected).astype(np.int16)
+
+        # 狼人攻擊：啟發式策略優先攻擊公開身份的預言家
+        candidates = self.alive & ~self.werewolf
+        masks = (revealed_seer & candidates, candidates) if heuristic else (candidates,)
+        attack, has = _pick(rng, *masks)
+        attacking = active & has
+
+        # 女巫：每晚最多使用一瓶藥水
+        witch_alive = self._role_alive(WITCH) & active
+        saved = np.zeros(self.games, dtype=bool)
+        poisoning = np.zeros(self.games, dtype=bool)
+        poison = np.zeros(self.games, dtype=np.int64)
+        if witch_alive.any():
+            can_save = witch_alive & self.has_antidote & attacking  # 女巫不知道守衛守護了誰
+            saved = can_save & (True if heuristic else rng.random(self.games) < RANDOM_SAVE_RATE)
+            self.has_antidote &= ~saved
+
+            candidates = self.alive & ~self._seat_mask(self.seats[WITCH])
+            if heuristic:
+                # 只毒預言家公開的狼人
+                poison, has = _pick(rng, self._public_wolves() & candidates)
+                poisoning = witch_alive & self.has_poison & ~saved & has
+            else:
+                poison, has = _pick(rng, candidates)
+                poisoning = witch_alive & self.has_poison & ~saved & has & (rng.random(self.games) < RANDOM_POISON_RATE)
+            self.has_poison &= ~poisoning
+
+        # 預言家查驗存活、未查驗過的玩家（夜裡死亡也能得到結果）
+        candidates = alive_at_dusk & (self.known == 0) & ~self._seat_mask(self.seats[SEER])
+        check, has = _pick(rng, candidates)
+        checking = seer_alive & has
+
+        # 按規則順序結算
+        self._kill(attacking & (attack != protected) & ~saved, attack)
+        self._kill(poisoning, poison)
+        self.known[self.rows[checking], check[checking]] = np.where(
+            self.werewolf[self.rows[checking], check[checking]], 2, 1)
+
+        # 啟發式策略：預言家查到狼人後在白天公開查驗結果
+        if heuristic:
+            self.revealed |= self._role_alive(SEER) & (self.known == 2).any(axis=1) & (self.winner == UNDECIDED)
+
+    def vote(self):
+        """模擬白天投票：得票最多者被放逐，平票無人被放逐"""
+        rng = self.rng
+        n = self.player_count
+        active = self.winner == UNDECIDED
+        voters = self.alive & active[:, None]
+        not_self = ~np.eye(n, dtype=bool)
+        candidates = self.alive[:, None, :] & not_self  # (局, 投票者, 目標)
+
+        if self.policy == "heuristic":
+            is_seer = (np.arange(n) == self.seats[SEER][:, None])[:, :, None]
+            # 預言家按自己的查驗結果投票，其他好人使用公開的查驗結果
+            public_known = np.where(self.revealed[:, None], self.known, 0)[:, None, :]
+            known = np.where(is_seer, self.known[:, None, :], public_known)
+            wolf_voter = self.werewolf[:, :, None]
+
+            # 狼人集中投給同一名好人（優先公開身份的預言家）
+            seer_target = self._seat_mask(np.where(self.revealed, self.seats[SEER], -1)) & self.alive
+            wolf_target, has = _pick(rng, seer_target & ~self.werewolf, self.alive & ~self.werewolf)
+            wolf_choice = self._seat_mask(np.where(has, wolf_target, -1))[:, None, :]
+
+            masks = (
+                candidates & np.where(wolf_voter, wolf_choice, known == 2),
+                candidates & np.where(wolf_voter, ~self.werewolf[:, None, :], known != 1),
+                candidates
+            )
+        else:
+            masks = (candidates,)
+
+        votes, has = _pick(rng, *masks)
+        cast = voters & has
+        counts = ((votes[:, :, None] == np.arange(n)) & cast[:, :, None]).sum(axis=1)
+        top = counts.max(axis=1)
+        exile = active & (top > 0) & ((counts == top[:, None]).sum(axis=1) == 1)
+        self._kill(exile, counts.argmax(axis=1))
+
+    def run(self, max_days: int):
+        """交替模擬夜晚和白天直到所有遊戲結束或達到天數上限
+
+        Args:
+            max_days (int): 天數上限，超過時該局記為未分勝負
+        """
+        for _ in range(max_days):
+            self.night()
+            self.vote()
+            if not (self.winner == UNDECIDED).any():
+                break
+
+
+def simulate(player_count: int, werewolf_count: int, special_roles: Optional[Sequence[str]] = None,
+             games: int = 10000, policy: str = "heuristic", seed: Optional[int] = None,
+             max_days: Optional[int] = None, batch_size: int = 5000) -> Dict[str, np.ndarray]:
+    """用純規則引擎模擬多局遊戲
+
+    Args:
+        player_count (int): 玩家數量
+        werewolf_count (int): 狼人數量
+        special_roles (Optional[Sequence[str]], optional): 特殊角色列表。默認為 None
+        games (int, optional): 遊戲局數。默認為 10000
+        policy (str, optional): 策略（random 或 heuristic）。默認為 "heuristic"
+        seed (Optional[int], optional): 隨機種子。默認為 None
+        max_days (Optional[int], optional): 天數上限。默認為玩家數量（每天至少死一人時足夠結束）
+        batch_size (int, optional): 每批並行模擬的局數，控制內存佔用。默認為 5000
+
+    Returns:
+        Dict[str, np.ndarray]: {"winner": 每局勝負編碼, "days": 每局天數, "roles": 角色編碼,
+                                "death_day": 每個座位的死亡天數（存活為 -1）}
+    """
+    special_roles = list(special_roles or [])
+    validate_config(player_count, werewolf_count, special_roles)
+    if policy not in POLICIES:
+        raise ValueError(f"未知的策略: {policy}")
+
+    rng = np.random.default_rng(seed)
+    batches = []
+    for start in range(0, games, batch_size):
+        batch = SimulationBatch(min(batch_size, games - start), player_count, werewolf_count,
+                                special_roles, policy, rng)
+        batch.run(max_days or player_count)
+        batches.append(batch)
+
+    return {
+        "winner": np.concatenate([b.winner for b in batches]),
+        "days": np.concatenate([b.day for b in batches]),
+        "roles": np.concatenate([b.roles for b in batches]),
+        "death_day": np.concatenate([b.death_day for b in batches])
+    }
+
+
+def summarize(result: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    """匯總模擬結果
+
+    Args:
+        result (Dict[str, np.ndarray]): simulate() 的返回值
+
+    Returns:
+        Dict[str, Any]: 局數、各陣營勝場、村民陣營勝率及其 95% Wilson 區間、平均天數
+    """
+    winner = result["winner"]
+    decided = winner != UNDECIDED
+    village_wins = int((winner == VILLAGE_WIN).sum())
+    low, high = wilson_interval(village_wins, int(decided.sum()))
+    return {
+        "games": len(winner),
+        "village_wins": village_wins,
+        "werewolf_wins": int((winner == WEREWOLF_WIN).sum()),
+        "undecided": int((~decided).sum()),
+        "village_rate": village_wins / decided.sum() if decided.any() else float("nan"),
+        "low": float(low),
+        "high": float(high),
+        "mean_days": float(result["days"][decided].mean()) if decided.any() else float("nan")
+    }
+
+
+def sweep(player_counts: Sequence[int], werewolf_counts: Sequence[int], role_sets: Sequence[Sequence[str]],
+          games: int = 10000, policy: str = "heuristic", seed: Optional[int] = None) -> List[Dict[str, Any]]:
+    """掃描多種遊戲設置，跳過無效的組合
+
+    Args:
+        player_counts (Sequence[int]): 玩家數量
+        werewolf_counts (Sequence[int]): 狼人數量
+        role_sets (Sequence[Sequence[str]]): 特殊角色組合
+        games (int, optional): 每種設置的局數。默認為 10000
+        policy (str, optional): 策略。默認為 "heuristic"
+        seed (Optional[int], optional): 隨機種子。默認為 None
+
+    Returns:
+        List[Dict[str, Any]]: 每種有效設置的匯總（包含 player_count, werewolf_count, special_roles）
+    """
+    seeds = np.random.SeedSequence(seed)
+    rows = []
+    for player_count, werewolf_count, roles in itertools.product(player_counts, werewolf_counts, role_sets):
+        try:
+            validate_config(player_count, werewolf_count, roles)
+        except ValueError:
+            continue
+        result = simulate(player_count, werewolf_count, roles, games, policy, seeds.spawn(1)[0])
+        rows.append({"player_count": player_count, "werewolf_count": werewolf_count,
+                     "special_roles": list(roles), **summarize(result)})
+    return rows
+
+
+def _parse_range(text: str) -> List[int]:
+    """解析 "6-12" 或 "6,8,10" 形式的整數列表"""
+    values = []
+    for part in text.split(","):
+        if "-" in part:
+            start, end = part.split("-")
+            values.extend(range(int(start), int(end) + 1))
+        else:
+            values.append(int(part))
+    return values
+
+
+def main(argv=None):
+    """命令行入口：python -m utils.simulator --players 6-12 --werewolves 1-3 --roles "" seer seer,witch"""
+    # rich 只有命令行輸出需要，simulate() 和 sweep() 不依賴它
+    from rich.console import Console
+    from rich.table import Table
+
+    parser = argparse.ArgumentParser(description="狼人殺純規則模擬器（用於平衡性掃描）")
+    parser.add_argument("--players", default="6-12", help="玩家數量，例如 6-12 或 6,8,10")
+    parser.add_argument("--werewolves", default="1-4", help="狼人數量，例如 1-3")
+    parser.add_argument("--roles", nargs="*", default=["", "seer", "seer,witch", "seer,witch,guard"],
+                        help="特殊角色組合，每個組合用逗號分隔，空字符串表示沒有特殊角色")
+    parser.add_argument("--games", type=int, default=10000, help="每種設置的局數")
+    parser.add_argument("--policy", choices=POLICIES, default="heuristic", help="玩家策略")
+    parser.add_argument("--seed", type=int, help="隨機種子")
+    args = parser.parse_args(argv)
+
+    role_sets = [[r for r in roles.split(",") if r] for roles in args.roles]
+    rows = sweep(_parse_range(args.players), _parse_range(args.werewolves), role_sets,
+                 args.games, args.policy, args.seed)
+
+    table = Table(title=f"平衡性掃描（{args.policy} 策略，每種設置 {args.games} 局）")
+    for column in ("玩家數", "狼人數", "特殊角色", "村民勝率", "95% 區間", "平均天數", "未分勝負"):
+        table.add_column(column, justify="left" if column == "特殊角色" else "right")
+    for row in rows:
+        table.add_row(str(row["player_count"]), str(row["werewolf_count"]), ",".join(row["special_roles"]) or "-",
+                      f"{row['village_rate']:.1%}", f"{row['low']:.1%} – {row['high']:.1%}",
+                      f"{row['mean_days']:.2f}", str(row["undecided"]))
+    Console().print(table)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
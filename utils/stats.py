@@ -0,0 +1,382 @@
+import sqlite3
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from utils.result_writer import result_state
+
+# 分組鍵 → 需要的編碼列
+GROUP_KEYS = ("model", "role", "seat", "model_role")
+
+
+class GameColumns:
+    """以列數組保存多局遊戲的結果，所有統計都在數組上向量化計算
+
+    每個座位一行（seat 級列），每張投票一行（vote 級列）。字符串字段（模型、角色）
+    編碼為整數，對應的名稱保存在 models 和 roles 中。
+    """
+
+    def __init__(self):
+        """初始化空的列數據"""
+        self.models: List[str] = []  # 模型名稱，下標即編碼
+        self.roles: List[str] = []  # 角色代號，下標即編碼
+        self.game_count = 0
+
+        # 座位級列
+        self.seat_game = np.zeros(0, dtype=np.int32)  # 所屬遊戲序號
+        self.seat = np.zeros(0, dtype=np.int16)  # 座位號（player_id）
+        self.seat_model = np.zeros(0, dtype=np.int16)
+        self.seat_role = np.zeros(0, dtype=np.int16)
+        self.seat_werewolf = np.zeros(0, dtype=bool)
+        self.seat_won = np.zeros(0, dtype=np.int8)  # 1 勝、0 負、-1 未分勝負
+        self.seat_death_day = np.zeros(0, dtype=np.int16)  # 死亡天數，存活為 -1
+        self.seat_game_days = np.zeros(0, dtype=np.int16)  # 所屬遊戲的總天數（用於截尾）
+
+        # 投票級列
+        self.vote_model = np.zeros(0, dtype=np.int16)  # 投票者的模型
+        self.vote_voter_werewolf = np.zeros(0, dtype=bool)
+        self.vote_target_werewolf = np.zeros(0, dtype=bool)
+
+    def __len__(self):
+        return len(self.seat)
+
+    def group_codes(self, key: str):
+        """獲取座位級的分組編碼和分組名稱
+
+        Args:
+            key (str): 分組鍵，見 GROUP_KEYS
+
+        Returns:
+            Tuple[np.ndarray, List[str]]: (每個座位的分組編碼, 分組名稱)
+        """
+        if key == "model":
+            return self.seat_model.astype(np.int64), list(self.models)
+        if key == "role":
+            return self.seat_role.astype(np.int64), list(self.roles)
+        if key == "seat":
+            seats = np.unique(self.seat)
+            return np.searchsorted(seats, self.seat).astype(np.int64), [f"座位{s}" for s in seats]
+        if key == "model_role":
+            codes = self.seat_model.astype(np.int64) * len(self.roles) + self.seat_role
+            names = [f"{model} × {role}" for model in self.models for role in self.roles]
+            return codes, names
+        raise ValueError(f"未知的分組鍵: {key}")
+
+
+class _ColumnBuilder:
+    """逐局收集數據，最後一次性轉換為數組"""
+
+    def __init__(self):
+        self.columns = GameColumns()
+        self._model_codes: Dict[str, int] = {}
+        self._role_codes: Dict[str, int] = {}
+        self.seats = {name: [] for name in ("game", "seat", "model", "role", "werewolf", "won", "death", "days")}
+        self.votes = {name: [] for name in ("model", "voter_werewolf", "target_werewolf")}
+
+    def code(self, value: str, codes: Dict[str, int], names: List[str]) -> int:
+        """獲取字符串的整數編碼，新值追加到名稱列表"""
+        if value not in codes:
+            codes[value] = len(names)
+            names.append(value)
+        return codes[value]
+
+    def add(self, record: Dict[str, Any]):
+        """添加一局遊戲
+
+        Args:
+            record (Dict[str, Any]): 統一結果記錄、GameManager.get_game_summary() 的摘要或舊版遊戲狀態
+        """
+        state = result_state(record)
+        summary = record.get("summary", record)
+        models = {p["player_id"]: p.get("model") or "未知" for p in summary.get("players", [])}
+        players = state.get("players") or summary.get("players", [])
+        winner = state.get("winner", summary.get("winner"))
+        days = state.get("day", summary.get("day", 0))
+
+        game_index = self.columns.game_count
+        self.columns.game_count += 1
+        werewolves = set()
+
+        for player in players:
+            is_werewolf = player["role"] == "werewolf"
+            if is_werewolf:
+                werewolves.add(player["player_id"])
+            team = "狼人陣營" if is_werewolf else "村民陣營"
+            death_day = player.get("death_day")
+            if death_day is None and not player.get("is_alive", True):
+                death_day = days  # 舊版記錄沒有死亡天數，按最後一天計
+
+            self.seats["game"].append(game_index)
+            self.seats["seat"].append(player["player_id"])
+            self.seats["model"].append(self.code(models.get(player["player_id"], "未知"),
+                                                 self._model_codes, self.columns.models))
+            self.seats["role"].append(self.code(player["role"], self._role_codes, self.columns.roles))
+            self.seats["werewolf"].append(is_werewolf)
+            self.seats["won"].append(-1 if winner is None else int(team == winner))
+            self.seats["death"].append(-1 if death_day is None else death_day)
+            self.seats["days"].append(days)
+
+        for voter_id, row in (state.get("public_facts") or {}).items():
+            voter_id = int(voter_id)
+            for target_id in row.get("votes", {}).values():
+                self.votes["model"].append(self.code(models.get(voter_id, "未知"),
+                                                     self._model_codes, self.columns.models))
+                self.votes["voter_werewolf"].append(voter_id in werewolves)
+                self.votes["target_werewolf"].append(target_id in werewolves)
+
+    def build(self) -> GameColumns:
+        """把收集到的列表轉換為數組"""
+        columns = self.columns
+        columns.seat_game = np.asarray(self.seats["game"], dtype=np.int32)
+        columns.seat = np.asarray(self.seats["seat"], dtype=np.int16)
+        columns.seat_model = np.asarray(self.seats["model"], dtype=np.int16)
+        columns.seat_role = np.asarray(self.seats["role"], dtype=np.int16)
+        columns.seat_werewolf = np.asarray(self.seats["werewolf"], dtype=bool)
+        columns.seat_won = np.asarray(self.seats["won"], dtype=np.int8)
+        columns.seat_death_day = np.asarray(self.seats["death"], dtype=np.int16)
+        columns.seat_game_days = np.asarray(self.seats["days"], dtype=np.int16)
+        columns.vote_model = np.asarray(self.votes["model"], dtype=np.int16)
+        columns.vote_voter_werewolf = np.asarray(self.votes["voter_werewolf"], dtype=bool)
+        columns.vote_target_werewolf = np.asarray(self.votes["target_werewolf"], dtype=bool)
+        return columns
+
+
+def load_columns(records: Iterable[Dict[str, Any]]) -> GameColumns:
+    """把遊戲記錄轉換為列數組
+
+    Args:
+        records (Iterable[Dict[str, Any]]): 遊戲記錄（統一結果記錄、遊戲摘要或舊版遊戲狀態）
+
+    Returns:
+        GameColumns: 列數據
+    """
+    builder = _ColumnBuilder()
+    for record in records:
+        builder.add(record)
+    return builder.build()
+
+
+def load_columns_from_warehouse(db_path: str) -> GameColumns:
+    """從 SQLite 結果倉庫直接讀取列數組（大量遊戲時比解析 JSON 快得多）
+
+    Args:
+        db_path (str): 數據庫路徑
+
+    Returns:
+        GameColumns: 列數據
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        columns = GameColumns()
+        game_ids = [row[0] for row in conn.execute("SELECT game_id FROM games ORDER BY rowid")]
+        game_index = {game_id: index for index, game_id in enumerate(game_ids)}
+        columns.game_count = len(game_ids)
+
+        rows = conn.execute("""
+            SELECT seats.game_id, seats.player_id, COALESCE(seats.model, '未知'), seats.role,
+                   seats.won, seats.death_day, seats.is_alive, games.day
+            FROM seats JOIN games ON games.game_id = seats.game_id
+        """).fetchall()
+        if rows:
+            game, seat, model, role, won, death_day, is_alive, days = zip(*rows)
+            model_codes, columns.models = _encode(model)
+            role_codes, columns.roles = _encode(role)
+            days = np.asarray(days, dtype=np.int16)
+
+            columns.seat_game = np.fromiter((game_index[g] for g in game), dtype=np.int32, count=len(rows))
+            columns.seat = np.asarray(seat, dtype=np.int16)
+            columns.seat_model = model_codes
+            columns.seat_role = role_codes
+            columns.seat_werewolf = np.asarray(role) == "werewolf"
+            columns.seat_won = np.asarray([-1 if w is None else w for w in won], dtype=np.int8)
+            death = np.asarray([-1 if d is None else d for d in death_day], dtype=np.int16)
+            # 舊版記錄沒有死亡天數，按最後一天計
+            dead_unknown = (death < 0) & (np.asarray(is_alive) == 0)
+            columns.seat_death_day = np.where(dead_unknown, days, death).astype(np.int16)
+            columns.seat_game_days = days
+
+        votes = conn.execute("""
+            SELECT COALESCE(voter.model, '未知'), voter.role = 'werewolf', target.role = 'werewolf'
+            FROM votes
+            JOIN seats AS voter ON voter.game_id = votes.game_id AND voter.player_id = votes.voter_id
+            JOIN seats AS target ON target.game_id = votes.game_id AND target.player_id = votes.target_id
+        """).fetchall()
+        if votes:
+            model, voter_werewolf, target_werewolf = zip(*votes)
+            lookup = {name: code for code, name in enumerate(columns.models)}
+            for name in model:
+                if name not in lookup:
+                    lookup[name] = len(columns.models)
+                    columns.models.append(name)
+            columns.vote_model = np.fromiter((lookup[name] for name in model), dtype=np.int16, count=len(votes))
+            columns.vote_voter_werewolf = np.asarray(voter_werewolf, dtype=bool)
+            columns.vote_target_werewolf = np.asarray(target_werewolf, dtype=bool)
+
+        return columns
+    finally:
+        conn.close()
+
+
+def _encode(values):
+    """把字符串序列編碼為整數數組
+
+    Args:
+        values (Sequence[str]): 字符串序列
+
+    Returns:
+        Tuple[np.ndarray, List[str]]: (編碼數組, 名稱列表)
+    """
+    names, codes = np.unique(np.asarray(values, dtype=object).astype(str), return_inverse=True)
+    return codes.astype(np.int16), [str(name) for name in names]
+
+
+def wilson_interval(successes, totals, z: float = 1.96):
+    """Wilson 分數區間（向量化）
+
+    Args:
+        successes (array-like): 成功次數
+        totals (array-like): 總次數
+        z (float, optional): 正態分位數。默認為 1.96（95%）
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (下限, 上限)，總次數為 0 時為 nan
+    """
+    successes = np.asarray(successes, dtype=float)
+    totals = np.asarray(totals, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        p = successes / totals
+        denominator = 1 + z ** 2 / totals
+        center = (p + z ** 2 / (2 * totals)) / denominator
+        margin = z * np.sqrt(p * (1 - p) / totals + z ** 2 / (4 * totals ** 2)) / denominator
+    return center - margin, center + margin
+
+
+def bootstrap_interval(successes, totals, n_boot: int = 2000, confidence: float = 0.95,
+                       rng: Optional[np.random.Generator] = None):
+    """比例的參數自助法區間（向量化，所有分組一次抽樣）
+
+    對伯努利結果重抽樣等價於從 Binomial(n, p̂) 抽樣，因此不需要逐條記錄重抽。
+
+    Args:
+        successes (array-like): 成功次數
+        totals (array-like): 總次數
+        n_boot (int, optional): 自助抽樣次數。默認為 2000
+        confidence (float, optional): 置信水平。默認為 0.95
+        rng (Optional[np.random.Generator], optional): 隨機數生成器。默認為 None
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (下限, 上限)，總次數為 0 時為 nan
+    """
+    rng = rng or np.random.default_rng()
+    successes = np.asarray(successes, dtype=np.int64)
+    totals = np.asarray(totals, dtype=np.int64)
+    safe_totals = np.maximum(totals, 1)
+    p = successes / safe_totals
+
+    samples = rng.binomial(safe_totals[:, None], p[:, None], size=(len(totals), n_boot)) / safe_totals[:, None]
+    alpha = (1 - confidence) / 2
+    low, high = np.quantile(samples, [alpha, 1 - alpha], axis=1)
+    empty = totals == 0
+    return np.where(empty, np.nan, low), np.where(empty, np.nan, high)
+
+
+def _rates(codes, outcomes, names, method: str):
+    """按分組統計比例和區間
+
+    Args:
+        codes (np.ndarray): 每條記錄的分組編碼
+        outcomes (np.ndarray): 每條記錄的結果（0 或 1）
+        names (List[str]): 分組名稱
+        method (str): 區間方法（"wilson" 或 "bootstrap"）
+
+    Returns:
+        Dict[str, Any]: {"group", "n", "successes", "rate", "low", "high"}，只包含有數據的分組
+    """
+    size = len(names)
+    totals = np.bincount(codes, minlength=size)[:size]
+    successes = np.bincount(codes, weights=outcomes, minlength=size)[:size].astype(np.int64)
+    present = totals > 0
+    totals, successes = totals[present], successes[present]
+
+    if method == "bootstrap":
+        low, high = bootstrap_interval(successes, totals)
+    elif method == "wilson":
+        low, high = wilson_interval(successes, totals)
+    else:
+        raise ValueError(f"未知的區間方法: {method}")
+
+    return {
+        "group": [name for name, keep in zip(names, present) if keep],
+        "n": totals,
+        "successes": successes,
+        "rate": successes / totals,
+        "low": low,
+        "high": high
+    }
+
+
+def win_rates(columns: GameColumns, by: str = "model", method: str = "wilson") -> Dict[str, Any]:
+    """按模型、角色、座位或模型 × 角色統計勝率（只統計已分出勝負的遊戲）
+
+    Args:
+        columns (GameColumns): 列數據
+        by (str, optional): 分組鍵，見 GROUP_KEYS。默認為 "model"
+        method (str, optional): 區間方法（"wilson" 或 "bootstrap"）。默認為 "wilson"
+
+    Returns:
+        Dict[str, Any]: {"group", "n", "successes", "rate", "low", "high"}
+    """
+    codes, names = columns.group_codes(by)
+    decided = columns.seat_won >= 0
+    return _rates(codes[decided], columns.seat_won[decided].astype(float), names, method)
+
+
+def vote_accuracy(columns: GameColumns, method: str = "wilson") -> Dict[str, Any]:
+    """按模型統計村民陣營投票給真正狼人的比例
+
+    Args:
+        columns (GameColumns): 列數據
+        method (str, optional): 區間方法（"wilson" 或 "bootstrap"）。默認為 "wilson"
+
+    Returns:
+        Dict[str, Any]: {"group", "n", "successes", "rate", "low", "high"}
+    """
+    village = ~columns.vote_voter_werewolf
+    return _rates(columns.vote_model[village].astype(np.int64),
+                  columns.vote_target_werewolf[village].astype(float), list(columns.models), method)
+
+
+def survival_curves(columns: GameColumns, by: str = "role") -> Dict[str, Any]:
+    """按分組計算 Kaplan-Meier 存活曲線（遊戲結束時仍存活的座位視為截尾）
+
+    Args:
+        columns (GameColumns): 列數據
+        by (str, optional): 分組鍵，見 GROUP_KEYS。默認為 "role"
+
+    Returns:
+        Dict[str, Any]: {"group": 分組名稱, "days": 天數數組, "survival": 形狀為 (分組數, 天數) 的存活率}
+    """
+    codes, names = columns.group_codes(by)
+    size = len(names)
+    max_day = int(columns.seat_game_days.max()) if len(columns) else 0
+    width = max_day + 1
+
+    died = columns.seat_death_day >= 0
+    # 每個座位被觀察到的最後一天：死亡當天或遊戲的最後一天
+    last_day = np.where(died, columns.seat_death_day, columns.seat_game_days).astype(np.int64)
+
+    deaths = np.bincount(codes[died] * width + last_day[died], minlength=size * width).reshape(size, width)
+    exits = np.bincount(codes * width + last_day, minlength=size * width).reshape(size, width)
+    # 第 d 天開始時仍在觀察中的座位數 = 總數 - 之前各天離開的座位數
+    at_risk = exits[:, ::-1].cumsum(axis=1)[:, ::-1]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        hazard = np.where(at_risk > 0, deaths / at_risk, 0.0)
+    survival = np.cumprod(1 - hazard, axis=1)
+
+    present = exits.sum(axis=1) > 0
+    return {
+        "group": [name for name, keep in zip(names, present) if keep],
+        "days": np.arange(width),
+        "survival": survival[present]
+    }
@@ -0,0 +1,116 @@
+"""發言文本處理工具"""
+import re
+from typing import List, Optional, Tuple
+
+# 中文角色名稱 -> 角色代號
+ROLE_KEYWORDS = {
+    "預言家": "seer",
+    "女巫": "witch",
+    "獵人": "hunter",
+    "守衛": "guard",
+    "白痴": "fool",
+    "長老": "elder",
+    "狼殺手": "wolfkiller",
+    "通靈師": "medium",
+    "魔術師": "magician",
+    "村民": "villager",
+    "狼人": "werewolf"
+}
+
+# 角色代號 -> 中文名稱
+ROLE_DISPLAY_NAMES = {key: name for name, key in ROLE_KEYWORDS.items()}
+
+_PLAYER_REF = re.compile(r'玩家(\d+)')
+_ROLE_ALTERNATION = "|".join(sorted(ROLE_KEYWORDS, key=len, reverse=True))
+_ROLE_CLAIM = re.compile(rf'(?:我是|我就是|本人是|我的身份是|身份是)(?:真的?)?({_ROLE_ALTERNATION})')
+_SENTENCE_SPLIT = re.compile(r'[。！？!?；;\n]+')
+_CLAUSE_SPLIT = re.compile(r'[，,]+')
+_CHECK_CLAIM = re.compile(r'(?:查驗|驗)了?玩家(\d+)[^。！？!?；;\n]{0,12}?(狼人|好人|金水|查殺)'
+                          r'|玩家(\d+)(?:是|為)(狼人|好人|金水|查殺)')
+_SUSPICION_WORDS = re.compile(r'狼人|狼|可疑|懷疑|查殺|投票給|投給|出局|放逐|不對勁|撒謊|說謊')
+_TRUST_WORDS = re.compile(r'好人|金水|相信|信任|清白|不是狼')
+
+
+def extract_player_ids(text: str) -> List[int]:
+    """按出現順序提取文本中提到的玩家 ID（去重）
+
+    Args:
+        text (str): 文本
+
+    Returns:
+        List[int]: 玩家 ID 列表
+    """
+    player_ids = []
+    for match in _PLAYER_REF.findall(text or ""):
+        player_id = int(match)
+        if player_id not in player_ids:
+            player_ids.append(player_id)
+    return player_ids
+
+
+def detect_role_claim(text: str) -> Optional[str]:
+    """檢測發言中的身份聲明，例如「我是預言家」
+
+    Args:
+        text (str): 發言內容
+
+    Returns:
+        Optional[str]: 聲稱的角色代號，沒有聲明時為 None
+    """
+    match = _ROLE_CLAIM.search(text or "")
+    if not match:
+        return None
+    return ROLE_KEYWORDS[match.group(1)]
+
+
+def split_sentences(text: str) -> List[str]:
+    """按中英文句末標點切分句子
+
+    Args:
+        text (str): 文本
+
+    Returns:
+        List[str]: 非空句子列表
+    """
+    return [sentence.strip() for sentence in _SENTENCE_SPLIT.split(text or "") if sentence.strip()]
+
+
+def extract_accusations(text: str) -> List[int]:
+    """提取發言中被懷疑或指控的玩家 ID
+
+    按分句統計：只計入包含懷疑類詞語、且不包含信任類詞語的分句中提到的玩家。
+
+    Args:
+        text (str): 發言內容
+
+    Returns:
+        List[int]: 被指控的玩家 ID 列表（去重，按出現順序）
+    """
+    accused = []
+    clauses = [clause for sentence in split_sentences(text) for clause in _CLAUSE_SPLIT.split(sentence)]
+    for clause in clauses:
+        if not _SUSPICION_WORDS.search(clause) or _TRUST_WORDS.search(clause):
+            continue
+        for player_id in extract_player_ids(clause):
+            if player_id not in accused:
+                accused.append(player_id)
+    return accused
+
+
+def extract_check_claims(text: str) -> List[Tuple[int, str]]:
+    """提取發言中公開的查驗結果，例如「我查驗了玩家3，他是狼人」或「玩家5是金水」
+
+    Args:
+        text (str): 發言內容
+
+    Returns:
+        List[Tuple[int, str]]: [(玩家 ID, "狼人" 或 "好人")]
+    """
+    results = []
+    for match in _CHECK_CLAIM.finditer(text or ""):
+        player_id = int(match.group(1) or match.group(3))
+        verdict = match.group(2) or match.group(4)
+        verdict = "狼人" if verdict in ("狼人", "查殺") else "好人"
+        if (player_id, verdict) not in results:
+            results.append((player_id, verdict))
+    return results
@@ -0,0 +1,374 @@
+import json
+import os
+import re
+import sqlite3
+from typing import Any, Dict, Iterable, List, Tuple
+
+from utils.archive import MAGIC, ArchiveReader, file_game_id, result_files
+from utils.context_budget import classify_event
+from utils.result_writer import load_result, result_state
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    game_id TEXT PRIMARY KEY,
+    source TEXT,
+    day INTEGER,
+    winner TEXT,
+    game_over INTEGER,
+    player_count INTEGER,
+    werewolf_count INTEGER,
+    special_roles TEXT,
+    config TEXT,
+    saved_at REAL
+);
+CREATE TABLE IF NOT EXISTS seats (
+    game_id TEXT NOT NULL,
+    player_id INTEGER NOT NULL,
+    name TEXT,
+    role TEXT,
+    team TEXT,
+    model TEXT,
+    is_alive INTEGER,
+    death_day INTEGER,
+    death_cause TEXT,
+    won INTEGER,
+    PRIMARY KEY (game_id, player_id)
+);
+CREATE TABLE IF NOT EXISTS events (
+    game_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    day INTEGER,
+    kind TEXT,
+    message TEXT,
+    PRIMARY KEY (game_id, seq)
+);
+CREATE TABLE IF NOT EXISTS votes (
+    game_id TEXT NOT NULL,
+    day INTEGER NOT NULL,
+    voter_id INTEGER NOT NULL,
+    target_id INTEGER,
+    PRIMARY KEY (game_id, day, voter_id)
+);
+CREATE TABLE IF NOT EXISTS llm_calls (
+    game_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    player_id INTEGER,
+    model TEXT,
+    prompt_chars INTEGER,
+    response_chars INTEGER,
+    duration REAL,
+    PRIMARY KEY (game_id, seq)
+);
+CREATE INDEX IF NOT EXISTS idx_games_winner ON games (winner);
+CREATE INDEX IF NOT EXISTS idx_games_config ON games (player_count, werewolf_count, special_roles);
+CREATE INDEX IF NOT EXISTS idx_seats_model ON seats (model);
+CREATE INDEX IF NOT EXISTS idx_seats_role ON seats (role);
+CREATE INDEX IF NOT EXISTS idx_seats_model_role ON seats (model, role, won);
+CREATE INDEX IF NOT EXISTS idx_events_kind ON events (kind);
+CREATE INDEX IF NOT EXISTS idx_llm_calls_model ON llm_calls (model);
+"""
+
+# 舊版存檔沒有公開信息表時，從日誌中解析投票
+VOTE_LOG_PATTERN = re.compile(r"玩家(\d+)（[^）]*）投票給了玩家(\d+)")
+DAY_LOG_PATTERN = re.compile(r"^第(\d+)天")
+
+
+def _team(role: str) -> str:
+    """角色所屬陣營
+
+    Args:
+        role (str): 角色代號
+
+    Returns:
+        str: 陣營名稱，與 GameState.winner 一致
+    """
+    return "狼人陣營" if role == "werewolf" else "村民陣營"
+
+
+class Warehouse:
+    """本地 SQLite 遊戲結果倉庫，支持跨遊戲的索引查詢"""
+
+    def __init__(self, path: str = None):
+        """打開（或創建）結果倉庫
+
+        Args:
+            path (str, optional): 數據庫文件路徑。默認為 game_results/warehouse.db
+        """
+        self.path = path or os.path.join(os.getcwd(), "game_results", "warehouse.db")
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        """關閉數據庫連接"""
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def has_game(self, game_id: str) -> bool:
+        """檢查遊戲是否已經導入
+
+        Args:
+            game_id (str): 遊戲 ID
+
+        Returns:
+            bool: 是否已導入
+        """
+        return self.conn.execute("SELECT 1 FROM games WHERE game_id = ?", (game_id,)).fetchone() is not None
+
+    def ingest_record(self, record: Dict[str, Any], game_id: str, source: str = None,
+                      replace: bool = False) -> bool:
+        """導入一局遊戲
+
+        Args:
+            record (Dict[str, Any]): 統一結果記錄或舊版遊戲狀態
+            game_id (str): 遊戲 ID
+            source (str, optional): 來源文件。默認為 None
+            replace (bool, optional): 已存在時是否覆蓋。默認為 False
+
+        Returns:
+            bool: 是否導入（已存在且不覆蓋時為 False）
+
+        Raises:
+            AttributeError, KeyError, TypeError, ValueError: 記錄的結構不符（數據庫保持不變）
+        """
+        exists = self.has_game(game_id)
+        if exists and not replace:
+            return False
+
+        state = result_state(record)
+        players = state.get("players", [])
+        winner = state.get("winner")
+        models = {p["player_id"]: p.get("model") for p in record.get("summary", {}).get("players", [])}
+
+        config = dict(record.get("config") or {})
+        special_roles = config.get("special_roles")
+        if special_roles is None:
+            special_roles = sorted({p["role"] for p in players} - {"villager", "werewolf"})
+
+        # 先構建所有行，結構不符時在修改數據庫之前就拋出異常
+        seats = [(game_id, p["player_id"], p.get("name"), p["role"], _team(p["role"]),
+                  models.get(p["player_id"]), int(p.get("is_alive", False)), p.get("death_day"),
+                  p.get("death_cause"), None if winner is None else int(_team(p["role"]) == winner))
+                 for p in players]
+        events = [(game_id, seq, day, kind, message) for seq, day, kind, message in self._events(state.get("log", []))]
+        votes = [(game_id, day, voter, target) for day, voter, target in self._votes(state)]
+
+        with self.conn:
+            if exists:
+                self._delete_game(game_id)
+            self.conn.execute(
+                "INSERT INTO games VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (game_id, source, state.get("day", 0), winner, int(bool(state.get("game_over"))),
+                 config.get("player_count", len(players)),
+                 config.get("werewolf_count", sum(1 for p in players if p["role"] == "werewolf")),
+                 ",".join(sorted(special_roles)), json.dumps(config, ensure_ascii=False),
+                 record.get("saved_at"))
+            )
+
+            self.conn.executemany("INSERT INTO seats VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", seats)
+            self.conn.executemany("INSERT INTO events VALUES (?, ?, ?, ?, ?)", events)
+            self.conn.executemany("INSERT OR REPLACE INTO votes VALUES (?, ?, ?, ?)", votes)
+
+            journal = record.get("journal")
+            if journal and os.path.exists(journal):
+                self._ingest_llm_calls(game_id, journal)
+
+        return True
+
+    def ingest_paths(self, paths: Iterable[str], replace: bool = False) -> Tuple[int, int]:
+        """導入結果文件、目錄或歸檔文件
+
+        Args:
+            paths (Iterable[str]): 文件或目錄路徑（支持 .json、.json.gz 和 utils.archive 的歸檔文件）
+            replace (bool, optional): 已存在的遊戲是否覆蓋。默認為 False
+
+        Returns:
+            Tuple[int, int]: (導入數量, 跳過數量)
+        """
+        imported = skipped = 0
+        for path in paths:
+            if os.path.isfile(path) and self._is_archive(path):
+                with ArchiveReader(path) as reader:
+                    for entry, record in zip(reader.games, reader):
+                        if self._try_ingest(record, entry["game_id"], path, replace):
+                            imported += 1
+                        else:
+                            skipped += 1
+                continue
+
+            for file_path in result_files(path):
+                try:
+                    record = load_result(file_path)
+                except (OSError, ValueError) as e:
+                    print(f"跳過無法讀取的文件 {file_path}：{e}")
+                    skipped += 1
+                    continue
+                game_id = (record.get("game_id") if isinstance(record, dict) else None) or file_game_id(file_path)
+                if self._try_ingest(record, game_id, file_path, replace):
+                    imported += 1
+                else:
+                    skipped += 1
+
+        return imported, skipped
+
+    def _try_ingest(self, record: Any, game_id: str, source: str, replace: bool) -> bool:
+        """導入一局遊戲，結構不符的記錄（例如缺少 players 或狀態不是字典）只計入跳過數，不中斷整個導入
+
+        Args:
+            record (Any): 讀取的記錄
+            game_id (str): 遊戲 ID
+            source (str): 來源文件
+            replace (bool): 已存在時是否覆蓋
+
+        Returns:
+            bool: 是否導入
+        """
+        try:
+            return self.ingest_record(record, game_id, source, replace)
+        except (AttributeError, KeyError, TypeError, ValueError, sqlite3.IntegrityError) as e:
+            print(f"跳過結構不符的記錄 {game_id}（{source}）：{e!r}")
+            return False
+
+    def win_rate_by_model_role(self) -> List[Tuple[str, str, int, int, float]]:
+        """按模型 × 角色統計勝率（只統計已分出勝負的遊戲）
+
+        Returns:
+            List[Tuple[str, str, int, int, float]]: [(模型, 角色, 局數, 勝場, 勝率)]
+        """
+        return self.conn.execute("""
+            SELECT COALESCE(model, '未知'), role, COUNT(*), SUM(won), AVG(won)
+            FROM seats
+            WHERE won IS NOT NULL
+            GROUP BY model, role
+            ORDER BY model, role
+        """).fetchall()
+
+    def average_days(self) -> List[Tuple[int, int, str, int, float, float]]:
+        """按設置統計平均遊戲天數和狼人勝率
+
+        Returns:
+            List[Tuple[int, int, str, int, float, float]]: [(玩家數, 狼人數, 特殊角色, 局數, 平均天數, 狼人勝率)]
+        """
+        return self.conn.execute("""
+            SELECT player_count, werewolf_count, special_roles, COUNT(*), AVG(day),
+                   AVG(CASE WHEN winner = '狼人陣營' THEN 1.0 ELSE 0.0 END)
+            FROM games
+            WHERE game_over = 1
+            GROUP BY player_count, werewolf_count, special_roles
+            ORDER BY player_count, werewolf_count, special_roles
+        """).fetchall()
+
+    def vote_accuracy(self) -> List[Tuple[str, int, int, float]]:
+        """按模型統計村民陣營的投票準確率（投給真正狼人的比例）
+
+        Returns:
+            List[Tuple[str, int, int, float]]: [(模型, 投票數, 投中狼人數, 準確率)]
+        """
+        return self.conn.execute("""
+            SELECT COALESCE(voter.model, '未知'), COUNT(*),
+                   SUM(target.role = 'werewolf'), AVG(target.role = 'werewolf')
+            FROM votes
+            JOIN seats AS voter ON voter.game_id = votes.game_id AND voter.player_id = votes.voter_id
+            JOIN seats AS target ON target.game_id = votes.game_id AND target.player_id = votes.target_id
+            WHERE voter.team = '村民陣營'
+            GROUP BY voter.model
+            ORDER BY voter.model
+        """).fetchall()
+
+    def _delete_game(self, game_id: str):
+        """刪除一局遊戲的所有數據（在調用者的事務中執行，與重新導入一起提交或回滾）
+
+        Args:
+            game_id (str): 遊戲 ID
+        """
+        for table in ("games", "seats", "events", "votes", "llm_calls"):
+            self.conn.execute(f"DELETE FROM {table} WHERE game_id = ?", (game_id,))
+
+    def _ingest_llm_calls(self, game_id: str, journal_path: str):
+        """從遊戲日誌導入 LLM 調用記錄
+
+        Args:
+            game_id (str): 遊戲 ID
+            journal_path (str): 日誌文件路徑
+        """
+        rows = []
+        with open(journal_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    # 崩潰時寫了一半的最後一行
+                    break
+                if event["type"] != "llm_call":
+                    continue
+                data = event["data"]
+                # 討論摘要器的調用不屬於任何座位，player_id 記為 NULL
+                player_id = data.get("player_id")
+                if not isinstance(player_id, int):
+                    player_id = None
+                rows.append((game_id, event["seq"], player_id, data.get("model"),
+                             data.get("prompt_chars"), len(data.get("response") or ""), data.get("duration")))
+        self.conn.executemany("INSERT OR REPLACE INTO llm_calls VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+    @staticmethod
+    def _events(log: List[str]) -> Iterable[Tuple[int, int, str, str]]:
+        """把遊戲日誌轉換為事件行，天數從日誌中的「第N天」推導
+
+        Args:
+            log (List[str]): 遊戲日誌
+
+        Yields:
+            Tuple[int, int, str, str]: (序號, 天數, 事件類型, 日誌內容)
+        """
+        day = 0
+        for seq, message in enumerate(log):
+            match = DAY_LOG_PATTERN.match(message)
+            if match:
+                day = int(match.group(1))
+            yield seq, day, classify_event(message), message
+
+    @staticmethod
+    def _votes(state: Dict[str, Any]) -> Iterable[Tuple[int, int, int]]:
+        """提取所有投票，優先使用公開信息表，舊版存檔從日誌中解析
+
+        Args:
+            state (Dict[str, Any]): 遊戲狀態
+
+        Yields:
+            Tuple[int, int, int]: (天數, 投票者 ID, 目標 ID)
+        """
+        public_facts = state.get("public_facts")
+        if public_facts:
+            for player_id, row in public_facts.items():
+                for day, target_id in row.get("votes", {}).items():
+                    yield int(day), int(player_id), target_id
+            return
+
+        day = 0
+        for message in state.get("log", []):
+            match = DAY_LOG_PATTERN.match(message)
+            if match:
+                day = int(match.group(1))
+                continue
+            match = VOTE_LOG_PATTERN.search(message)
+            if match:
+                yield day, int(match.group(1)), int(match.group(2))
+
+    @staticmethod
+    def _is_archive(path: str) -> bool:
+        """檢查文件是否是歸檔文件
+
+        Args:
+            path (str): 文件路徑
+
+        Returns:
+            bool: 是否是歸檔文件
+        """
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC